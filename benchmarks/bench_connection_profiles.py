@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark: query throughput with and without the dialect connection profile.
+
+Runs the same read workload from 1, 8 and 64 worker threads against an
+engine created the old way (``pool_size=5, max_overflow=10``, no pragmas)
+and one created from ``connection_profile``. With ``--writer`` a background
+thread keeps committing inserts, which is where WAL matters for SQLite.
+
+By default a SQLite database is generated; pass ``--url`` (and ``--sql``)
+to run against another database.
+
+Usage:
+    python benchmarks/bench_connection_profiles.py [--workers 1 8 64] [--writer]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, make_url, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from text_to_sql.database.profiles import connection_profile
+from text_to_sql.utils.constants import OUTPUT_SEPARATOR
+
+SQLITE_QUERIES = [
+    "SELECT * FROM orders WHERE id = :n",
+    "SELECT customer_id, SUM(total) FROM orders WHERE customer_id = :n % 500 GROUP BY customer_id",
+    "SELECT id, total FROM orders WHERE customer_id = :n % 500 ORDER BY id DESC LIMIT 20",
+]
+
+
+def create_sqlite_database(path: str, rows: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    raw = engine.raw_connection()
+    try:
+        raw.execute(
+            "CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, total REAL, note TEXT)"
+        )
+        raw.execute("CREATE INDEX orders_customer ON orders (customer_id)")
+        raw.executemany(
+            "INSERT INTO orders (customer_id, total, note) VALUES (?, ?, ?)",
+            ((i % 500, (i * 7919) % 1000 + 0.5, f"order {i}") for i in range(rows))
+        )
+        raw.commit()
+    finally:
+        raw.close()
+        engine.dispose()
+
+
+def run_workload(engine, queries, workers: int, total: int, rows: int) -> float:
+    """Run ``total`` queries spread over ``workers`` threads; return queries/s."""
+    def work(count: int, seed: int) -> None:
+        rng = random.Random(seed)
+        for _ in range(count):
+            with engine.connect() as conn:
+                conn.execute(text(rng.choice(queries)), {"n": rng.randrange(1, rows)}).fetchall()
+
+    per_worker = max(total // workers, 1)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(work, per_worker, seed) for seed in range(workers)]:
+            future.result()
+    return per_worker * workers / (time.perf_counter() - start)
+
+
+def start_writer(url: str, stop: threading.Event) -> threading.Thread:
+    """Commit one small insert at a time until stopped."""
+    def write() -> None:
+        engine = create_engine(url)
+        while not stop.is_set():
+            with engine.begin() as conn:
+                conn.execute(text(
+                    "INSERT INTO orders (customer_id, total, note) VALUES (1, 1.0, 'writer')"
+                ))
+            time.sleep(0.001)
+        engine.dispose()
+
+    thread = threading.Thread(target=write, daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="database to use instead of a generated SQLite file")
+    parser.add_argument("--sql", action="append",
+                        help="query to run (repeatable; may use :n); required with --url")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--queries", type=int, default=4000, help="queries per run")
+    parser.add_argument("--writer", action="store_true", help="commit inserts concurrently")
+    args = parser.parse_args()
+
+    logging.getLogger("text_to_sql").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            if not args.sql:
+                parser.error("--sql is required with --url")
+            url, queries = args.url, args.sql
+        else:
+            path = os.path.join(tmp, "orders.db")
+            create_sqlite_database(path, args.rows)
+            url, queries = f"sqlite:///{path}", SQLITE_QUERIES
+
+        engines = [
+            ("pool_size=5, overflow=10", lambda: create_engine(url, pool_size=5, max_overflow=10)),
+            ("connection profile", lambda: connection_profile(url).create_engine()),
+        ]
+
+        print(OUTPUT_SEPARATOR)
+        print(f"Read throughput (queries/s), {make_url(url).get_backend_name()}"
+              f"{', concurrent writer' if args.writer else ''}")
+        print(OUTPUT_SEPARATOR)
+        print(f"{'':28}" + "".join(f"{f'{w} workers':>14}" for w in args.workers))
+
+        for label, build in engines:
+            engine = build()
+            stop = threading.Event()
+            writer = start_writer(url, stop) if args.writer else None
+            try:
+                # Warm the pool and the page cache before timing
+                run_workload(engine, queries, max(args.workers), max(args.workers), args.rows)
+                rates = [
+                    run_workload(engine, queries, workers, args.queries, args.rows)
+                    for workers in args.workers
+                ]
+            finally:
+                stop.set()
+                if writer is not None:
+                    writer.join()
+                engine.dispose()
+            print(f"{label:28}" + "".join(f"{rate:14.0f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
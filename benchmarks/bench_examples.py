@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark few-shot example retrieval.
+
+Fills an ``ExampleStore`` with synthetic verified question/SQL pairs and
+times similarity lookups for new questions phrased like the stored ones.
+Reports the time to add the pairs, lookup p50/p95/p99, and the share of
+lookups that found at least one example.
+
+Usage:
+    python benchmarks/bench_examples.py [--pairs 100000] [--lookups 2000] [--path examples.db]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from text_to_sql.cache import ExampleStore
+from text_to_sql.testing.replay import percentile
+from text_to_sql.utils.constants import OUTPUT_SEPARATOR
+
+TEMPLATES = [
+    ("How many {entity} were created in {month} {year}?",
+     "SELECT COUNT(*) FROM {entity} WHERE created_at LIKE '{year}-%'"),
+    ("List the top {n} {entity} by {metric}",
+     "SELECT * FROM {entity} ORDER BY {metric} DESC LIMIT {n}"),
+    ("What is the average {metric} of {entity} in {city}?",
+     "SELECT AVG({metric}) FROM {entity} WHERE city = '{city}'"),
+    ("Show {entity} from {city} with {metric} above {n}",
+     "SELECT * FROM {entity} WHERE city = '{city}' AND {metric} > {n}"),
+    ("Which {entity} had the highest {metric} in {month}?",
+     "SELECT * FROM {entity} ORDER BY {metric} DESC LIMIT 1"),
+]
+ENTITIES = ["users", "orders", "products", "invoices", "shipments", "customers", "tickets", "reviews"]
+METRICS = ["price", "revenue", "quantity", "rating", "discount", "weight", "age", "score"]
+CITIES = ["Berlin", "Paris", "Rome", "Madrid", "Lisbon", "Vienna", "Prague", "Oslo", "Dublin", "Athens"]
+MONTHS = ["January", "February", "March", "April", "May", "June",
+          "July", "August", "September", "October", "November", "December"]
+
+
+def make_pair(rng: random.Random):
+    question, sql = rng.choice(TEMPLATES)
+    values = {
+        "entity": rng.choice(ENTITIES),
+        "metric": rng.choice(METRICS),
+        "city": rng.choice(CITIES),
+        "month": rng.choice(MONTHS),
+        "year": rng.randint(1950, 2030),
+        "n": rng.randint(1, 5000),
+    }
+    return question.format(**values), sql.format(**values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pairs", type=int, default=100000, help="stored pairs")
+    parser.add_argument("--lookups", type=int, default=2000, help="questions looked up")
+    parser.add_argument("--k", type=int, default=3, help="examples per lookup")
+    parser.add_argument("--path", help="SQLite file to persist the store in (default: memory)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.getLogger("text_to_sql").setLevel(logging.WARNING)
+    rng = random.Random(args.seed)
+
+    store = ExampleStore(args.path, max_entries=args.pairs)
+    start = time.perf_counter()
+    while len(store) < args.pairs:
+        store.add(*make_pair(rng))
+    add_seconds = time.perf_counter() - start
+
+    questions = [make_pair(rng)[0] for _ in range(args.lookups)]
+    timings, found = [], 0
+    for question in questions:
+        start = time.perf_counter()
+        examples = store.search(question, args.k)
+        timings.append(time.perf_counter() - start)
+        found += bool(examples)
+
+    print(OUTPUT_SEPARATOR)
+    print(f"Few-shot retrieval: {len(store)} stored pairs, {args.lookups} lookups, k={args.k}")
+    print(OUTPUT_SEPARATOR)
+    print(f"Added pairs in {add_seconds:.2f}s ({args.pairs / add_seconds:,.0f}/s)")
+    for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        print(f"Lookup {label}: {percentile(timings, fraction) * 1000:.3f} ms")
+    print(f"Lookups with examples: {found / args.lookups:.1%}")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Load test: end-to-end throughput and tail latency with a fake LLM.
+
+Drives the full pipeline (graph, SQL generator, database, formatter) at
+several concurrency levels without any paid API calls. By default the LLM
+is a local OpenAI-compatible server (``FakeOpenAIServer``), so the real
+``ChatOpenAI`` client and HTTP pool are on the path; ``--llm inprocess``
+swaps in ``FakeSQLGenerator`` to measure the pipeline alone. Responses
+come from a scripted question -> SQL mapping and are delayed according to
+``--latency``.
+
+Reports QPS, end-to-end and per-node p50/p95/p99 (from the state's
+``timings``), errors and memory for each concurrency level.
+
+Usage:
+    python benchmarks/bench_load.py [--concurrency 1 8 32] [--latency lognormal:0.3,0.5]
+    python benchmarks/bench_load.py --api async --llm inprocess --latency 0
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from text_to_sql.core.runtime import TextToSQLRuntime
+from text_to_sql.core.sql_generator import LLMSQLGenerator
+from text_to_sql.database import DatabaseManager
+from text_to_sql.testing import FakeOpenAIServer, FakeSQLGenerator, LatencyModel, ScriptedResponses
+from text_to_sql.testing.synthetic import SyntheticDataSpec, load_synthetic_data
+from text_to_sql.utils.constants import OUTPUT_SEPARATOR
+
+NODES = ("schema", "generate_sql", "execute_sql", "format_output")
+
+# Questions about the init_database schema and the SQL the fake LLM answers with
+DEFAULT_SCRIPT = {
+    "Show all users": "SELECT id, name, email, age FROM users ORDER BY id LIMIT 50",
+    "Find users who bought laptops":
+        "SELECT DISTINCT u.name FROM users u JOIN orders o ON o.user_id = u.id "
+        "JOIN products p ON p.id = o.product_id WHERE p.name LIKE '笔记本电脑%' LIMIT 50",
+    "Count total sales for each product":
+        "SELECT p.name, SUM(o.quantity) AS sold FROM products p "
+        "JOIN orders o ON o.product_id = p.id GROUP BY p.name ORDER BY sold DESC",
+    "Show top 3 most expensive products":
+        "SELECT name, price FROM products ORDER BY price DESC LIMIT 3",
+    "Revenue per user":
+        "SELECT user_id, SUM(total_price) AS revenue FROM orders "
+        "GROUP BY user_id ORDER BY revenue DESC LIMIT 20",
+    "Orders of the youngest users":
+        "SELECT o.id, u.name, o.total_price FROM orders o JOIN users u ON u.id = o.user_id "
+        "WHERE u.age < 25 ORDER BY o.id LIMIT 100",
+}
+
+
+def percentile(values, fraction: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))]
+
+
+def run_sync(runtime, questions, concurrency: int, total: int):
+    def one(question):
+        start = time.perf_counter()
+        state = runtime.invoke(question)
+        return time.perf_counter() - start, state
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, (questions[i % len(questions)] for i in range(total))))
+
+
+async def run_async(runtime, questions, concurrency: int, total: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(question):
+        async with semaphore:
+            start = time.perf_counter()
+            state = await runtime.ainvoke(question)
+            return time.perf_counter() - start, state
+
+    return await asyncio.gather(*(one(questions[i % len(questions)]) for i in range(total)))
+
+
+def report(concurrency: int, elapsed: float, samples) -> None:
+    latencies = sorted(seconds for seconds, _ in samples)
+    errors = sum(1 for _, state in samples if state.get("error"))
+    print(f"\nconcurrency {concurrency}: {len(samples) / elapsed:8.1f} QPS, "
+          f"{errors} errors, max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    print(f"  {'stage':16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+    rows = [("end-to-end", latencies)]
+    for node in NODES:
+        rows.append((node, sorted(
+            state["timings"][node] for _, state in samples if node in state.get("timings", {})
+        )))
+    for label, values in rows:
+        if values:
+            print(f"  {label:16}" + "".join(
+                f"{percentile(values, q) * 1000:10.2f}" for q in (0.50, 0.95, 0.99)
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="questions per concurrency level")
+    parser.add_argument("--api", choices=["sync", "async"], default="sync",
+                        help="invoke from a thread pool, or ainvoke on one event loop")
+    parser.add_argument("--llm", choices=["server", "inprocess"], default="server")
+    parser.add_argument("--latency", default="lognormal:0.3,0.5",
+                        help="fixed (0.2), uniform:LOW,HIGH, exponential:MEAN or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of failed LLM calls")
+    parser.add_argument("--script", help="JSON object of question -> SQL (default: built-in)")
+    parser.add_argument("--database-url", help="database to query (default: generated SQLite)")
+    parser.add_argument("--orders", type=int, default=100000, help="rows in the generated orders table")
+    parser.add_argument("--sql-cache", action="store_true",
+                        help="put the SQL cache in front of the LLM (repeated questions skip it)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also report peak Python heap (slows the run down)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger("text_to_sql").setLevel(logging.WARNING)
+
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            answers = json.load(f)
+    else:
+        answers = DEFAULT_SCRIPT
+    script = ScriptedResponses(answers)
+    questions = list(answers)
+    latency = LatencyModel.parse(args.latency)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url
+        if url is None:
+            url = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+            load_synthetic_data(url, SyntheticDataSpec(
+                users=max(args.orders // 20, 10), products=500, orders=args.orders
+            ))
+        database = DatabaseManager(url)
+        server = http_client = http_async_client = None
+
+        if args.llm == "server":
+            server = FakeOpenAIServer(script, latency, args.error_rate, args.seed).start()
+            limits = httpx.Limits(max_connections=max(args.concurrency),
+                                  max_keepalive_connections=max(args.concurrency))
+            http_client = httpx.Client(limits=limits)
+            http_async_client = httpx.AsyncClient(limits=limits)
+            generator = LLMSQLGenerator(
+                model_name="fake-model", api_key="fake-key", base_url=server.base_url,
+                http_client=http_client, http_async_client=http_async_client
+            )
+        else:
+            generator = FakeSQLGenerator(script, latency, args.error_rate, args.seed)
+
+        sql_cache = None
+        if args.sql_cache:
+            from text_to_sql.cache import MemorySQLCache
+            sql_cache = MemorySQLCache()
+        runtime = TextToSQLRuntime(database=database, sql_generator=generator, sql_cache=sql_cache)
+
+        print(OUTPUT_SEPARATOR)
+        print(f"Load test: {args.api} API, {args.llm} LLM, latency {args.latency}, "
+              f"{args.requests} questions per level")
+        print(OUTPUT_SEPARATOR)
+
+        # One loop for the whole run: the async HTTP pool is bound to it
+        loop = asyncio.new_event_loop()
+        if args.api == "async":
+            def run(*run_args):
+                return loop.run_until_complete(run_async(*run_args))
+        else:
+            run = run_sync
+        run(runtime, questions, 1, len(questions))  # warm the schema, pool and caches
+
+        for concurrency in args.concurrency:
+            if args.tracemalloc:
+                tracemalloc.start()
+            start = time.perf_counter()
+            samples = run(runtime, questions, concurrency, args.requests)
+            elapsed = time.perf_counter() - start
+            report(concurrency, elapsed, samples)
+            if args.tracemalloc:
+                print(f"  peak Python heap {tracemalloc.get_traced_memory()[1] / 2**20:.1f} MB")
+                tracemalloc.stop()
+
+        if http_async_client is not None:
+            loop.run_until_complete(http_async_client.aclose())
+        loop.close()
+        if http_client is not None:
+            http_client.close()
+        if server is not None:
+            server.close()
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
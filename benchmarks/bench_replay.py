@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Replay a recorded workload through the agent.
+
+Reads a ``WORKLOAD_LOG`` file and asks every question again, open loop, at
+the recorded pace scaled by ``--speed`` (0 = all at once). The LLM is, by
+default, ``RecordedSQLGenerator``: each question gets the SQL it got when
+recorded, after the time generation took then, so only the schema,
+database and formatting work is real. ``--llm fake`` uses the fake LLM with
+``--latency`` instead and ``--llm real`` the configured model.
+
+Reports QPS, errors, questions answered with different SQL, and
+end-to-end and per-node p50/p95/p99 next to the recorded ones.
+
+Usage:
+    python benchmarks/bench_replay.py workload.jsonl [--speed 10] [--database-url URL]
+    python benchmarks/bench_replay.py workload.jsonl --speed 0 --max-in-flight 32
+"""
+import argparse
+import logging
+import os
+import sys
+from itertools import islice
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from text_to_sql.core.runtime import TextToSQLRuntime
+from text_to_sql.core.workload import read_workload
+from text_to_sql.database import DatabaseManager
+from text_to_sql.testing import (
+    FakeSQLGenerator, LatencyModel, RecordedSQLGenerator, ScriptedResponses, replay,
+)
+from text_to_sql.utils.config import config
+from text_to_sql.utils.constants import OUTPUT_SEPARATOR
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("log", help="workload JSONL file (WORKLOAD_LOG)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="pace relative to the recording (0 = as fast as possible)")
+    parser.add_argument("--llm", choices=["recorded", "fake", "real"], default="recorded")
+    parser.add_argument("--latency", default="lognormal:0.3,0.5",
+                        help="fake LLM latency: fixed (0.2), uniform:LOW,HIGH, "
+                             "exponential:MEAN or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--no-llm-latency", action="store_true",
+                        help="recorded LLM answers immediately")
+    parser.add_argument("--database-url", default=config.database.url,
+                        help="database to query (default: DATABASE_URL)")
+    parser.add_argument("--limit", type=int, help="replay only the first N questions")
+    parser.add_argument("--max-in-flight", type=int, help="cap on concurrent questions")
+    parser.add_argument("--sql-cache", action="store_true",
+                        help="put the SQL cache in front of the LLM")
+    args = parser.parse_args()
+
+    logging.getLogger("text_to_sql").setLevel(logging.WARNING)
+
+    records = list(islice(read_workload(args.log), args.limit))
+    if not records:
+        sys.exit(f"No questions in {args.log}")
+
+    if args.llm == "recorded":
+        generator = RecordedSQLGenerator(records, replay_latency=not args.no_llm_latency)
+    elif args.llm == "fake":
+        script = ScriptedResponses({record.question: record.sql_query
+                                    for record in records if record.sql_query})
+        generator = FakeSQLGenerator(script, LatencyModel.parse(args.latency))
+    else:
+        generator = None
+
+    sql_cache = None
+    if args.sql_cache:
+        from text_to_sql.cache import MemorySQLCache
+        sql_cache = MemorySQLCache()
+
+    database = DatabaseManager(args.database_url)
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator, sql_cache=sql_cache)
+    if runtime.recorder is not None:
+        runtime.recorder.close()  # never append the replay to the log being replayed
+        runtime.recorder = None
+
+    print(OUTPUT_SEPARATOR)
+    print(f"Replay of {len(records)} questions from {args.log}: {args.llm} LLM, "
+          f"speed {args.speed or 'max'}")
+    print(OUTPUT_SEPARATOR)
+
+    report = replay(runtime, records, args.speed, args.max_in_flight)
+    print(report.summary())
+
+    runtime.close()
+    database.close()
+
+
+if __name__ == "__main__":
+    main()
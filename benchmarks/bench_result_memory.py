@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory and formatting cost of QueryResult versus a list of dicts.
+
+Fills a wide SQLite table, fetches it both ways, and measures the memory
+held by each representation (tracemalloc) and the time to format it
+with ``OutputFormatter.format_table``.
+
+Usage:
+    python benchmarks/bench_result_memory.py [--rows 50000] [--columns 20]
+"""
+import argparse
+import gc
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from text_to_sql.database.result import QueryResult
+from text_to_sql.utils.constants import OUTPUT_SEPARATOR
+from text_to_sql.utils.formatter import OutputFormatter
+
+
+def create_wide_table(url: str, rows: int, columns: int) -> None:
+    engine = create_engine(url)
+    raw = engine.raw_connection()
+    try:
+        column_defs = ", ".join(
+            f"col_{c} {'INTEGER' if c % 2 else 'TEXT'}" for c in range(columns)
+        )
+        raw.execute(f"CREATE TABLE wide (id INTEGER PRIMARY KEY, {column_defs})")
+        placeholders = ", ".join("?" for _ in range(columns))
+        raw.executemany(
+            f"INSERT INTO wide ({', '.join(f'col_{c}' for c in range(columns))}) "
+            f"VALUES ({placeholders})",
+            (
+                tuple(r * c if c % 2 else f"value {r % 997}-{c}" for c in range(columns))
+                for r in range(rows)
+            )
+        )
+        raw.commit()
+    finally:
+        raw.close()
+        engine.dispose()
+
+
+def measure(build):
+    """Return (object, bytes held after building it)."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def time_format(results, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        OutputFormatter.format_table(results)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.getLogger("text_to_sql").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'wide.db')}"
+        create_wide_table(url, args.rows, args.columns)
+
+        engine = create_engine(url)
+        with engine.connect() as conn:
+            result = conn.execute(text("SELECT * FROM wide"))
+            columns = list(result.keys())
+            fetched = result.fetchall()
+        engine.dispose()
+
+    print(OUTPUT_SEPARATOR)
+    print(f"Result representation, {args.rows} rows x {len(columns)} columns")
+    print(OUTPUT_SEPARATOR)
+
+    # Both are built from the driver rows exactly as DatabaseManager builds
+    # them; cell values are shared, only the containers differ
+    dicts, dict_bytes = measure(lambda: [dict(zip(columns, row)) for row in fetched])
+    compact, compact_bytes = measure(lambda: QueryResult(columns, [tuple(row) for row in fetched]))
+
+    dict_time = time_format(dicts, args.repeat)
+    compact_time = time_format(compact, args.repeat)
+
+    print(f"{'':14}{'memory':>12}{'format':>12}")
+    print(f"{'list of dicts':14}{dict_bytes / 2**20:9.1f} MB{dict_time * 1000:9.1f} ms")
+    print(f"{'QueryResult':14}{compact_bytes / 2**20:9.1f} MB{compact_time * 1000:9.1f} ms")
+    print(f"\nMemory: {dict_bytes / max(compact_bytes, 1):.1f}x smaller, "
+          f"formatting: {dict_time / compact_time:.1f}x faster, "
+          f"identical output: {OutputFormatter.format_table(dicts) == OutputFormatter.format_table(compact)}")
+
+
+if __name__ == "__main__":
+    main()
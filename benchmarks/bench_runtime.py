@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-query overhead of run_query before and after the runtime.
+
+The LLM is mocked at the HTTP layer (``httpx.MockTransport``) so the real
+``ChatOpenAI`` client is exercised without any network calls. "Before"
+replays the old behaviour (compile the graph, build a generator, a
+``ChatOpenAI`` client and an HTTP client for every question); "after"
+reuses one :class:`TextToSQLRuntime`.
+
+Usage:
+    python benchmarks/bench_runtime.py [--queries 200]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from text_to_sql.core.agent import (
+    build_workflow,
+    create_initial_state,
+    generate_sql,
+    execute_sql,
+    format_output,
+)
+from text_to_sql.core.runtime import TextToSQLRuntime
+from text_to_sql.core.sql_generator import LLMSQLGenerator
+from text_to_sql.database import DatabaseManager
+from text_to_sql.utils.constants import OUTPUT_SEPARATOR
+
+MOCK_SQL = "SELECT id, name FROM users ORDER BY id LIMIT 5"
+
+
+def mock_chat_completion(request: httpx.Request) -> httpx.Response:
+    """Answer every chat completion request with a fixed SQL query."""
+    body = {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "bench-model",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": MOCK_SQL},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+    }
+    return httpx.Response(200, content=json.dumps(body).encode("utf-8"),
+                          headers={"content-type": "application/json"})
+
+
+def make_generator(http_client: httpx.Client) -> LLMSQLGenerator:
+    return LLMSQLGenerator(
+        model_name="bench-model",
+        api_key="bench-key",
+        base_url="http://llm.local/v1",
+        http_client=http_client,
+    )
+
+
+def create_sample_database(path: str) -> DatabaseManager:
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT NOT NULL)"))
+        conn.execute(text("INSERT INTO users (name) VALUES ('a'), ('b'), ('c'), ('d'), ('e'), ('f')"))
+    engine.dispose()
+    return DatabaseManager(f"sqlite:///{path}")
+
+
+def legacy_run_query(question: str, database: DatabaseManager, transport: httpx.MockTransport) -> str:
+    """Old run_query: everything is rebuilt for every question."""
+    def generate(state):
+        generator = make_generator(httpx.Client(transport=transport))
+        return generate_sql(state, sql_generator=generator, database=database)
+
+    def execute(state):
+        return execute_sql(state, database=database)
+
+    agent = build_workflow(generate, execute, format_output).compile()
+    result = agent.invoke(create_initial_state(question))
+    return result["final_output"]
+
+
+def measure(label: str, func, queries: int) -> list:
+    func()  # warm-up
+    timings = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<10} mean={statistics.mean(timings):7.3f} ms  "
+          f"p50={statistics.median(timings):7.3f} ms  p95={p95:7.3f} ms")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger("text_to_sql").setLevel(logging.WARNING)
+
+    transport = httpx.MockTransport(mock_chat_completion)
+    question = "Show the first five users"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = create_sample_database(os.path.join(tmp, "bench.db"))
+
+        print(OUTPUT_SEPARATOR)
+        print(f"Per-query overhead, {args.queries} queries, mocked LLM")
+        print(OUTPUT_SEPARATOR)
+
+        before = measure(
+            "before",
+            lambda: legacy_run_query(question, database, transport),
+            args.queries,
+        )
+
+        shared_client = httpx.Client(transport=transport)
+        runtime = TextToSQLRuntime(
+            database=database,
+            sql_generator=make_generator(shared_client),
+        )
+        after = measure("after", lambda: runtime.run(question), args.queries)
+        shared_client.close()
+        database.close()
+
+    saved = statistics.mean(before) - statistics.mean(after)
+    print(f"\nSaved per query: {saved:.3f} ms "
+          f"({statistics.mean(before) / statistics.mean(after):.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bulk schema reflection versus the per-table inspector.
+
+Builds a synthetic SQLite database with thousands of tables and times
+both reflection paths of ``text_to_sql.database.schema``.
+
+Usage:
+    python benchmarks/bench_schema_reflection.py [--tables 3000] [--columns 8]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from text_to_sql.database.schema import reflect_tables, format_schema
+from text_to_sql.utils.constants import OUTPUT_SEPARATOR
+
+COLUMN_TYPES = ["INTEGER", "VARCHAR(100)", "FLOAT", "DATETIME", "TEXT"]
+
+
+def create_synthetic_schema(url: str, tables: int, columns: int) -> None:
+    engine = create_engine(url)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for t in range(tables):
+            column_defs = ", ".join(
+                f"col_{c} {COLUMN_TYPES[c % len(COLUMN_TYPES)]}"
+                + (" NOT NULL" if c % 3 == 0 else "")
+                for c in range(columns)
+            )
+            cursor.execute(f"CREATE TABLE table_{t:05d} (id INTEGER PRIMARY KEY, {column_defs})")
+        raw.commit()
+    finally:
+        raw.close()
+        engine.dispose()
+
+
+def time_reflection(url: str, bulk: bool, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        # Fresh engine each time: a deploy starts with a cold connection
+        engine = create_engine(url)
+        start = time.perf_counter()
+        schema = format_schema(reflect_tables(engine, bulk=bulk))
+        best = min(best, time.perf_counter() - start)
+        engine.dispose()
+    return best, schema
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tables", type=int, default=3000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.getLogger("text_to_sql").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'schema.db')}"
+        create_synthetic_schema(url, args.tables, args.columns)
+
+        print(OUTPUT_SEPARATOR)
+        print(f"Schema reflection, {args.tables} tables x {args.columns + 1} columns "
+              f"(best of {args.repeat})")
+        print(OUTPUT_SEPARATOR)
+
+        inspector_time, inspector_schema = time_reflection(url, False, args.repeat)
+        bulk_time, bulk_schema = time_reflection(url, True, args.repeat)
+
+    print(f"inspector  {inspector_time * 1000:9.1f} ms")
+    print(f"bulk       {bulk_time * 1000:9.1f} ms")
+    print(f"\nSpeed-up: {inspector_time / bulk_time:.1f}x, "
+          f"identical output: {inspector_schema == bulk_schema}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-pass SQL safety classifier versus the substring scan.
+
+Generates large read queries (many columns, CTEs, literals and comments)
+and times the old ``DANGEROUS_OPERATIONS`` substring scan, the classifier
+on a cold cache and the classifier on a warm cache. Also counts how many
+of the generated reads each approach wrongly rejects.
+
+Usage:
+    python benchmarks/bench_sql_safety.py [--queries 200] [--columns 10 200]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from text_to_sql.database.safety import classify_sql
+from text_to_sql.utils.constants import DANGEROUS_OPERATIONS, OUTPUT_SEPARATOR
+
+# Column names that contain a dangerous keyword as a substring
+TRICKY_COLUMNS = ["updated_at", "deleted_flag", "dropoff_time", "altered_by", "truncated"]
+
+
+def substring_scan(sql_query: str) -> bool:
+    """The previous ``DatabaseManager._is_safe_query``."""
+    query_upper = sql_query.upper().strip()
+    for operation in DANGEROUS_OPERATIONS:
+        if operation in query_upper:
+            return False
+    return True
+
+
+def generate_query(rng: random.Random, columns: int) -> str:
+    names = [
+        rng.choice(TRICKY_COLUMNS) if rng.random() < 0.05 else f"col_{i}"
+        for i in range(columns)
+    ]
+    select = ",\n       ".join(
+        f"t.{name} AS c{i}" if i % 7 else f"coalesce(t.{name}, 'n/a; -- none') AS c{i}"
+        for i, name in enumerate(names)
+    )
+    return (
+        f"-- report {rng.randrange(10**6)}\n"
+        "WITH recent AS (\n"
+        "    SELECT id, created_at FROM events WHERE kind = 'signup' /* last week */\n"
+        ")\n"
+        f"SELECT {select}\n"
+        "FROM wide AS t JOIN recent AS r ON r.id = t.id\n"
+        f"WHERE t.col_0 > {rng.randrange(1000)} AND t.note <> 'it''s done'\n"
+        "ORDER BY t.id"
+    )
+
+
+def best_of(func, queries, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for sql_query in queries:
+            func(sql_query)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(rng: random.Random, count: int, columns: int, repeat: int) -> None:
+    queries = [generate_query(rng, columns) for _ in range(count)]
+    size = sum(len(q) for q in queries) / len(queries)
+
+    def cold(sql_query):
+        classify_sql.__wrapped__(sql_query)
+
+    classify_sql.cache_clear()
+    for sql_query in queries:
+        classify_sql(sql_query)
+
+    print(OUTPUT_SEPARATOR)
+    print(f"SQL safety check, {count} queries of ~{size / 1024:.1f} KB ({columns} columns)")
+    print(OUTPUT_SEPARATOR)
+
+    timings = [
+        ("substring scan", best_of(substring_scan, queries, repeat)),
+        ("classifier (cold)", best_of(cold, queries, repeat)),
+        ("classifier (cached)", best_of(classify_sql, queries, repeat)),
+    ]
+    for label, seconds in timings:
+        print(f"{label:22}{seconds / len(queries) * 1e6:10.1f} us/query")
+
+    rejected_scan = sum(not substring_scan(q) for q in queries)
+    rejected_classifier = sum(not classify_sql(q).is_read_only for q in queries)
+    print(f"\nReads rejected: substring scan {rejected_scan}/{len(queries)}, "
+          f"classifier {rejected_classifier}/{len(queries)}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--columns", type=int, nargs="+", default=[10, 200],
+                        help="select-list widths to generate (one run each)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger("text_to_sql").setLevel(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    for columns in args.columns:
+        run(rng, args.queries, columns, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
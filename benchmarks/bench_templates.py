@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark the template fast path.
+
+Runs a mix of questions through ``TemplateSQLGenerator`` against the
+schema of the configured database and reports, per question, the template
+that answered it (or ``-`` when the LLM would be asked) and the time the
+templates took.
+
+Usage:
+    python benchmarks/bench_templates.py [--database-url URL] [--iterations 2000]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from text_to_sql.core.templates import TemplateSQLGenerator
+from text_to_sql.database import DatabaseManager
+from text_to_sql.utils.config import config
+from text_to_sql.utils.constants import OUTPUT_SEPARATOR
+
+QUESTIONS = [
+    "Show all users",
+    "How many orders are there?",
+    "Top 5 most expensive products",
+    "10 most recent orders",
+    "What is the average price of products?",
+    "Which users placed more than three orders last month?",
+    "Show the total revenue per product category",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=config.database.url,
+                        help="database whose schema the templates resolve against")
+    parser.add_argument("--iterations", type=int, default=2000, help="matches per question")
+    args = parser.parse_args()
+
+    logging.getLogger("text_to_sql").setLevel(logging.WARNING)
+
+    database = DatabaseManager(args.database_url)
+    schema = database.get_schema()
+    generator = TemplateSQLGenerator()
+
+    print(OUTPUT_SEPARATOR)
+    print(f"Template fast path: {len(QUESTIONS)} questions x {args.iterations}")
+    print(OUTPUT_SEPARATOR)
+    for question in QUESTIONS:
+        matched = generator.match(question, schema)
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            generator.match(question, schema)
+        micros = (time.perf_counter() - start) / args.iterations * 1e6
+        template, sql_query = matched if matched else ("-", "")
+        print(f"{micros:8.1f} us  {template:<9}  {question}")
+        if sql_query:
+            print(f"{'':23}{sql_query}")
+
+    database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ import os
 # Add src to path for direct execution
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from scripts.init_database import init_database
+from scripts.init_database import main
 
 if __name__ == "__main__":
-    init_database()
+    main()
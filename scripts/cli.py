@@ -3,7 +3,7 @@
 Interactive CLI for the Text-to-SQL Agent.
 """
 import sys
-from text_to_sql import run_query
+from text_to_sql import get_runtime, run_query_stream
 from text_to_sql.utils.constants import (
     OUTPUT_SEPARATOR,
     CLI_WELCOME,
@@ -15,6 +15,8 @@ from text_to_sql.utils.constants import (
 
 def main():
     """Main CLI interface."""
+    # Warms up in the background while the user types the first question
+    get_runtime()
     print(OUTPUT_SEPARATOR)
     print(CLI_WELCOME)
     print(OUTPUT_SEPARATOR)
@@ -45,10 +47,11 @@ def main():
             if not user_input:
                 continue
             
-            # Run the query
+            # Run the query, writing rows out as they arrive
             print(f"\n{OUTPUT_SEPARATOR}")
-            result = run_query(user_input)
-            print(result)
+            for chunk in run_query_stream(user_input):
+                sys.stdout.write(chunk)
+                sys.stdout.flush()
             print(OUTPUT_SEPARATOR)
             
         except KeyboardInterrupt:
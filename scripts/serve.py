@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Serve the Text-to-SQL agent over HTTP.
+
+Runs ``text_to_sql.server`` under uvicorn (``pip install text_to_sql[server]``)
+in a single process, so the compiled graph, LLM connections, schema and
+caches stay warm for every request.
+"""
+import argparse
+import sys
+
+from text_to_sql.server import create_app
+from text_to_sql.utils.config import config
+
+
+def main():
+    """Command-line entry point."""
+    settings = config.server
+    parser = argparse.ArgumentParser(description="Serve the Text-to-SQL agent over HTTP.")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--concurrency", type=int, default=settings.concurrency,
+                        help="questions answered at once")
+    parser.add_argument("--queue-size", type=int, default=settings.queue_size,
+                        help="questions waiting for a worker before the server answers 429")
+    parser.add_argument("--timeout", type=float, default=settings.request_timeout,
+                        help="seconds per request, queueing included")
+    args = parser.parse_args()
+    
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("uvicorn is required to serve: pip install 'text_to_sql[server]'")
+    
+    app = create_app(
+        concurrency=args.concurrency,
+        queue_size=args.queue_size,
+        request_timeout=args.timeout
+    )
+    # One process: a second worker would duplicate every pool and cache
+    uvicorn.run(app, host=args.host, port=args.port, lifespan="on", log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,12 +13,17 @@ setup(
         for line in open("requirements.txt").readlines()
         if line.strip() and not line.startswith("#")
     ],
+    extras_require={
+        "async": ["aiosqlite>=0.19.0", "asyncpg>=0.28.0"],
+        "server": ["uvicorn>=0.23.0"],
+    },
     python_requires=">=3.9",
     entry_points={
         "console_scripts": [
             "text-to-sql=scripts.cli:main",
             "text-to-sql-demo=scripts.demo:main",
             "text-to-sql-init=scripts.init_database:main",
+            "text-to-sql-serve=scripts.serve:main",
             "text-to-sql-visualize=scripts.visualize_workflow:visualize_workflow",
         ],
     },
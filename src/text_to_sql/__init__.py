@@ -3,9 +3,19 @@ LangGraph Text-to-SQL Agent
 
 A smart agent that converts natural language questions to SQL queries and executes them.
 """
-from .core.agent import run_query, AgentState
+from .core.agent import (
+    run_query,
+    arun_query,
+    run_query_stream,
+    run_queries,
+    arun_queries,
+    AgentState,
+)
 from .core.sql_generator import create_sql_generator
+from .core.runtime import TextToSQLRuntime, QueryOutcome, get_runtime
 from .database.manager import db_manager
+from .database.registry import db_registry
+from .database.result import QueryResult
 from .utils.formatter import OutputFormatter
 from .utils.logger import logger
 from .utils.config import config
@@ -14,6 +24,8 @@ from .utils.exceptions import (
     DatabaseError,
     SchemaRetrievalError,
     SQLExecutionError,
+    QueryTimeoutError,
+    InvalidPageTokenError,
     UnsafeQueryError,
     SQLGenerationError,
 )
@@ -22,9 +34,18 @@ __version__ = "1.0.0"
 
 __all__ = [
     "run_query",
+    "arun_query",
+    "run_query_stream",
+    "run_queries",
+    "arun_queries",
     "AgentState",
     "create_sql_generator",
+    "TextToSQLRuntime",
+    "QueryOutcome",
+    "get_runtime",
     "db_manager",
+    "db_registry",
+    "QueryResult",
     "OutputFormatter",
     "logger",
     "config",
@@ -32,6 +53,8 @@ __all__ = [
     "DatabaseError",
     "SchemaRetrievalError",
     "SQLExecutionError",
+    "QueryTimeoutError",
+    "InvalidPageTokenError",
     "UnsafeQueryError",
     "SQLGenerationError",
 ]
@@ -0,0 +1,23 @@
+"""Caching layers for the Text-to-SQL agent."""
+from .sql_cache import (
+    CacheStats,
+    MemorySQLCache,
+    SQLiteSQLCache,
+    create_sql_cache,
+    sql_cache_key,
+)
+from .example_store import ExampleStore, create_example_store
+from .result_cache import ResultCache, create_result_cache, estimate_size
+
+__all__ = [
+    "CacheStats",
+    "MemorySQLCache",
+    "SQLiteSQLCache",
+    "create_sql_cache",
+    "sql_cache_key",
+    "ResultCache",
+    "create_result_cache",
+    "estimate_size",
+    "ExampleStore",
+    "create_example_store",
+]
@@ -0,0 +1,318 @@
+"""
+Few-shot example store.
+
+Questions the agent answered successfully - the SQL ran and returned rows -
+are kept as verified (question, SQL) pairs. For a new question the most
+similar pairs are shown to the LLM as examples, which steers it towards the
+tables and phrasing that worked before.
+
+Similarity is the Jaccard similarity of the (hashed) character trigrams of
+the normalized questions. Candidates come from a MinHash LSH index, so a
+lookup reads a handful of hash buckets instead of every stored pair and
+stays well under a millisecond at 100k pairs; only the best few candidates
+are ranked by exact Jaccard. Pairs live in memory and, when a path is
+given, in a SQLite file together with their trigram hashes and MinHash
+signatures, so a restart does not rehash them.
+"""
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+from itertools import chain
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from ..utils.config import config
+from ..utils.logger import logger
+from ..utils.metrics import EXAMPLE_LOOKUP_SECONDS
+from ..utils.normalize import normalize_question
+
+SHINGLE_SIZE = 3
+NUM_PERM = 32
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MAX_BUCKET = 32  # entries kept per LSH bucket; the oldest are dropped first
+RERANK_FACTOR = 3  # k * RERANK_FACTOR candidates are ranked by exact Jaccard
+MIN_SIMILARITY = 0.3
+
+_EMPTY = 1 << 32
+
+
+def shingles(question: str) -> FrozenSet[int]:
+    """
+    Hashed character trigrams of a question, after normalization.
+    
+    CRC32 keeps the hashes, and so the stored signatures, identical across
+    processes.
+    
+    Args:
+        question: Question text (raw or normalized)
+    
+    Returns:
+        Set of trigram hashes; questions shorter than a trigram hash whole
+    """
+    return _shingles(normalize_question(question))
+
+
+def _shingles(normalized: str) -> FrozenSet[int]:
+    text = f" {normalized} ".encode("utf-8")
+    if len(text) <= SHINGLE_SIZE:
+        return frozenset((zlib.crc32(text),))
+    return frozenset(
+        zlib.crc32(text[i:i + SHINGLE_SIZE]) for i in range(len(text) - SHINGLE_SIZE + 1)
+    )
+
+
+def minhash(hashes: Iterable[int]) -> Tuple[int, ...]:
+    """
+    MinHash signature of a shingle set (one-permutation hashing).
+    
+    Each shingle hash picks one of ``NUM_PERM`` bins and each bin keeps its
+    smallest value. Empty bins borrow the value of the next filled bin, so
+    short questions still get a full signature.
+    
+    Args:
+        hashes: Shingle hashes
+    
+    Returns:
+        ``NUM_PERM`` bin minimums
+    """
+    bins = [_EMPTY] * NUM_PERM
+    for value in hashes:
+        slot = value % NUM_PERM
+        value //= NUM_PERM
+        if value < bins[slot]:
+            bins[slot] = value
+    
+    filled = [slot for slot in range(NUM_PERM) if bins[slot] != _EMPTY]
+    if filled and len(filled) < NUM_PERM:
+        # Walk backwards so every empty bin sees the next filled one (wrapping)
+        borrowed = bins[filled[0]]
+        for slot in range(NUM_PERM - 1, -1, -1):
+            if bins[slot] == _EMPTY:
+                bins[slot] = borrowed + slot
+            else:
+                borrowed = bins[slot]
+    return tuple(bins)
+
+
+def _band_keys(signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+    return [(band,) + signature[band * ROWS:(band + 1) * ROWS] for band in range(BANDS)]
+
+
+def jaccard(a: FrozenSet[int], b: Sequence[int]) -> float:
+    """Jaccard similarity of a shingle set and a sequence of distinct shingles."""
+    if not a or not b:
+        return 0.0
+    common = len(a.intersection(b))
+    return common / (len(a) + len(b) - common)
+
+
+class _Entry:
+    """A stored pair and its index data."""
+    
+    __slots__ = ("id", "database_name", "normalized", "question", "sql_query", "hashes", "signature")
+    
+    def __init__(self, entry_id: int, database_name: str, normalized: str, question: str,
+                 sql_query: str, hashes: array, signature: Tuple[int, ...]):
+        self.id = entry_id
+        self.database_name = database_name
+        self.normalized = normalized
+        self.question = question
+        self.sql_query = sql_query
+        self.hashes = hashes  # compact: a set per entry would not fit 100k pairs
+        self.signature = signature
+
+
+class ExampleStore:
+    """Verified question/SQL pairs with a MinHash LSH similarity index."""
+    
+    def __init__(self, path: Optional[str] = None, max_entries: int = 100000):
+        """
+        Initialize the store.
+        
+        Args:
+            path: SQLite file to persist pairs in (None keeps them in memory)
+            max_entries: Pairs kept; the oldest are evicted first
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # Entry ids in insertion order, so the first one is the oldest
+        self._entries: Dict[int, _Entry] = {}
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._buckets: Dict[Tuple[int, ...], List[int]] = {}
+        self._next_id = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS examples ("
+                " database_name TEXT NOT NULL,"
+                " normalized TEXT NOT NULL,"
+                " question TEXT NOT NULL,"
+                " sql_query TEXT NOT NULL,"
+                " hashes BLOB NOT NULL,"
+                " signature BLOB NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (database_name, normalized))"
+            )
+            self._conn.commit()
+            self._load()
+    
+    def _load(self) -> None:
+        rows = self._conn.execute(
+            "SELECT database_name, normalized, question, sql_query, hashes, signature "
+            "FROM examples ORDER BY created_at"
+        )
+        for database_name, normalized, question, sql_query, hashes_blob, signature_blob in rows:
+            hashes, signature = array("I"), array("I")
+            hashes.frombytes(hashes_blob)
+            signature.frombytes(signature_blob)
+            if len(signature) != NUM_PERM:
+                signature = minhash(hashes)
+            self._insert(database_name, normalized, question, sql_query, hashes, tuple(signature))
+        self._evict()
+        logger.info(f"Loaded {len(self._entries)} few-shot examples from {self.path}")
+    
+    def _insert(self, database_name: str, normalized: str, question: str,
+                sql_query: str, hashes: array, signature: Tuple[int, ...]) -> None:
+        entry_id = self._ids.get((database_name, normalized))
+        if entry_id is not None:
+            # Same normalized question, so same signature: only the SQL changes
+            entry = self._entries.pop(entry_id)
+            entry.question, entry.sql_query = question, sql_query
+            self._entries[entry_id] = entry
+            return
+        
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = _Entry(
+            entry_id, database_name, normalized, question, sql_query, hashes, signature
+        )
+        self._ids[(database_name, normalized)] = entry_id
+        for band_key in _band_keys(signature):
+            bucket = self._buckets.setdefault(band_key, [])
+            bucket.append(entry_id)
+            if len(bucket) > MAX_BUCKET:
+                del bucket[0]
+    
+    def _evict(self) -> List[Tuple[str, str]]:
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            entry = self._entries.pop(next(iter(self._entries)))
+            del self._ids[(entry.database_name, entry.normalized)]
+            for band_key in _band_keys(entry.signature):
+                bucket = self._buckets.get(band_key)
+                if bucket and entry.id in bucket:
+                    bucket.remove(entry.id)
+                    if not bucket:
+                        del self._buckets[band_key]
+            evicted.append((entry.database_name, entry.normalized))
+        return evicted
+    
+    def add(self, question: str, sql_query: str, database_name: str = "") -> None:
+        """
+        Store a verified pair, replacing the SQL of an identical question.
+        
+        Args:
+            question: Question that was answered
+            sql_query: SQL that ran and returned rows
+            database_name: Database the SQL ran against
+        """
+        question = question.strip()
+        if not question or not sql_query:
+            return
+        normalized = normalize_question(question)
+        hashes = array("I", _shingles(normalized))
+        signature = minhash(hashes)
+        with self._lock:
+            self._insert(database_name, normalized, question, sql_query, hashes, signature)
+            evicted = self._evict()
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO examples VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (database_name, normalized, question, sql_query, hashes.tobytes(),
+                     array("I", signature).tobytes(), time.time())
+                )
+                self._conn.executemany(
+                    "DELETE FROM examples WHERE database_name = ? AND normalized = ?", evicted
+                )
+                self._conn.commit()
+    
+    def search(self, question: str, k: int = 3, database_name: str = "") -> List[Tuple[str, str]]:
+        """
+        Find the stored pairs most similar to a question.
+        
+        Args:
+            question: New question
+            k: Pairs to return
+            database_name: Only pairs recorded against this database match
+        
+        Returns:
+            Up to ``k`` (question, SQL) pairs, most similar first
+        """
+        if k <= 0:
+            return []
+        start = time.perf_counter()
+        grams = shingles(question)
+        signature = minhash(grams)
+        with self._lock:
+            # Entries sharing more bands are more similar; check those first
+            votes = Counter(chain.from_iterable(
+                self._buckets.get(band_key, ()) for band_key in _band_keys(signature)
+            ))
+            candidates = []
+            for entry_id in sorted(votes, key=votes.__getitem__, reverse=True):
+                entry = self._entries[entry_id]
+                if entry.database_name == database_name:
+                    candidates.append(entry)
+                    if len(candidates) == k * RERANK_FACTOR:
+                        break
+        
+        scored = []
+        for entry in candidates:
+            score = jaccard(grams, entry.hashes)
+            if score >= MIN_SIMILARITY:
+                scored.append((score, entry.question, entry.sql_query))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        EXAMPLE_LOOKUP_SECONDS.observe(time.perf_counter() - start)
+        return [(question, sql_query) for _, question, sql_query in scored[:k]]
+    
+    def clear(self) -> None:
+        """Drop every stored pair."""
+        with self._lock:
+            self._entries.clear()
+            self._ids.clear()
+            self._buckets.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM examples")
+                self._conn.commit()
+    
+    def close(self) -> None:
+        """Close the SQLite file, if any."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def create_example_store() -> Optional[ExampleStore]:
+    """
+    Create the few-shot example store described by the configuration.
+    
+    Returns:
+        ``ExampleStore`` persisted at ``EXAMPLE_STORE_PATH`` (in memory when
+        unset); None when ``AGENT_FEW_SHOT_K`` is 0
+    """
+    settings = config.agent
+    if settings.few_shot_k <= 0:
+        return None
+    return ExampleStore(settings.example_store_path, settings.example_store_max_entries)
@@ -0,0 +1,139 @@
+"""
+Result cache for executed SQL.
+
+Caches query results keyed by a normalized SQL fingerprint. Each entry
+remembers the database "data version" it was read at; a lookup with a
+different data version is treated as stale and dropped. Memory use is
+bounded by a global byte budget with LRU eviction.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from ..database.result import QueryResult
+from ..utils.config import config
+from ..utils.logger import logger
+from .sql_cache import CacheStats
+
+
+def estimate_size(results: QueryResult) -> int:
+    """
+    Estimate the memory held by a query result.
+    
+    Args:
+        results: Query results
+    
+    Returns:
+        Approximate size in bytes
+    """
+    size = sys.getsizeof(results.rows)
+    for values in results.rows:
+        size += sys.getsizeof(values)
+        for value in values:
+            size += sys.getsizeof(value)
+    return size
+
+
+class ResultCache:
+    """LRU result cache with a global byte budget and data-version checks."""
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_bytes: Total memory budget for cached results
+        """
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, Tuple[QueryResult, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def current_bytes(self) -> int:
+        """Memory currently accounted to cached results."""
+        return self._bytes
+    
+    def get(self, fingerprint: str, data_version: Any) -> Optional[QueryResult]:
+        """
+        Look up cached results.
+        
+        Args:
+            fingerprint: SQL fingerprint
+            data_version: Current data version of the database
+        
+        Returns:
+            Cached result (shared; treat as read-only), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            
+            results, version, size = entry
+            if version != data_version:
+                del self._entries[fingerprint]
+                self._bytes -= size
+                self.stats.invalidations += 1
+                self.stats.misses += 1
+                return None
+            
+            self._entries.move_to_end(fingerprint)
+            self.stats.hits += 1
+            return results
+    
+    def put(self, fingerprint: str, data_version: Any, results: QueryResult) -> bool:
+        """
+        Store query results.
+        
+        Args:
+            fingerprint: SQL fingerprint
+            data_version: Data version the results were read at
+            results: Query results
+        
+        Returns:
+            True if stored, False if the result alone exceeds the budget
+        """
+        size = estimate_size(results)
+        if size > self.max_bytes:
+            logger.debug(f"Result of {size} bytes exceeds cache budget; not cached")
+            return False
+        
+        with self._lock:
+            previous = self._entries.pop(fingerprint, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            
+            self._entries[fingerprint] = (results, data_version, size)
+            self._bytes += size
+            
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats.evictions += 1
+        
+        return True
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def create_result_cache() -> Optional[ResultCache]:
+    """
+    Create the result cache described by the configuration.
+    
+    Returns:
+        ``ResultCache``, or None when result caching is disabled
+    """
+    if not config.cache.result_cache_enabled:
+        return None
+    return ResultCache(max_bytes=config.cache.result_cache_max_bytes)
@@ -0,0 +1,317 @@
+"""
+Question -> SQL cache.
+
+Caches SQL keyed by the normalized question text and a scope: the
+database name plus a fingerprint of its full schema (not the pruned
+schema a question's prompt carries, which differs per question). Because
+the schema fingerprint is part of the key, SQL generated against an
+older schema is never served; such entries age out through LRU and TTL.
+The runtime stores SQL only once it has executed without error. Two
+backends are provided: an in-memory LRU and an on-disk SQLite store that
+survives restarts.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from ..utils.config import config
+from ..utils.logger import logger
+from ..utils.normalize import normalize_question, schema_fingerprint
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a cache."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class MemorySQLCache:
+    """In-process LRU cache with TTL."""
+    
+    def __init__(self, max_entries: int = 10000, ttl: Optional[float] = 86400):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of cached entries (LRU eviction)
+            ttl: Entry lifetime in seconds; None or 0 disables expiry
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, question: str, fingerprint: str) -> Optional[str]:
+        """
+        Look up cached SQL.
+        
+        Args:
+            question: Normalized question
+            fingerprint: Scope from :func:`sql_cache_key`
+        
+        Returns:
+            Cached SQL, or None on a miss
+        """
+        key = (question, fingerprint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            
+            sql_query, created_at = entry
+            if self.ttl and time.time() - created_at > self.ttl:
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return sql_query
+    
+    def put(self, question: str, fingerprint: str, sql_query: str) -> None:
+        """
+        Store SQL that executed without error.
+        
+        Args:
+            question: Normalized question
+            fingerprint: Scope from :func:`sql_cache_key`
+            sql_query: Generated SQL query
+        """
+        key = (question, fingerprint)
+        with self._lock:
+            self._entries[key] = (sql_query, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+    
+    def invalidate(self, fingerprint: str) -> int:
+        """
+        Drop every entry stored under the given scope.
+        
+        Args:
+            fingerprint: Scope to invalidate (see :func:`sql_cache_key`)
+        
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[1] == fingerprint]
+            for key in stale:
+                del self._entries[key]
+            self.stats.invalidations += len(stale)
+            return len(stale)
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteSQLCache:
+    """On-disk LRU cache with TTL backed by a SQLite file."""
+    
+    def __init__(self, path: str, max_entries: int = 10000, ttl: Optional[float] = 86400):
+        """
+        Open (or create) the cache file.
+        
+        Args:
+            path: Path of the SQLite cache file
+            max_entries: Maximum number of cached entries (LRU eviction)
+            ttl: Entry lifetime in seconds; None or 0 disables expiry
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sql_cache ("
+            " question TEXT NOT NULL,"
+            " fingerprint TEXT NOT NULL,"
+            " sql_query TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (question, fingerprint))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sql_cache_accessed ON sql_cache (accessed_at)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM sql_cache").fetchone()[0]
+        logger.info(f"SQL cache opened at {path} ({self._size} entries)")
+    
+    def get(self, question: str, fingerprint: str) -> Optional[str]:
+        """
+        Look up cached SQL.
+        
+        Args:
+            question: Normalized question
+            fingerprint: Scope from :func:`sql_cache_key`
+        
+        Returns:
+            Cached SQL, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sql_query, created_at FROM sql_cache "
+                "WHERE question = ? AND fingerprint = ?",
+                (question, fingerprint)
+            ).fetchone()
+            
+            if row is None:
+                self.stats.misses += 1
+                return None
+            
+            sql_query, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute(
+                    "DELETE FROM sql_cache WHERE question = ? AND fingerprint = ?",
+                    (question, fingerprint)
+                )
+                self._conn.commit()
+                self._size -= 1
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            
+            self._conn.execute(
+                "UPDATE sql_cache SET accessed_at = ? WHERE question = ? AND fingerprint = ?",
+                (now, question, fingerprint)
+            )
+            self._conn.commit()
+            self.stats.hits += 1
+            return sql_query
+    
+    def put(self, question: str, fingerprint: str, sql_query: str) -> None:
+        """
+        Store SQL that executed without error.
+        
+        Args:
+            question: Normalized question
+            fingerprint: Scope from :func:`sql_cache_key`
+            sql_query: Generated SQL query
+        """
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM sql_cache WHERE question = ? AND fingerprint = ?",
+                (question, fingerprint)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sql_cache "
+                "(question, fingerprint, sql_query, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (question, fingerprint, sql_query, now, now)
+            )
+            if exists is None:
+                self._size += 1
+            
+            overflow = self._size - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM sql_cache WHERE rowid IN ("
+                    " SELECT rowid FROM sql_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,)
+                )
+                self._size -= overflow
+                self.stats.evictions += overflow
+            
+            self._conn.commit()
+    
+    def invalidate(self, fingerprint: str) -> int:
+        """
+        Drop every entry stored under the given scope.
+        
+        Args:
+            fingerprint: Scope to invalidate (see :func:`sql_cache_key`)
+        
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM sql_cache WHERE fingerprint = ?", (fingerprint,)
+            )
+            self._conn.commit()
+            self._size -= cursor.rowcount
+            self.stats.invalidations += cursor.rowcount
+            return cursor.rowcount
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM sql_cache")
+            self._conn.commit()
+            self._size = 0
+    
+    def close(self) -> None:
+        """Close the cache file."""
+        with self._lock:
+            self._conn.close()
+    
+    def __len__(self) -> int:
+        return self._size
+
+
+def sql_cache_key(question: str, schema: str, database_name: str = "") -> Tuple[str, str]:
+    """
+    Cache key of a question asked against a database.
+    
+    Args:
+        question: User's natural language question
+        schema: Full schema of the database (not the pruned prompt schema)
+        database_name: Registered database name or tenant id
+    
+    Returns:
+        Tuple of (normalized question, scope) to pass to ``get``/``put``
+    """
+    return normalize_question(question), f"{database_name}:{schema_fingerprint(schema)}"
+
+
+def create_sql_cache():
+    """
+    Create the question -> SQL cache described by the configuration.
+    
+    Returns:
+        ``SQLiteSQLCache`` when ``SQL_CACHE_PATH`` is set, otherwise
+        ``MemorySQLCache``; None when caching is disabled
+    """
+    settings = config.cache
+    if not settings.sql_cache_enabled:
+        return None
+    
+    if settings.sql_cache_path:
+        return SQLiteSQLCache(
+            settings.sql_cache_path,
+            max_entries=settings.sql_cache_max_entries,
+            ttl=settings.sql_cache_ttl
+        )
+    
+    return MemorySQLCache(
+        max_entries=settings.sql_cache_max_entries,
+        ttl=settings.sql_cache_ttl
+    )
@@ -1,13 +1,39 @@
 """Core components for the Text-to-SQL agent."""
-from .agent import run_query, AgentState, generate_sql, execute_sql, format_output
+from .agent import (
+    run_query,
+    arun_query,
+    run_query_stream,
+    run_queries,
+    arun_queries,
+    AgentState,
+    generate_sql,
+    execute_sql,
+    format_output,
+    agenerate_sql,
+    aexecute_sql,
+    aformat_output,
+)
 from .sql_generator import create_sql_generator, LLMSQLGenerator
+from .templates import TemplateSQLGenerator
+from .runtime import TextToSQLRuntime, QueryOutcome, get_runtime
 
 __all__ = [
     "run_query",
+    "arun_query",
+    "run_query_stream",
+    "run_queries",
+    "arun_queries",
     "AgentState",
     "generate_sql",
     "execute_sql",
     "format_output",
+    "agenerate_sql",
+    "aexecute_sql",
+    "aformat_output",
     "create_sql_generator",
     "LLMSQLGenerator",
+    "TemplateSQLGenerator",
+    "TextToSQLRuntime",
+    "QueryOutcome",
+    "get_runtime",
 ]
@@ -4,14 +4,31 @@ LangGraph-based Text-to-SQL Agent
 This agent converts natural language questions to SQL queries and executes them.
 Refactored for better code readability, maintainability, and extensibility.
 """
-from typing import TypedDict, Sequence, Optional, Union
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import wraps
+from typing import TypedDict, Sequence, Optional, Union, Callable, List, Iterator, Iterable, Dict, Any
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import Runnable
 
-from ..database import db_manager
-from .sql_generator import create_sql_generator
+from ..database import db_registry, Database, DatabaseRegistry, QueryResult, RowStream
+from ..cache.sql_cache import sql_cache_key
+from .sql_generator import create_sql_generator, agenerate_with, generate_with, Example, SQLGenerator
+from ..utils.config import config
 from ..utils.formatter import OutputFormatter
 from ..utils.logger import logger
+from ..utils.metrics import (
+    NODE_SECONDS,
+    NODE_ERRORS,
+    SCHEMA_SECONDS,
+    ROWS_RETURNED,
+    FORMATTED_BYTES,
+    OVERLAP_SAVED_SECONDS,
+    CACHE_REQUESTS,
+)
 from ..utils.constants import (
     MSG_GENERATING_SQL,
     MSG_EXECUTING_SQL,
@@ -31,50 +48,405 @@ class AgentState(TypedDict):
         user_input: The user's natural language question
         database_schema: Database schema information
         sql_query: Generated SQL query
-        query_results: Query execution results as list of dicts (List[Dict[str, Any]])
+        sql_cached: Whether ``sql_query`` came from the SQL cache
+        query_results: Query execution results
         error: Error message if any error occurred
         messages: Message history for conversation
         final_output: Formatted final output
+        stream_results: Whether rows should be streamed instead of buffered
+        row_stream: Lazily fetched rows when streaming
+        output_stream: Lazily formatted output chunks when streaming
+        schema_tokens_saved: Estimated prompt tokens saved by schema pruning
+        results_truncated: Whether ``query_results`` stopped at the row cap
+        next_page_token: Continuation token for the rows past the cap
+        database_name: Target database name or tenant id (empty for the default)
+        timings: Seconds spent per graph node, plus ``schema`` when the
+            schema was fetched, ``warm_up``/``overlap_saved`` when a
+            connection was warmed up during generation and ``warm_up_wait``
+            for the time generation then waited for the warm-up
     """
     user_input: str
     database_schema: str
     sql_query: str
-    query_results: list  # List[Dict[str, Any]]
+    sql_cached: bool
+    query_results: QueryResult
     error: str
     messages: Sequence[Union[HumanMessage, AIMessage, SystemMessage]]
     final_output: str
+    stream_results: bool
+    row_stream: Optional[RowStream]
+    output_stream: Optional[Iterator[str]]
+    schema_tokens_saved: int
+    results_truncated: bool
+    next_page_token: Optional[str]
+    database_name: str
+    timings: Dict[str, float]
+
+
+def create_initial_state(
+    user_input: str,
+    database_schema: str = "",
+    stream_results: bool = False,
+    database_name: str = ""
+) -> AgentState:
+    """
+    Build the initial graph state for a question.
+    
+    Args:
+        user_input: Natural language question from user
+        database_schema: Optional pre-fetched schema; when set, the
+            ``generate_sql`` node uses it instead of fetching its own
+        stream_results: Stream rows through the graph instead of buffering
+        database_name: Registered database name or tenant id to query;
+            empty for the default database
+    
+    Returns:
+        Fresh agent state
+    """
+    return {
+        "user_input": user_input,
+        "database_schema": database_schema,
+        "sql_query": "",
+        "sql_cached": False,
+        "query_results": QueryResult([]),
+        "error": "",
+        "messages": [],
+        "final_output": "",
+        "stream_results": stream_results,
+        "row_stream": None,
+        "output_stream": None,
+        "schema_tokens_saved": 0,
+        "results_truncated": False,
+        "next_page_token": None,
+        "database_name": database_name,
+        "timings": {}
+    }
+
+
+def instrument_node(name: str) -> Callable[[Callable], Callable]:
+    """
+    Record a node's wall time and errors in the metrics registry.
+    
+    The time is also stored in the state's ``timings``. Works for sync and
+    async nodes.
+    
+    Args:
+        name: Node name used as the metric label
+    
+    Returns:
+        Decorator for a node function
+    """
+    def finish(state: AgentState, start: float, failed_before: bool) -> None:
+        elapsed = time.perf_counter() - start
+        NODE_SECONDS.observe(elapsed, node=name)
+        state.setdefault("timings", {})[name] = elapsed
+        if state.get("error") and not failed_before:
+            NODE_ERRORS.inc(node=name)
+    
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_node(state: AgentState, *args, **kwargs) -> AgentState:
+                start, failed_before = time.perf_counter(), bool(state.get("error"))
+                try:
+                    return await func(state, *args, **kwargs)
+                finally:
+                    finish(state, start, failed_before)
+            return async_node
+        
+        @wraps(func)
+        def node(state: AgentState, *args, **kwargs) -> AgentState:
+            start, failed_before = time.perf_counter(), bool(state.get("error"))
+            try:
+                return func(state, *args, **kwargs)
+            finally:
+                finish(state, start, failed_before)
+        return node
+    
+    return decorator
+
+
+def _record_schema_time(state: AgentState, start: float) -> None:
+    elapsed = time.perf_counter() - start
+    SCHEMA_SECONDS.observe(elapsed)
+    state.setdefault("timings", {})["schema"] = elapsed
+
+
+_warm_up_pool: Optional[ThreadPoolExecutor] = None
+_warm_up_pool_lock = threading.Lock()
+
+
+def _warm_up_executor() -> ThreadPoolExecutor:
+    """Worker threads that run connection warm-ups for the sync nodes."""
+    global _warm_up_pool
+    
+    if _warm_up_pool is None:
+        with _warm_up_pool_lock:
+            if _warm_up_pool is None:
+                _warm_up_pool = ThreadPoolExecutor(
+                    max_workers=config.agent.max_concurrency, thread_name_prefix="db-warm-up"
+                )
+    return _warm_up_pool
+
+
+def start_warm_up(database: Database) -> Optional[Future]:
+    """
+    Start warming the database's connection pool in a worker thread.
+    
+    Args:
+        database: Database the generated SQL will run on
+    
+    Returns:
+        Future with the seconds spent, or None when ``AGENT_OVERLAP_WARM_UP``
+        is off or the database cannot warm up
+    """
+    warm_up = getattr(database, "warm_up", None)
+    if not config.agent.overlap_warm_up or warm_up is None:
+        return None
+    return _warm_up_executor().submit(warm_up)
+
+
+def astart_warm_up(database: Database) -> Optional["asyncio.Task[float]"]:
+    """
+    Async variant of :func:`start_warm_up`; the warm-up runs as a task.
+    
+    Args:
+        database: Database the generated SQL will run on
+    
+    Returns:
+        Task with the seconds spent, or None when disabled or unsupported
+    """
+    awarm_up = getattr(database, "awarm_up", None)
+    if not config.agent.overlap_warm_up or awarm_up is None:
+        return None
+    return asyncio.ensure_future(awarm_up())
+
+
+def finish_warm_up(state: AgentState, warm_up: Optional[Future]) -> None:
+    """
+    Wait for a warm-up started with :func:`start_warm_up` and time the overlap.
+    
+    The wait is bounded by ``AGENT_QUERY_TIMEOUT`` and skipped when SQL
+    generation failed, since no query will use the connection.
+    
+    Args:
+        state: Agent state whose ``timings`` receive the result
+        warm_up: Future returned by :func:`start_warm_up`
+    """
+    if warm_up is None:
+        return
+    if state.get("error"):
+        warm_up.cancel()
+        return
+    start = time.perf_counter()
+    try:
+        seconds = warm_up.result(timeout=config.agent.query_timeout or None)
+    except FutureTimeoutError:
+        _record_warm_up_timeout(state, start)
+        return
+    except Exception as e:
+        logger.warning(f"Connection warm-up failed: {e}")
+        return
+    _record_overlap(state, seconds, time.perf_counter() - start)
+
+
+async def afinish_warm_up(state: AgentState, warm_up: Optional["asyncio.Task[float]"]) -> None:
+    """Async variant of :func:`finish_warm_up`."""
+    if warm_up is None:
+        return
+    if state.get("error"):
+        warm_up.cancel()
+        return
+    start = time.perf_counter()
+    try:
+        seconds = await asyncio.wait_for(warm_up, config.agent.query_timeout or None)
+    except asyncio.TimeoutError:
+        _record_warm_up_timeout(state, start)
+        return
+    except Exception as e:
+        logger.warning(f"Connection warm-up failed: {e}")
+        return
+    _record_overlap(state, seconds, time.perf_counter() - start)
+
 
+def _record_overlap(state: AgentState, seconds: float, waited: float) -> None:
+    # Run in sequence the warm-up would have cost ``seconds``; only ``waited`` was paid
+    saved = max(seconds - waited, 0.0)
+    OVERLAP_SAVED_SECONDS.observe(saved)
+    timings = state.setdefault("timings", {})
+    timings["warm_up"] = seconds
+    timings["warm_up_wait"] = waited
+    timings["overlap_saved"] = saved
 
-def generate_sql(state: AgentState) -> AgentState:
+
+def _record_warm_up_timeout(state: AgentState, start: float) -> None:
+    waited = time.perf_counter() - start
+    logger.warning(f"Connection warm-up still running after {waited:.2f}s; not waiting longer")
+    state.setdefault("timings", {})["warm_up_wait"] = waited
+
+
+def resolve_database(
+    state: AgentState,
+    database: Optional[Database] = None,
+    registry: Optional[DatabaseRegistry] = None
+) -> Database:
+    """
+    Pick the database a node should use.
+    
+    Args:
+        state: Agent state carrying ``database_name``
+        database: Database pinned by the caller, if any
+        registry: Registry to look the name up in (defaults to the global one)
+    
+    Returns:
+        The pinned database, or the registry entry named by the state
+    
+    Raises:
+        ConfigurationError: If the state names an unknown database or tenant
+    """
+    if database is not None:
+        return database
+    return (registry or db_registry).get(state.get("database_name"))
+
+
+def prompt_schema(state: AgentState, database: Database) -> str:
+    """
+    Narrow the state's schema to the tables relevant to the question.
+    
+    Uses the database's schema index (top ``AGENT_SCHEMA_TOP_K`` tables plus
+    their foreign-key neighbours). The full schema is returned when pruning
+    is disabled or the state's schema is not the one the index was built from.
+    
+    A pruned schema differs from question to question, so the prompt puts
+    it after the static rules and examples; those stay in the provider's
+    cached prefix either way.
+    
+    Args:
+        state: Agent state with ``user_input`` and ``database_schema`` set
+        database: Database that reflected the schema
+    
+    Returns:
+        Schema text to send to the LLM
+    """
+    schema = state["database_schema"]
+    top_k = config.agent.schema_top_k
+    index = database.schema_index
+    if top_k <= 0 or index is None or index.schema != schema:
+        return schema
+    
+    pruned = index.prune(state["user_input"], top_k)
+    state["schema_tokens_saved"] = pruned.tokens_saved
+    if pruned.tokens_saved:
+        logger.info(
+            f"Schema pruned to {len(pruned.tables)}/{len(index.tables)} tables "
+            f"(~{pruned.tokens_saved} prompt tokens saved)"
+        )
+    return pruned.schema
+
+
+def similar_examples(state: AgentState, example_store: Optional[Any]) -> List[Example]:
+    """
+    Verified (question, SQL) pairs similar to the state's question.
+    
+    Args:
+        state: Agent state with ``user_input`` set
+        example_store: ``ExampleStore`` to search (None disables retrieval)
+    
+    Returns:
+        Up to ``AGENT_FEW_SHOT_K`` pairs recorded against the same database
+    """
+    k = config.agent.few_shot_k
+    if example_store is None or k <= 0:
+        return []
+    examples = example_store.search(state["user_input"], k, state.get("database_name") or "")
+    if examples:
+        logger.info(f"Prompt includes {len(examples)} similar verified examples")
+    return examples
+
+
+def cached_sql(state: AgentState, sql_cache: Optional[Any]) -> Optional[str]:
+    """
+    SQL that already answered the state's question on the same database.
+    
+    Args:
+        state: Agent state with ``user_input`` and the full ``database_schema`` set
+        sql_cache: ``MemorySQLCache`` or ``SQLiteSQLCache`` (None disables the lookup)
+    
+    Returns:
+        Cached SQL, or None on a miss
+    """
+    if sql_cache is None:
+        return None
+    cached = sql_cache.get(*sql_cache_key(
+        state["user_input"], state["database_schema"], state.get("database_name") or ""
+    ))
+    CACHE_REQUESTS.inc(cache="sql", result="miss" if cached is None else "hit")
+    if cached is not None:
+        logger.info("SQL cache hit")
+    return cached
+
+
+@instrument_node("generate_sql")
+def generate_sql(
+    state: AgentState,
+    *,
+    sql_generator: Optional[SQLGenerator] = None,
+    database: Optional[Database] = None,
+    registry: Optional[DatabaseRegistry] = None,
+    example_store: Optional[Any] = None,
+    sql_cache: Optional[Any] = None
+) -> AgentState:
     """
     Node: Generate SQL from natural language.
     
     Args:
         state: Current agent state
-        
+        sql_generator: Generator to use. A new one is created when omitted.
+        database: Database to use. Defaults to the registry entry named by
+            the state's ``database_name``.
+        registry: Registry to resolve ``database_name`` in. Defaults to the
+            global registry.
+        example_store: Store of verified examples to show the LLM the most
+            similar ones from
+        sql_cache: Question -> SQL cache consulted before the generator
+    
     Returns:
         Updated agent state with generated SQL
     """
     logger.info(MSG_GENERATING_SQL)
+    warm_up = None
     
     try:
-        # Get database schema
-        schema = db_manager.get_schema()
-        state["database_schema"] = schema
+        database = resolve_database(state, database, registry)
+        # Open a connection for execute_sql while the schema and LLM are awaited
+        warm_up = start_warm_up(database)
         
-        # Create SQL generator
-        sql_gen = create_sql_generator()
+        # Get database schema (unless the caller pinned one)
+        schema = state.get("database_schema")
+        if not schema:
+            start = time.perf_counter()
+            schema = database.get_schema()
+            _record_schema_time(state, start)
+        state["database_schema"] = schema
         
-        # Generate SQL query
-        sql_query = sql_gen.generate(
-            question=state["user_input"],
-            schema=schema
-        )
+        sql_query = cached_sql(state, sql_cache)
+        state["sql_cached"] = sql_query is not None
+        if sql_query is None:
+            # Create SQL generator unless a long-lived one was supplied
+            sql_gen = sql_generator or create_sql_generator()
+            
+            # Generate SQL query against the relevant part of the schema
+            sql_query = generate_with(
+                sql_gen,
+                state["user_input"],
+                prompt_schema(state, database),
+                similar_examples(state, example_store)
+            )
         
         state["sql_query"] = sql_query
         state["error"] = ""
         logger.info(f"Generated SQL: {sql_query}")
-        
+    
     except SQLGenerationError as e:
         error_msg = f"{MSG_ERROR_PREFIX}{str(e)}"
         state["error"] = str(e)
@@ -84,16 +456,27 @@ def generate_sql(state: AgentState) -> AgentState:
         state["error"] = str(e)
         logger.exception("Unexpected error during SQL generation")
     
+    finish_warm_up(state, warm_up)
     return state
 
 
-def execute_sql(state: AgentState) -> AgentState:
+@instrument_node("execute_sql")
+def execute_sql(
+    state: AgentState,
+    *,
+    database: Optional[Database] = None,
+    registry: Optional[DatabaseRegistry] = None
+) -> AgentState:
     """
     Node: Execute the SQL query.
     
     Args:
         state: Current agent state
-        
+        database: Database to use. Defaults to the registry entry named by
+            the state's ``database_name``.
+        registry: Registry to resolve ``database_name`` in. Defaults to the
+            global registry.
+    
     Returns:
         Updated agent state with query results
     """
@@ -104,63 +487,252 @@ def execute_sql(state: AgentState) -> AgentState:
         return state
     
     try:
-        # Execute query using database manager
-        results = db_manager.execute_query(state["sql_query"])
+        database = resolve_database(state, database, registry)
+        
+        # In streaming mode, rows are fetched lazily by the consumer
+        if state.get("stream_results"):
+            state["row_stream"] = database.stream_query(state["sql_query"])
+            logger.info("Streaming query results")
+            return state
+        
+        # Execute query using database manager (capped at AGENT_MAX_ROWS)
+        results = database.fetch_page(state["sql_query"])
         
         state["query_results"] = results
+        state["results_truncated"] = results.truncated
+        state["next_page_token"] = results.next_token
+        ROWS_RETURNED.observe(len(results))
         
         if results:
             msg = MSG_QUERY_SUCCESS.format(count=len(results))
             logger.info(msg)
         else:
             logger.info(MSG_QUERY_NO_RESULTS)
-            
+    
     except (SQLExecutionError, Exception) as e:
         error_msg = f"{MSG_ERROR_PREFIX}{str(e)}"
         state["error"] = str(e)
-        state["query_results"] = []
+        state["query_results"] = QueryResult([])
         logger.error(error_msg)
     
     return state
 
 
+@instrument_node("format_output")
 def format_output(state: AgentState) -> AgentState:
     """
     Node: Format the final output.
     
     Args:
         state: Current agent state
-        
+    
     Returns:
         Updated agent state with formatted output
     """
     logger.info(MSG_FORMATTING_OUTPUT)
     
+    row_stream = state.get("row_stream")
+    if row_stream is not None and not state.get("error"):
+        rows = [0]
+        output = OutputFormatter.iter_query_output(
+            user_input=state["user_input"],
+            sql_query=state.get("sql_query", ""),
+            batches=_count_rows(row_stream, rows)
+        )
+        state["output_stream"] = _measure_output(output, rows)
+        state["final_output"] = ""
+        return state
+    
     output = OutputFormatter.format_query_output(
         user_input=state["user_input"],
         sql_query=state.get("sql_query", ""),
         results=state.get("query_results", []),
-        error=state.get("error")
+        error=state.get("error"),
+        truncated=state.get("results_truncated", False)
     )
     
     state["final_output"] = output
+    FORMATTED_BYTES.observe(len(output.encode("utf-8")))
     return state
 
 
-def create_text_to_sql_agent() -> StateGraph:
+def _count_rows(batches: Iterable[Sequence[Any]], rows: List[int]) -> Iterator[Sequence[Any]]:
+    """Pass row batches through, adding their sizes to ``rows[0]``."""
+    for batch in batches:
+        rows[0] += len(batch)
+        yield batch
+
+
+def _measure_output(chunks: Iterator[str], rows: List[int]) -> Iterator[str]:
+    """Pass streamed output through and record its size once it is consumed or closed."""
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk.encode("utf-8"))
+            yield chunk
+    finally:
+        chunks.close()
+        ROWS_RETURNED.observe(rows[0])
+        FORMATTED_BYTES.observe(size)
+
+
+@instrument_node("generate_sql")
+async def agenerate_sql(
+    state: AgentState,
+    *,
+    sql_generator: Optional[SQLGenerator] = None,
+    database: Optional[Database] = None,
+    registry: Optional[DatabaseRegistry] = None,
+    example_store: Optional[Any] = None,
+    sql_cache: Optional[Any] = None
+) -> AgentState:
     """
-    Create the LangGraph agent workflow.
+    Async node: Generate SQL from natural language (uses ``ainvoke``).
+    
+    Args:
+        state: Current agent state
+        sql_generator: Generator to use. A new one is created when omitted.
+        database: Database to use. Defaults to the registry entry named by
+            the state's ``database_name``.
+        registry: Registry to resolve ``database_name`` in. Defaults to the
+            global registry.
+        example_store: Store of verified examples to show the LLM the most
+            similar ones from
+        sql_cache: Question -> SQL cache consulted before the generator
     
     Returns:
-        Compiled LangGraph workflow
+        Updated agent state with generated SQL
+    """
+    logger.info(MSG_GENERATING_SQL)
+    warm_up = None
+    
+    try:
+        database = resolve_database(state, database, registry)
+        warm_up = astart_warm_up(database)
+        schema = state.get("database_schema")
+        if not schema:
+            start = time.perf_counter()
+            schema = await database.aget_schema()
+            _record_schema_time(state, start)
+        state["database_schema"] = schema
+        
+        sql_query = cached_sql(state, sql_cache)
+        state["sql_cached"] = sql_query is not None
+        if sql_query is None:
+            sql_gen = sql_generator or create_sql_generator()
+            
+            sql_query = await agenerate_with(
+                sql_gen,
+                state["user_input"],
+                prompt_schema(state, database),
+                similar_examples(state, example_store)
+            )
+        
+        state["sql_query"] = sql_query
+        state["error"] = ""
+        logger.info(f"Generated SQL: {sql_query}")
+    
+    except SQLGenerationError as e:
+        error_msg = f"{MSG_ERROR_PREFIX}{str(e)}"
+        state["error"] = str(e)
+        logger.error(error_msg)
+    except Exception as e:
+        state["error"] = str(e)
+        logger.exception("Unexpected error during SQL generation")
+    
+    await afinish_warm_up(state, warm_up)
+    return state
+
+
+@instrument_node("execute_sql")
+async def aexecute_sql(
+    state: AgentState,
+    *,
+    database: Optional[Database] = None,
+    registry: Optional[DatabaseRegistry] = None
+) -> AgentState:
+    """
+    Async node: Execute the SQL query on the async engine.
+    
+    Args:
+        state: Current agent state
+        database: Database to use. Defaults to the registry entry named by
+            the state's ``database_name``.
+        registry: Registry to resolve ``database_name`` in. Defaults to the
+            global registry.
+    
+    Returns:
+        Updated agent state with query results
+    """
+    logger.info(MSG_EXECUTING_SQL)
+    
+    if state.get("error"):
+        return state
+    
+    try:
+        database = resolve_database(state, database, registry)
+        results = await database.afetch_page(state["sql_query"])
+        
+        state["query_results"] = results
+        state["results_truncated"] = results.truncated
+        state["next_page_token"] = results.next_token
+        ROWS_RETURNED.observe(len(results))
+        
+        if results:
+            logger.info(MSG_QUERY_SUCCESS.format(count=len(results)))
+        else:
+            logger.info(MSG_QUERY_NO_RESULTS)
+    
+    except (SQLExecutionError, Exception) as e:
+        error_msg = f"{MSG_ERROR_PREFIX}{str(e)}"
+        state["error"] = str(e)
+        state["query_results"] = QueryResult([])
+        logger.error(error_msg)
+    
+    return state
+
+
+async def aformat_output(state: AgentState) -> AgentState:
+    """
+    Async node: Format the final output.
+    
+    Formatting is CPU-only, so this simply runs :func:`format_output`.
+    
+    Args:
+        state: Current agent state
+    
+    Returns:
+        Updated agent state with formatted output
+    """
+    return format_output(state)
+
+
+Node = Union[Callable[[AgentState], AgentState], Runnable]
+
+
+def build_workflow(
+    generate_node: Node = generate_sql,
+    execute_node: Node = execute_sql,
+    format_node: Node = format_output
+) -> StateGraph:
+    """
+    Build the (uncompiled) LangGraph workflow.
+    
+    Args:
+        generate_node: Callable or runnable used for the ``generate_sql`` node
+        execute_node: Callable or runnable used for the ``execute_sql`` node
+        format_node: Callable or runnable used for the ``format_output`` node
+    
+    Returns:
+        Uncompiled state graph
     """
     # Create the graph
     workflow = StateGraph(AgentState)
     
     # Add nodes
-    workflow.add_node("generate_sql", generate_sql)
-    workflow.add_node("execute_sql", execute_sql)
-    workflow.add_node("format_output", format_output)
+    workflow.add_node("generate_sql", generate_node)
+    workflow.add_node("execute_sql", execute_node)
+    workflow.add_node("format_output", format_node)
     
     # Add edges
     workflow.set_entry_point("generate_sql")
@@ -168,42 +740,126 @@ def create_text_to_sql_agent() -> StateGraph:
     workflow.add_edge("execute_sql", "format_output")
     workflow.add_edge("format_output", END)
     
-    # Compile the graph
-    app = workflow.compile()
+    return workflow
+
+
+def create_text_to_sql_agent() -> StateGraph:
+    """
+    Create the LangGraph agent workflow.
+    
+    Returns:
+        Compiled LangGraph workflow
+    """
+    app = build_workflow().compile()
     
     logger.debug("LangGraph workflow created successfully")
     return app
 
 
-def run_query(user_input: str) -> str:
+def run_query(user_input: str, database_name: str = "") -> str:
     """
     Run a text-to-SQL query.
     
+    Thin wrapper over the process-wide :class:`TextToSQLRuntime`, which keeps
+    the compiled graph, SQL generator and HTTP connections alive between calls.
+    
     Args:
         user_input: Natural language question from user
-        
+        database_name: Registered database name or tenant id (default database if empty)
+    
     Returns:
         Formatted output string with results
     """
-    logger.info(f"Running query: {user_input}")
+    # Imported lazily: runtime depends on the nodes defined in this module
+    from .runtime import get_runtime
     
-    agent = create_text_to_sql_agent()
+    return get_runtime().run(user_input, database_name)
+
+
+def run_query_stream(user_input: str, database_name: str = "") -> Iterator[str]:
+    """
+    Run a text-to-SQL query and stream the formatted output.
     
-    # Initial state
-    initial_state: AgentState = {
-        "user_input": user_input,
-        "database_schema": "",
-        "sql_query": "",
-        "query_results": [],
-        "error": "",
-        "messages": [],
-        "final_output": ""
-    }
+    Rows are fetched with server-side cursors and formatted batch by batch,
+    so memory stays constant and the first rows appear immediately.
+    
+    Args:
+        user_input: Natural language question from user
+        database_name: Registered database name or tenant id (default database if empty)
+    
+    Yields:
+        Output text chunks
+    """
+    from .runtime import get_runtime
+    
+    yield from get_runtime().stream(user_input, database_name)
+
+
+async def arun_query(user_input: str, database_name: str = "") -> str:
+    """
+    Run a text-to-SQL query without blocking the event loop.
+    
+    LLM calls use ``ainvoke`` and SQL runs on SQLAlchemy's ``AsyncEngine``
+    (aiosqlite/asyncpg), so many questions can be in flight on one loop.
+    
+    Args:
+        user_input: Natural language question from user
+        database_name: Registered database name or tenant id (default database if empty)
+    
+    Returns:
+        Formatted output string with results
+    """
+    from .runtime import get_runtime
+    
+    return await get_runtime().arun(user_input, database_name)
+
+
+def run_queries(
+    questions: Sequence[str],
+    max_concurrency: Optional[int] = None,
+    database_name: str = ""
+) -> List["QueryOutcome"]:
+    """
+    Run many questions through the shared runtime.
     
-    # Run the agent
-    result = agent.invoke(initial_state)
+    See :meth:`TextToSQLRuntime.run_queries`.
     
-    return result.get("final_output", "No output generated")
+    Args:
+        questions: Natural language questions
+        max_concurrency: Maximum questions in flight (defaults to config)
+        database_name: Registered database name or tenant id (default database if empty)
+    
+    Returns:
+        One outcome per question, in input order
+    """
+    from .runtime import get_runtime
+    
+    return get_runtime().run_queries(
+        questions, max_concurrency=max_concurrency, database_name=database_name
+    )
+
+
+async def arun_queries(
+    questions: Sequence[str],
+    max_concurrency: Optional[int] = None,
+    database_name: str = ""
+) -> List["QueryOutcome"]:
+    """
+    Async variant of :func:`run_queries`.
+    
+    Args:
+        questions: Natural language questions
+        max_concurrency: Maximum questions in flight (defaults to config)
+        database_name: Registered database name or tenant id (default database if empty)
+    
+    Returns:
+        One outcome per question, in input order
+    """
+    from .runtime import get_runtime
+    
+    return await get_runtime().arun_queries(
+        questions, max_concurrency=max_concurrency, database_name=database_name
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,674 @@
+"""
+Long-lived runtime for the Text-to-SQL agent.
+
+The runtime owns everything that is expensive to build: the compiled
+LangGraph workflow, one shared SQL generator, a keep-alive HTTP client
+for the LLM and the database registry. Create it once and reuse it for
+every question.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional, Any, List, Sequence, Dict, Iterator
+
+from langchain_core.runnables import RunnableLambda
+
+from ..cache.example_store import ExampleStore, create_example_store
+from ..cache.sql_cache import create_sql_cache, sql_cache_key
+from ..database import db_registry, Database, DatabaseRegistry, QueryResult
+from ..utils.config import config
+from ..utils.exceptions import TextToSQLError
+from ..utils.logger import logger
+from ..utils.metrics import start_metrics_exporter
+from ..utils.normalize import normalize_question
+from ..utils.singleflight import SingleFlight
+from .agent import (
+    AgentState,
+    build_workflow,
+    create_initial_state,
+    generate_sql,
+    execute_sql,
+    format_output,
+    agenerate_sql,
+    aexecute_sql,
+    aformat_output,
+)
+from .templates import TemplateSQLGenerator
+from .workload import WorkloadRecord, WorkloadRecorder, create_workload_recorder
+from .sql_generator import (
+    SQLGenerator,
+    SingleFlightSQLGenerator,
+    create_sql_generator,
+    create_http_client,
+    create_async_http_client,
+    warm_http_client,
+    awarm_http_client,
+)
+
+
+@dataclass
+class QueryOutcome:
+    """Result of one question in a batch."""
+    question: str
+    sql_query: str = ""
+    results: QueryResult = field(default_factory=lambda: QueryResult([]))
+    output: str = ""
+    error: str = ""
+    truncated: bool = False
+    next_page_token: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    
+    @property
+    def ok(self) -> bool:
+        """Whether the question was answered without error."""
+        return not self.error
+    
+    @classmethod
+    def from_state(cls, question: str, state: AgentState) -> "QueryOutcome":
+        """Build an outcome from a final agent state."""
+        return cls(
+            question=question,
+            sql_query=state.get("sql_query", ""),
+            results=state.get("query_results") or QueryResult([]),
+            output=state.get("final_output", ""),
+            error=state.get("error", ""),
+            truncated=state.get("results_truncated", False),
+            next_page_token=state.get("next_page_token"),
+            timings=state.get("timings") or {}
+        )
+
+
+class TextToSQLRuntime:
+    """Reusable session that runs questions through a single compiled graph."""
+    
+    def __init__(
+        self,
+        database: Optional[Database] = None,
+        registry: Optional[DatabaseRegistry] = None,
+        sql_generator: Optional[SQLGenerator] = None,
+        http_client: Optional[Any] = None,
+        http_async_client: Optional[Any] = None,
+        sql_cache: Optional[Any] = None,
+        use_mock: bool = False,
+        recorder: Optional[WorkloadRecorder] = None,
+        single_flight: Optional[bool] = None,
+        example_store: Optional[ExampleStore] = None,
+        templates: Optional[bool] = None
+    ):
+        """
+        Initialize the runtime.
+        
+        Args:
+            database: Database to pin every question to. When omitted, each
+                question uses the registry entry named by its ``database_name``.
+            registry: Database registry to route questions with. Defaults to
+                the global registry.
+            sql_generator: SQL generator to share across queries. When omitted,
+                an LLM generator backed by a pooled HTTP client is created.
+            http_client: Optional ``httpx.Client`` for the LLM. Ignored when
+                ``sql_generator`` is given.
+            http_async_client: Optional ``httpx.AsyncClient`` for the LLM.
+                Ignored when ``sql_generator`` is given.
+            sql_cache: Question -> SQL cache consulted before the generator;
+                SQL is stored once it has executed without error. When
+                omitted and the runtime builds its own LLM generator, the
+                cache described by ``CacheConfig`` is used.
+            use_mock: If True, uses the mock generator (no API key needed)
+            recorder: Workload log that answered questions are appended to.
+                Defaults to ``WORKLOAD_LOG`` when it is set.
+            single_flight: Let identical questions asked at the same time
+                share one SQL generation (default: ``AGENT_SINGLE_FLIGHT``)
+            example_store: Verified question/SQL pairs; answered questions
+                are added and the most similar are shown to the LLM. When
+                omitted and the runtime builds its own LLM generator, the
+                store described by ``AgentConfig`` is used.
+            templates: Answer common question shapes from templates before
+                asking the generator (default: ``AGENT_TEMPLATES`` when the
+                runtime builds its own LLM generator, off otherwise, including
+                with ``use_mock``)
+        """
+        self.database = database
+        self.registry = registry or db_registry
+        self._owns_http_client = False
+        
+        self._owns_example_store = False
+        if templates is None:
+            templates = sql_generator is None and not use_mock and config.agent.templates
+        if sql_generator is None:
+            if sql_cache is None and not use_mock:
+                sql_cache = create_sql_cache()
+            if example_store is None and not use_mock:
+                example_store = create_example_store()
+                self._owns_example_store = True
+            if http_client is None and http_async_client is None and not use_mock:
+                http_client = create_http_client()
+                http_async_client = create_async_http_client()
+                self._owns_http_client = True
+            sql_generator = create_sql_generator(
+                use_mock=use_mock,
+                http_client=http_client,
+                http_async_client=http_async_client
+            )
+        
+        if templates:
+            sql_generator = TemplateSQLGenerator(sql_generator)
+        
+        self.http_client = http_client
+        self.http_async_client = http_async_client
+        self.sql_cache = sql_cache
+        self.sql_generator = sql_generator
+        self.example_store = example_store
+        if single_flight is None:
+            single_flight = config.agent.single_flight
+        self.generation_flight = SingleFlight("generate_sql") if single_flight else None
+        self._owns_recorder = recorder is None
+        self.recorder = recorder if recorder is not None else create_workload_recorder()
+        self._graph = None
+        self._lock = threading.Lock()
+    
+    @property
+    def graph(self):
+        """
+        Get or compile the LangGraph workflow.
+        
+        Every node carries both a sync and an async implementation, so the
+        same compiled graph serves ``invoke`` and ``ainvoke``.
+        
+        Returns:
+            Compiled LangGraph workflow bound to this runtime
+        """
+        if self._graph is None:
+            with self._lock:
+                if self._graph is None:
+                    self._graph = build_workflow(
+                        RunnableLambda(self.generate_sql, afunc=self.agenerate_sql,
+                                       name="generate_sql"),
+                        RunnableLambda(self.execute_sql, afunc=self.aexecute_sql,
+                                       name="execute_sql"),
+                        RunnableLambda(self.format_output, afunc=self.aformat_output,
+                                       name="format_output")
+                    ).compile()
+                    logger.debug("Runtime workflow compiled")
+        
+        return self._graph
+    
+    def database_for(self, database_name: str = "") -> Database:
+        """
+        Database that questions for ``database_name`` run against.
+        
+        Args:
+            database_name: Registered database name or tenant id
+        
+        Returns:
+            The pinned database, or the registry entry
+        """
+        if self.database is not None:
+            return self.database
+        return self.registry.get(database_name)
+    
+    def prewarm(self, database_name: str = "") -> Dict[str, float]:
+        """
+        Do the one-time work of the first question ahead of it.
+        
+        Compiles the graph, fetches the schema, opens and pings a database
+        connection and opens the LLM HTTP connection. Failures are logged,
+        not raised: the database or LLM may come up after the process.
+        
+        Args:
+            database_name: Registered database name or tenant id to warm
+        
+        Returns:
+            Seconds spent per step
+        """
+        timings = {}
+        start = time.perf_counter()
+        self.graph
+        timings["graph"] = time.perf_counter() - start
+        
+        database = self.database_for(database_name)
+        start = time.perf_counter()
+        try:
+            database.get_schema()
+        except TextToSQLError as e:
+            logger.warning(f"Schema warm-up failed: {e}")
+        timings["schema"] = time.perf_counter() - start
+        
+        if hasattr(database, "warm_up"):
+            timings["database"] = database.warm_up()
+        if self.http_client is not None:
+            timings["llm"] = warm_http_client(self.http_client)
+        return timings
+    
+    async def aprewarm(self, database_name: str = "") -> Dict[str, float]:
+        """
+        Async variant of :meth:`prewarm`; the schema, database and LLM
+        connections are warmed concurrently.
+        
+        Args:
+            database_name: Registered database name or tenant id to warm
+        
+        Returns:
+            Seconds spent per step
+        """
+        timings = {}
+        start = time.perf_counter()
+        self.graph
+        timings["graph"] = time.perf_counter() - start
+        
+        database = self.database_for(database_name)
+        
+        async def fetch_schema() -> float:
+            start = time.perf_counter()
+            try:
+                await database.aget_schema()
+            except TextToSQLError as e:
+                logger.warning(f"Schema warm-up failed: {e}")
+            return time.perf_counter() - start
+        
+        steps = {"schema": fetch_schema()}
+        if hasattr(database, "awarm_up"):
+            steps["database"] = database.awarm_up()
+        if self.http_async_client is not None:
+            steps["llm"] = awarm_http_client(self.http_async_client)
+        timings.update(zip(steps, await asyncio.gather(*steps.values())))
+        return timings
+    
+    def _generator(self) -> SQLGenerator:
+        """The shared generator, behind single-flight when enabled."""
+        if self.generation_flight is None:
+            return self.sql_generator
+        return SingleFlightSQLGenerator(self.sql_generator, self.generation_flight)
+    
+    def generate_sql(self, state: AgentState) -> AgentState:
+        """Node: Generate SQL with the shared generator."""
+        return generate_sql(
+            state,
+            sql_generator=self._generator(),
+            database=self.database,
+            registry=self.registry,
+            example_store=self.example_store,
+            sql_cache=self.sql_cache
+        )
+    
+    def execute_sql(self, state: AgentState) -> AgentState:
+        """Node: Execute SQL against the question's database."""
+        return execute_sql(state, database=self.database, registry=self.registry)
+    
+    def format_output(self, state: AgentState) -> AgentState:
+        """Node: Format the final output."""
+        return format_output(state)
+    
+    async def agenerate_sql(self, state: AgentState) -> AgentState:
+        """Async node: Generate SQL with the shared generator."""
+        return await agenerate_sql(
+            state,
+            sql_generator=self._generator(),
+            database=self.database,
+            registry=self.registry,
+            example_store=self.example_store,
+            sql_cache=self.sql_cache
+        )
+    
+    async def aexecute_sql(self, state: AgentState) -> AgentState:
+        """Async node: Execute SQL on the async engine."""
+        return await aexecute_sql(state, database=self.database, registry=self.registry)
+    
+    async def aformat_output(self, state: AgentState) -> AgentState:
+        """Async node: Format the final output."""
+        return await aformat_output(state)
+    
+    def invoke(
+        self,
+        user_input: str,
+        database_schema: str = "",
+        database_name: str = ""
+    ) -> AgentState:
+        """
+        Run a question through the graph.
+        
+        Args:
+            user_input: Natural language question from user
+            database_schema: Optional pre-fetched schema to use
+            database_name: Registered database name or tenant id
+        
+        Returns:
+            Final agent state
+        """
+        logger.info(f"Running query: {user_input}")
+        timestamp, start = time.time(), time.perf_counter()
+        state = self.graph.invoke(
+            create_initial_state(user_input, database_schema, database_name=database_name)
+        )
+        self._record(state, timestamp, start)
+        return state
+    
+    def run(self, user_input: str, database_name: str = "") -> str:
+        """
+        Run a question and return the formatted output.
+        
+        Args:
+            user_input: Natural language question from user
+            database_name: Registered database name or tenant id
+        
+        Returns:
+            Formatted output string with results
+        """
+        result = self.invoke(user_input, database_name=database_name)
+        return result.get("final_output", "No output generated")
+    
+    def stream(self, user_input: str, database_name: str = "") -> Iterator[str]:
+        """
+        Run a question and stream the formatted output.
+        
+        The graph carries a lazy row stream from ``execute_sql`` through
+        ``format_output``; rows are fetched only as the chunks are consumed,
+        up to ``AGENT_MAX_ROWS``. Closing the iterator early releases the
+        database connection. The question is recorded (workload log, SQL
+        cache) once the rows have been streamed, or when streaming fails;
+        not when the consumer stops early.
+        
+        Args:
+            user_input: Natural language question from user
+            database_name: Registered database name or tenant id
+        
+        Yields:
+            Output text chunks
+        """
+        logger.info(f"Running query (streaming): {user_input}")
+        timestamp, start = time.time(), time.perf_counter()
+        result = self.graph.invoke(
+            create_initial_state(user_input, stream_results=True, database_name=database_name)
+        )
+        
+        output_stream = result.get("output_stream")
+        if output_stream is None:
+            self._record(result, timestamp, start)
+            yield result.get("final_output", "No output generated")
+            return
+        
+        row_stream = result["row_stream"]
+        try:
+            yield from output_stream
+        except Exception as e:
+            result["error"] = str(e)
+            self._record(result, timestamp, start)
+            raise
+        else:
+            result["results_truncated"] = row_stream.truncated
+            self._record(result, timestamp, start)
+        finally:
+            output_stream.close()
+            row_stream.close()
+    
+    async def ainvoke(
+        self,
+        user_input: str,
+        database_schema: str = "",
+        database_name: str = ""
+    ) -> AgentState:
+        """
+        Run a question through the graph without blocking the event loop.
+        
+        Args:
+            user_input: Natural language question from user
+            database_schema: Optional pre-fetched schema to use
+            database_name: Registered database name or tenant id
+        
+        Returns:
+            Final agent state
+        """
+        logger.info(f"Running query (async): {user_input}")
+        timestamp, start = time.time(), time.perf_counter()
+        state = await self.graph.ainvoke(
+            create_initial_state(user_input, database_schema, database_name=database_name)
+        )
+        # SQLite cache, example store and workload log writes block
+        await asyncio.to_thread(self._record, state, timestamp, start)
+        return state
+    
+    async def arun(self, user_input: str, database_name: str = "") -> str:
+        """
+        Async variant of :meth:`run`.
+        
+        Args:
+            user_input: Natural language question from user
+            database_name: Registered database name or tenant id
+        
+        Returns:
+            Formatted output string with results
+        """
+        result = await self.ainvoke(user_input, database_name=database_name)
+        return result.get("final_output", "No output generated")
+    
+    async def abatch(self, questions: Sequence[str]) -> List[str]:
+        """
+        Run several questions concurrently on the current event loop.
+        
+        Args:
+            questions: Natural language questions
+        
+        Returns:
+            Formatted outputs, in input order
+        """
+        outcomes = await self.arun_queries(questions)
+        return [outcome.output for outcome in outcomes]
+    
+    def run_queries(
+        self,
+        questions: Sequence[str],
+        max_concurrency: Optional[int] = None,
+        database_name: str = ""
+    ) -> List[QueryOutcome]:
+        """
+        Run many questions with bounded concurrency.
+        
+        The schema is fetched once for the whole batch, identical questions
+        (after normalization) run through the pipeline only once, and a
+        failure in one question is reported on its outcome instead of
+        aborting the batch.
+        
+        Args:
+            questions: Natural language questions
+            max_concurrency: Maximum questions in flight (defaults to config)
+            database_name: Registered database name or tenant id
+        
+        Returns:
+            One outcome per question, in input order
+        """
+        unique = self._unique_questions(questions)
+        try:
+            schema = self.database_for(database_name).get_schema()
+        except Exception as e:
+            logger.error(f"Batch schema fetch failed: {e}")
+            return [QueryOutcome(question=q, error=str(e)) for q in questions]
+        
+        def answer(question: str) -> QueryOutcome:
+            try:
+                state = self.invoke(question, schema, database_name)
+                return QueryOutcome.from_state(question, state)
+            except Exception as e:
+                logger.exception(f"Batch question failed: {question}")
+                return QueryOutcome(question=question, error=str(e))
+        
+        workers = max_concurrency or config.agent.max_concurrency
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            answers = dict(zip(unique, executor.map(answer, unique.values())))
+        
+        return self._collect_batch(questions, answers)
+    
+    async def arun_queries(
+        self,
+        questions: Sequence[str],
+        max_concurrency: Optional[int] = None,
+        database_name: str = ""
+    ) -> List[QueryOutcome]:
+        """
+        Async variant of :meth:`run_queries`.
+        
+        Args:
+            questions: Natural language questions
+            max_concurrency: Maximum questions in flight (defaults to config)
+            database_name: Registered database name or tenant id
+        
+        Returns:
+            One outcome per question, in input order
+        """
+        unique = self._unique_questions(questions)
+        try:
+            schema = await self.database_for(database_name).aget_schema()
+        except Exception as e:
+            logger.error(f"Batch schema fetch failed: {e}")
+            return [QueryOutcome(question=q, error=str(e)) for q in questions]
+        
+        semaphore = asyncio.Semaphore(max_concurrency or config.agent.max_concurrency)
+        
+        async def answer(question: str) -> QueryOutcome:
+            async with semaphore:
+                try:
+                    state = await self.ainvoke(question, schema, database_name)
+                    return QueryOutcome.from_state(question, state)
+                except Exception as e:
+                    logger.exception(f"Batch question failed: {question}")
+                    return QueryOutcome(question=question, error=str(e))
+        
+        results = await asyncio.gather(*(answer(q) for q in unique.values()))
+        return self._collect_batch(questions, dict(zip(unique, results)))
+    
+    def _record(self, state: AgentState, timestamp: float, start: float) -> None:
+        """
+        Append a finished question to the workload log, if recording, cache
+        its SQL if it executed without error, and keep the SQL as a verified
+        example if it also returned rows.
+        """
+        if self.recorder is not None:
+            self.recorder.record(
+                WorkloadRecord.from_state(state, timestamp, time.perf_counter() - start)
+            )
+        if state.get("error") or not state.get("sql_query"):
+            return
+        database_name = state.get("database_name") or ""
+        if self.sql_cache is not None and not state.get("sql_cached"):
+            self.sql_cache.put(
+                *sql_cache_key(state["user_input"], state["database_schema"], database_name),
+                state["sql_query"]
+            )
+        if self.example_store is not None and state.get("query_results"):
+            self.example_store.add(state["user_input"], state["sql_query"], database_name)
+    
+    def _unique_questions(self, questions: Sequence[str]) -> Dict[str, str]:
+        """
+        Collapse questions that are identical after normalization.
+        
+        Returns:
+            Mapping of normalized question to its first occurrence
+        """
+        unique: Dict[str, str] = {}
+        for question in questions:
+            unique.setdefault(normalize_question(question), question)
+        
+        logger.info(
+            f"Running batch of {len(questions)} questions "
+            f"({len(unique)} unique)"
+        )
+        return unique
+    
+    def _collect_batch(
+        self,
+        questions: Sequence[str],
+        answers: Dict[str, QueryOutcome]
+    ) -> List[QueryOutcome]:
+        """Fan shared answers back out to every question, in input order."""
+        outcomes = []
+        for question in questions:
+            answer = answers[normalize_question(question)]
+            if answer.question != question:
+                answer = QueryOutcome(
+                    question=question,
+                    sql_query=answer.sql_query,
+                    results=answer.results,
+                    output=answer.output,
+                    error=answer.error,
+                    truncated=answer.truncated,
+                    next_page_token=answer.next_page_token,
+                    timings=answer.timings
+                )
+            outcomes.append(answer)
+        return outcomes
+    
+    def close(self) -> None:
+        """Release the HTTP client, workload log and example store owned by this runtime."""
+        if self._owns_recorder and self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self._owns_example_store and self.example_store is not None:
+            self.example_store.close()
+        if self._owns_http_client and self.http_client is not None:
+            self.http_client.close()
+            self.http_client = None
+            logger.info("Runtime HTTP client closed")
+    
+    async def aclose(self) -> None:
+        """Release the sync and async HTTP clients owned by this runtime."""
+        if self._owns_http_client and self.http_async_client is not None:
+            await self.http_async_client.aclose()
+            self.http_async_client = None
+        self.close()
+    
+    def __enter__(self) -> "TextToSQLRuntime":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_default_runtime: Optional[TextToSQLRuntime] = None
+_default_runtime_lock = threading.Lock()
+
+
+def get_runtime(prewarm: Optional[bool] = None) -> TextToSQLRuntime:
+    """
+    Get the process-wide runtime, creating it on first use.
+    
+    Creating it also starts the metrics exporters configured by
+    ``METRICS_PORT`` and ``METRICS_FILE`` and, unless disabled, runs
+    :meth:`TextToSQLRuntime.prewarm` in a background thread, so
+    ``run_query``, ``arun_query`` and the CLI do not pay for it on the
+    first question.
+    
+    Args:
+        prewarm: Warm the runtime in the background when it is created
+            (default: ``AGENT_PREWARM``); callers that warm it themselves,
+            like the server, pass False
+    
+    Returns:
+        Shared runtime instance
+    """
+    global _default_runtime
+    
+    if _default_runtime is None:
+        with _default_runtime_lock:
+            if _default_runtime is None:
+                _default_runtime = TextToSQLRuntime()
+                start_metrics_exporter()
+                logger.info("Default Text-to-SQL runtime created")
+                if config.agent.prewarm if prewarm is None else prewarm:
+                    threading.Thread(
+                        target=_prewarm_in_background,
+                        args=(_default_runtime,),
+                        name="text-to-sql-prewarm",
+                        daemon=True
+                    ).start()
+    
+    return _default_runtime
+
+
+def _prewarm_in_background(runtime: TextToSQLRuntime) -> None:
+    """Thread target: warm the runtime, logging instead of raising."""
+    try:
+        timings = runtime.prewarm()
+        steps = ", ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items())
+        logger.info(f"Runtime pre-warmed: {steps}")
+    except Exception as e:
+        logger.warning(f"Runtime pre-warm failed: {e}")
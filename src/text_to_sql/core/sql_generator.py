@@ -5,25 +5,165 @@ This module handles the interaction with LLMs to generate
 SQL queries from natural language.
 Supports both OpenAI and DeepSeek (OpenAI-compatible) APIs.
 """
-from typing import Protocol, Optional
+import asyncio
+import json
+import time
+from typing import Protocol, Optional, Any, Dict, List, Sequence, Tuple
+import httpx
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.language_models import BaseLanguageModel
 
 from ..utils.config import config
-from ..utils.exceptions import SQLGenerationError
+from ..utils.exceptions import ConfigurationError, SQLGenerationError
 from ..utils.logger import logger
-from ..utils.constants import SYSTEM_PROMPT_SQL_GENERATION, MARKDOWN_SQL_START, MARKDOWN_CODE_START, MARKDOWN_CODE_END
+from ..utils.metrics import LLM_SECONDS, LLM_TOKENS
+from ..utils.normalize import normalize_question, schema_fingerprint
+from ..utils.singleflight import SingleFlight
+from ..utils.constants import (
+    SYSTEM_PROMPT_SQL_GENERATION,
+    FEW_SHOT_HEADER,
+    FEW_SHOT_EXAMPLE,
+    SIMILAR_EXAMPLES_HEADER,
+    SIMILAR_EXAMPLES_QUESTION,
+    MARKDOWN_SQL_START,
+    MARKDOWN_CODE_START,
+    MARKDOWN_CODE_END,
+)
+
+Example = Tuple[str, str]  # (question, SQL)
+
+# Endpoint ``ChatOpenAI`` calls when no base URL is configured
+DEFAULT_LLM_BASE_URL = "https://api.openai.com/v1"
+WARM_UP_TIMEOUT = 5.0  # seconds
 
 
 class SQLGenerator(Protocol):
-    """Protocol for SQL generator implementations."""
+    """
+    Protocol for SQL generator implementations.
+    
+    Generators may also accept ``examples``, similar (question, SQL) pairs
+    to show the LLM; it is only passed when there are some.
+    """
     
     def generate(self, question: str, schema: str) -> str:
         """Generate SQL from question and schema."""
         ...
 
 
+def generate_with(
+    generator: SQLGenerator,
+    question: str,
+    schema: str,
+    examples: Sequence[Example] = ()
+) -> str:
+    """
+    Generate SQL with any generator, passing similar examples if there are any.
+    
+    Args:
+        generator: SQL generator instance
+        question: User's natural language question
+        schema: Database schema information
+        examples: Similar verified (question, SQL) pairs
+    
+    Returns:
+        Generated SQL query
+    """
+    if examples:
+        return generator.generate(question, schema, examples=examples)
+    return generator.generate(question, schema)
+
+
+async def agenerate_with(
+    generator: SQLGenerator,
+    question: str,
+    schema: str,
+    examples: Sequence[Example] = ()
+) -> str:
+    """
+    Generate SQL asynchronously with any generator.
+    
+    Uses the generator's native ``agenerate`` when it has one, otherwise
+    runs the blocking ``generate`` in a worker thread.
+    
+    Args:
+        generator: SQL generator instance
+        question: User's natural language question
+        schema: Database schema information
+        examples: Similar verified (question, SQL) pairs
+    
+    Returns:
+        Generated SQL query
+    """
+    agenerate = getattr(generator, "agenerate", None)
+    if agenerate is None:
+        return await asyncio.to_thread(generate_with, generator, question, schema, examples)
+    if examples:
+        return await agenerate(question, schema, examples=examples)
+    return await agenerate(question, schema)
+
+
+def load_examples(path: str) -> List[Example]:
+    """
+    Load few-shot examples from a JSON file.
+    
+    Args:
+        path: JSON object of question -> SQL, or a list of
+            ``{"question": ..., "sql": ...}`` objects
+    
+    Returns:
+        Examples in file order
+    
+    Raises:
+        ConfigurationError: If the file cannot be read or has another shape
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return [(str(question), str(sql)) for question, sql in data.items()]
+        return [(str(item["question"]), str(item["sql"])) for item in data]
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        raise ConfigurationError(f"Invalid few-shot examples file {path}: {e}")
+
+
+def format_examples(examples: Sequence[Example]) -> str:
+    """
+    Render few-shot examples for the system prompt.
+    
+    Args:
+        examples: (question, SQL) pairs
+    
+    Returns:
+        Examples block, or an empty string when there are none
+    """
+    if not examples:
+        return ""
+    return FEW_SHOT_HEADER + "".join(
+        FEW_SHOT_EXAMPLE.format(question=question.strip(), sql=sql.strip())
+        for question, sql in examples
+    )
+
+
+def format_question(question: str, examples: Sequence[Example] = ()) -> str:
+    """
+    Render the human message: similar examples, if any, then the question.
+    
+    Args:
+        question: User's natural language question
+        examples: Similar verified (question, SQL) pairs
+    
+    Returns:
+        Message text; just the question when there are no examples
+    """
+    if not examples:
+        return question
+    return SIMILAR_EXAMPLES_HEADER + "".join(
+        FEW_SHOT_EXAMPLE.format(question=example.strip(), sql=sql.strip())
+        for example, sql in examples
+    ) + SIMILAR_EXAMPLES_QUESTION.format(question=question)
+
+
 class LLMSQLGenerator:
     """SQL generator using Language Models (supports OpenAI and DeepSeek)."""
     
@@ -32,7 +172,10 @@ class LLMSQLGenerator:
         model_name: Optional[str] = None,
         temperature: Optional[float] = None,
         api_key: Optional[str] = None,
-        base_url: Optional[str] = None
+        base_url: Optional[str] = None,
+        http_client: Optional[Any] = None,
+        http_async_client: Optional[Any] = None,
+        examples: Optional[Sequence[Example]] = None
     ):
         """
         Initialize the SQL generator.
@@ -42,11 +185,22 @@ class LLMSQLGenerator:
             temperature: Temperature for generation
             api_key: API key (DeepSeek or OpenAI)
             base_url: Base URL for API (for DeepSeek or custom endpoints)
+            http_client: Optional shared ``httpx.Client`` (keeps connections alive)
+            http_async_client: Optional shared ``httpx.AsyncClient``
+            examples: Few-shot (question, SQL) examples. Defaults to the
+                ``LLM_FEW_SHOT_PATH`` file, if set.
         """
         self.model_name = model_name or config.llm.model_name
         self.temperature = temperature if temperature is not None else config.llm.temperature
         self.api_key = api_key or config.llm.api_key
         self.base_url = base_url or config.llm.base_url
+        self.http_client = http_client
+        self.http_async_client = http_async_client
+        if examples is None:
+            examples = load_examples(config.llm.few_shot_path) if config.llm.few_shot_path else []
+        self.examples = list(examples)
+        # Rendered once: the prompt prefix must be byte-identical across calls
+        self._examples_text = format_examples(self.examples)
         
         self._llm: Optional[BaseLanguageModel] = None
         self._prompt: Optional[ChatPromptTemplate] = None
@@ -74,6 +228,12 @@ class LLMSQLGenerator:
                 llm_kwargs["openai_api_base"] = self.base_url
                 logger.info(f"Using custom API base URL: {self.base_url}")
             
+            # Reuse pooled HTTP clients so TCP/TLS sessions survive between calls
+            if self.http_client is not None:
+                llm_kwargs["http_client"] = self.http_client
+            if self.http_async_client is not None:
+                llm_kwargs["http_async_client"] = self.http_async_client
+            
             self._llm = ChatOpenAI(**llm_kwargs)
             logger.info(f"LLM initialized: {self.model_name}")
         
@@ -84,6 +244,13 @@ class LLMSQLGenerator:
         """
         Get or create the prompt template.
         
+        The rules and few-shot examples, identical for every question, open
+        the system message; the schema follows (pruned per question unless
+        ``AGENT_SCHEMA_TOP_K=0``) and the question comes last. OpenAI and
+        DeepSeek serve a prompt prefix they saw recently from cache (faster,
+        and billed at a discount), so the static part must stay
+        byte-identical from call to call and come before anything that varies.
+        
         Returns:
             Prompt template for SQL generation
         """
@@ -95,17 +262,19 @@ class LLMSQLGenerator:
         
         return self._prompt
     
-    def generate(self, question: str, schema: str) -> str:
+    def generate(self, question: str, schema: str, examples: Sequence[Example] = ()) -> str:
         """
         Generate SQL query from natural language question.
         
         Args:
             question: User's natural language question
             schema: Database schema information
-            
+            examples: Similar verified (question, SQL) pairs, shown before
+                the question
+        
         Returns:
             Generated SQL query
-            
+        
         Raises:
             SQLGenerationError: If SQL generation fails
         """
@@ -113,20 +282,82 @@ class LLMSQLGenerator:
             logger.debug(f"Generating SQL for question: {question}")
             
             chain = self.prompt | self.llm
-            response = chain.invoke({
-                "schema": schema,
-                "question": question
-            })
+            start = time.perf_counter()
+            try:
+                response = chain.invoke({
+                    "schema": schema,
+                    "examples": self._examples_text,
+                    "question": format_question(question, examples)
+                })
+            finally:
+                LLM_SECONDS.observe(time.perf_counter() - start, model=self.model_name)
+            self._record_usage(response)
             
             sql_query = self._clean_sql_response(response.content)
             logger.info(f"SQL generated successfully: {sql_query[:100]}")
             
             return sql_query
+        
+        except Exception as e:
+            logger.error(f"SQL generation failed: {e}")
+            raise SQLGenerationError(f"Error generating SQL: {e}")
+    
+    async def agenerate(self, question: str, schema: str, examples: Sequence[Example] = ()) -> str:
+        """
+        Generate SQL query asynchronously (uses ``ainvoke``).
+        
+        Args:
+            question: User's natural language question
+            schema: Database schema information
+            examples: Similar verified (question, SQL) pairs, shown before
+                the question
+        
+        Returns:
+            Generated SQL query
+        
+        Raises:
+            SQLGenerationError: If SQL generation fails
+        """
+        try:
+            logger.debug(f"Generating SQL (async) for question: {question}")
             
+            chain = self.prompt | self.llm
+            start = time.perf_counter()
+            try:
+                response = await chain.ainvoke({
+                    "schema": schema,
+                    "examples": self._examples_text,
+                    "question": format_question(question, examples)
+                })
+            finally:
+                LLM_SECONDS.observe(time.perf_counter() - start, model=self.model_name)
+            self._record_usage(response)
+            
+            sql_query = self._clean_sql_response(response.content)
+            logger.info(f"SQL generated successfully: {sql_query[:100]}")
+            
+            return sql_query
+        
         except Exception as e:
             logger.error(f"SQL generation failed: {e}")
             raise SQLGenerationError(f"Error generating SQL: {e}")
     
+    def _record_usage(self, response: Any) -> None:
+        """
+        Count the prompt, cached prompt and completion tokens of a response.
+        
+        Args:
+            response: Message returned by the LLM
+        """
+        usage = getattr(response, "usage_metadata", None) or {}
+        LLM_TOKENS.inc(usage.get("input_tokens", 0), model=self.model_name, kind="prompt")
+        LLM_TOKENS.inc(usage.get("output_tokens", 0), model=self.model_name, kind="completion")
+        
+        cached = cached_prompt_tokens(response)
+        if cached:
+            LLM_TOKENS.inc(cached, model=self.model_name, kind="cached_prompt")
+            logger.debug(f"{cached}/{usage.get('input_tokens', 0)} prompt tokens served from cache")
+    
     def _clean_sql_response(self, response: str) -> str:
         """
         Clean the SQL response from the LLM.
@@ -135,7 +366,7 @@ class LLMSQLGenerator:
         
         Args:
             response: Raw response from LLM
-            
+        
         Returns:
             Cleaned SQL query
         """
@@ -153,31 +384,175 @@ class LLMSQLGenerator:
         return sql_query.strip()
 
 
+def cached_prompt_tokens(response: Any) -> int:
+    """
+    Prompt tokens the provider served from its prefix cache.
+    
+    OpenAI reports them as ``prompt_tokens_details.cached_tokens`` (surfaced
+    by LangChain as ``input_token_details.cache_read``); DeepSeek as
+    ``prompt_cache_hit_tokens``.
+    
+    Args:
+        response: Message returned by the LLM
+    
+    Returns:
+        Cached prompt tokens (0 when not reported)
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    cached = (usage.get("input_token_details") or {}).get("cache_read")
+    if cached:
+        return int(cached)
+    metadata: Dict[str, Any] = getattr(response, "response_metadata", None) or {}
+    token_usage = metadata.get("token_usage") or {}
+    return int(token_usage.get("prompt_cache_hit_tokens") or 0)
+
+
 class MockSQLGenerator:
     """Mock SQL generator for testing without API key."""
     
-    def generate(self, question: str, schema: str) -> str:
+    def generate(self, question: str, schema: str, examples: Sequence[Example] = ()) -> str:
         """
         Generate a mock SQL query.
         
         Args:
             question: User's question (unused in mock)
             schema: Database schema (unused in mock)
-            
+            examples: Similar examples (unused in mock)
+        
         Returns:
             Mock SQL query
         """
         logger.warning("Using mock SQL generator - results may not be accurate")
         return "SELECT * FROM users LIMIT 5"
+    
+    async def agenerate(self, question: str, schema: str, examples: Sequence[Example] = ()) -> str:
+        """Async variant of :meth:`generate`."""
+        return self.generate(question, schema, examples)
+
+
+class SingleFlightSQLGenerator:
+    """SQL generator wrapper that shares one call among identical concurrent questions."""
+    
+    def __init__(self, generator: SQLGenerator, flight: Optional[SingleFlight] = None):
+        """
+        Wrap a generator.
+        
+        Args:
+            generator: Generator doing the work
+            flight: Group of calls in progress; share one between wrappers
+                that should coalesce with each other
+        """
+        self.generator = generator
+        self.flight = flight if flight is not None else SingleFlight("generate_sql")
+    
+    @staticmethod
+    def _key(question: str, schema: str):
+        return normalize_question(question), schema_fingerprint(schema)
+    
+    def generate(self, question: str, schema: str, examples: Sequence[Example] = ()) -> str:
+        """
+        Generate SQL, or wait for the same question already being answered.
+        
+        Args:
+            question: User's natural language question
+            schema: Database schema information
+            examples: Similar verified (question, SQL) pairs
+        
+        Returns:
+            Generated SQL query
+        """
+        return self.flight.do(
+            self._key(question, schema), generate_with, self.generator, question, schema, examples
+        )
+    
+    async def agenerate(self, question: str, schema: str, examples: Sequence[Example] = ()) -> str:
+        """Async variant of :meth:`generate`."""
+        return await self.flight.ado(
+            self._key(question, schema), agenerate_with, self.generator, question, schema, examples
+        )
+
+
+def create_http_client() -> httpx.Client:
+    """
+    Create a keep-alive HTTP client for LLM calls.
+    
+    Pool limits come from ``LLMConfig`` so one client can be shared by
+    every generation in the process.
+    
+    Returns:
+        Pooled ``httpx.Client``
+    """
+    limits = httpx.Limits(
+        max_connections=config.llm.max_connections,
+        max_keepalive_connections=config.llm.max_connections,
+        keepalive_expiry=config.llm.keepalive_expiry
+    )
+    return httpx.Client(limits=limits)
+
+
+def create_async_http_client() -> httpx.AsyncClient:
+    """
+    Create a keep-alive async HTTP client for LLM calls.
+    
+    Returns:
+        Pooled ``httpx.AsyncClient``
+    """
+    limits = httpx.Limits(
+        max_connections=config.llm.max_connections,
+        max_keepalive_connections=config.llm.max_connections,
+        keepalive_expiry=config.llm.keepalive_expiry
+    )
+    return httpx.AsyncClient(limits=limits)
+
+
+def warm_http_client(client: httpx.Client, base_url: Optional[str] = None) -> float:
+    """
+    Open a keep-alive connection to the LLM endpoint before the first call.
+    
+    Sends a ``HEAD`` request so DNS, TCP and TLS are done at process start;
+    the connection stays in the client's pool for the first generation.
+    Any HTTP status will do, and failures are logged, not raised.
+    
+    Args:
+        client: Pooled client the generator uses
+        base_url: LLM API base URL (defaults to ``LLM_BASE_URL``)
+    
+    Returns:
+        Seconds spent
+    """
+    start = time.perf_counter()
+    try:
+        client.head(base_url or config.llm.base_url or DEFAULT_LLM_BASE_URL, timeout=WARM_UP_TIMEOUT)
+    except httpx.HTTPError as e:
+        logger.warning(f"LLM connection warm-up failed: {e}")
+    return time.perf_counter() - start
 
 
-def create_sql_generator(use_mock: bool = False) -> SQLGenerator:
+async def awarm_http_client(client: httpx.AsyncClient, base_url: Optional[str] = None) -> float:
+    """Async variant of :func:`warm_http_client`."""
+    start = time.perf_counter()
+    try:
+        await client.head(
+            base_url or config.llm.base_url or DEFAULT_LLM_BASE_URL, timeout=WARM_UP_TIMEOUT
+        )
+    except httpx.HTTPError as e:
+        logger.warning(f"LLM connection warm-up failed: {e}")
+    return time.perf_counter() - start
+
+
+def create_sql_generator(
+    use_mock: bool = False,
+    http_client: Optional[Any] = None,
+    http_async_client: Optional[Any] = None
+) -> SQLGenerator:
     """
     Factory function to create SQL generator.
     
     Args:
         use_mock: If True, creates mock generator for testing
-        
+        http_client: Optional shared ``httpx.Client`` for the LLM
+        http_async_client: Optional shared ``httpx.AsyncClient`` for the LLM
+    
     Returns:
         SQL generator instance
     """
@@ -186,4 +561,7 @@ def create_sql_generator(use_mock: bool = False) -> SQLGenerator:
         return MockSQLGenerator()
     
     logger.info("Creating LLM-based SQL generator")
-    return LLMSQLGenerator()
+    return LLMSQLGenerator(
+        http_client=http_client,
+        http_async_client=http_async_client
+    )
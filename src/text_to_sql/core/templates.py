@@ -0,0 +1,356 @@
+"""
+Template fast path for common questions.
+
+Many questions are trivial - "show all users", "how many orders are
+there", "top 5 most expensive products" - and do not need an LLM round
+trip. ``TemplateSQLGenerator`` matches the normalized question against a
+few patterns whose slots (table, column, N, direction) must resolve to
+exactly one table or column of the schema the question is asked against.
+When every slot resolves the SQL is built locally in microseconds;
+otherwise the question goes to the wrapped generator unchanged.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Match, Optional, Pattern, Sequence, Tuple
+
+from ..database.schema_index import tokenize
+from ..utils.exceptions import SQLGenerationError
+from ..utils.logger import logger
+from ..utils.metrics import TEMPLATE_REQUESTS
+from ..utils.normalize import normalize_question
+from .sql_generator import Example, SQLGenerator, agenerate_with, generate_with
+
+_TABLE_RE = re.compile(r"^Table: (\S+)")
+_COLUMN_RE = re.compile(r"^  - ([^:]+): (.+?)(?: NOT NULL)?(?:  -- .*)?$")
+_SIMPLE_IDENTIFIER_RE = re.compile(r"[a-z_][a-z0-9_]*")
+
+# Identifiers that must be quoted even though they look simple
+_RESERVED = frozenset({
+    "all", "and", "asc", "by", "case", "check", "column", "default", "desc", "end", "from",
+    "group", "index", "key", "limit", "offset", "or", "order", "references", "select",
+    "table", "to", "user", "where",
+})
+
+_NUMERIC_TYPES = ("INT", "REAL", "FLOAT", "DOUBLE", "NUMERIC", "DECIMAL", "MONEY")
+_DATE_TYPES = ("DATE", "TIME")
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "twenty": 20,
+}
+
+# Words that stand for "whatever the table calls this" in top-N questions
+_PRICE = ("price", "cost", "amount")
+_DATE = ()  # the table's date/time column
+
+# Adjective -> (column hint, direction) to try in order; "least" flips it
+_ADJECTIVES: Dict[str, Tuple[Tuple[Tuple[str, ...], str], ...]] = {
+    "expensive": ((_PRICE, "DESC"),),
+    "priciest": ((_PRICE, "DESC"),),
+    "cheapest": ((_PRICE, "ASC"),),
+    "recent": ((_DATE, "DESC"),),
+    "newest": ((_DATE, "DESC"),),
+    "latest": ((_DATE, "DESC"),),
+    "earliest": ((_DATE, "ASC"),),
+    "oldest": ((("age",), "DESC"), (_DATE, "ASC")),
+    "youngest": ((("age",), "ASC"),),
+}
+
+_AGGREGATES = {
+    "average": "AVG", "avg": "AVG", "mean": "AVG",
+    "maximum": "MAX", "max": "MAX", "highest": "MAX",
+    "minimum": "MIN", "min": "MIN", "lowest": "MIN",
+    "sum": "SUM", "total": "SUM",
+}
+
+# Words around a table name that do not change which table is meant
+_TABLE_SUFFIXES = (" records", " rows", " entries")
+
+_LEAD = r"(?:(?:please|can you|could you)\s+)?"
+_SHOW = r"(?:show|list|get|display|find|fetch|return|give)(?:\s+me)?"
+_NAME = r"[\w ]+?"
+
+
+def _key(text: str) -> str:
+    """Identifier or phrase as space-separated, de-pluralized words."""
+    return " ".join(term for term in tokenize(text) if not term.startswith("#"))
+
+
+def quote_identifier(name: str) -> str:
+    """
+    Quote a table or column name when it is not a plain lower-case identifier.
+    
+    Args:
+        name: Reflected identifier
+    
+    Returns:
+        Identifier safe to put in SQL
+    """
+    if _SIMPLE_IDENTIFIER_RE.fullmatch(name) and name not in _RESERVED:
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+@dataclass
+class _Table:
+    name: str
+    columns: Dict[str, str] = field(default_factory=dict)  # column name -> type
+    keys: Dict[str, List[str]] = field(default_factory=dict)  # column key -> names
+    
+    def column(self, phrase: str) -> Optional[str]:
+        """The one column a phrase names: exact words first, then a unique word suffix."""
+        key = _key(phrase)
+        if not key:
+            return None
+        names = self.keys.get(key)
+        if names is None:
+            names = [name for column_key, matches in self.keys.items()
+                     if column_key.endswith(" " + key) for name in matches]
+        return names[0] if len(names) == 1 else None
+    
+    def hinted_column(self, hint: Tuple[str, ...]) -> Optional[str]:
+        """The one column matching a hint; an empty hint means the date/time column."""
+        if hint:
+            for word in hint:
+                name = self.column(word)
+                if name is not None:
+                    return name
+            return None
+        dates = [name for name, type_ in self.columns.items()
+                 if any(marker in type_.upper() for marker in _DATE_TYPES)]
+        if len(dates) > 1:
+            dates = [name for name in dates if "created" in name.lower()] or dates
+        return dates[0] if len(dates) == 1 else None
+    
+    def is_numeric(self, column: str) -> bool:
+        return any(marker in self.columns[column].upper() for marker in _NUMERIC_TYPES)
+
+
+class _Catalog:
+    """Tables and columns parsed from the prompt schema text."""
+    
+    def __init__(self, schema: str):
+        self.tables: Dict[str, List[_Table]] = {}
+        table: Optional[_Table] = None
+        for line in schema.splitlines():
+            table_match = _TABLE_RE.match(line)
+            if table_match:
+                table = _Table(table_match.group(1))
+                self.tables.setdefault(_key(table.name), []).append(table)
+                continue
+            column_match = _COLUMN_RE.match(line)
+            if column_match and table is not None:
+                name, type_ = column_match.groups()
+                table.columns[name] = type_
+                table.keys.setdefault(_key(name), []).append(name)
+    
+    def table(self, phrase: str) -> Optional[_Table]:
+        """The one table a phrase names."""
+        phrase = phrase.strip()
+        for suffix in _TABLE_SUFFIXES:
+            if phrase.endswith(suffix):
+                phrase = phrase[:-len(suffix)]
+        tables = self.tables.get(_key(phrase), ())
+        return tables[0] if len(tables) == 1 else None
+
+
+def _limit(text: str) -> Optional[int]:
+    if text.isdigit():
+        return int(text) or None
+    return _NUMBER_WORDS.get(text)
+
+
+def _list_rows(match: Match, catalog: _Catalog) -> Optional[str]:
+    table = catalog.table(match.group("table"))
+    if table is None:
+        return None
+    return f"SELECT * FROM {quote_identifier(table.name)}"
+
+
+def _count_rows(match: Match, catalog: _Catalog) -> Optional[str]:
+    table = catalog.table(match.group("table"))
+    if table is None:
+        return None
+    return f"SELECT COUNT(*) AS count FROM {quote_identifier(table.name)}"
+
+
+def _top_rows(match: Match, catalog: _Catalog) -> Optional[str]:
+    table = catalog.table(match.group("table"))
+    limit = _limit(match.group("n"))
+    if table is None or limit is None:
+        return None
+    rank, adjective, by, column_phrase, order = match.group("rank", "adj", "by", "column", "order")
+    
+    column = direction = None
+    if adjective and column_phrase:
+        return None  # "5 cheapest products by rating": conflicting orderings
+    if adjective:
+        words = adjective.split()
+        for hint, hinted_direction in _ADJECTIVES.get(words[-1], ()):
+            column = table.hinted_column(hint)
+            if column is not None:
+                direction = hinted_direction
+                if words[0] == "least":
+                    direction = "ASC" if direction == "DESC" else "DESC"
+                break
+        if column is None:
+            return None
+    elif column_phrase:
+        column = table.column(column_phrase)
+        if column is None:
+            return None
+        if order:
+            direction = "ASC" if order.startswith("asc") else "DESC"
+        elif by and by.endswith("lowest") or rank == "bottom":
+            direction = "ASC"
+        else:
+            direction = "DESC"
+    elif rank in ("bottom", "last"):
+        return None  # needs an ordering the question does not name
+    
+    sql = f"SELECT * FROM {quote_identifier(table.name)}"
+    if column is not None:
+        sql += f" ORDER BY {quote_identifier(column)} {direction}"
+    return sql + f" LIMIT {limit}"
+
+
+def _aggregate(match: Match, catalog: _Catalog) -> Optional[str]:
+    table = catalog.table(match.group("table"))
+    if table is None:
+        return None
+    column = table.column(match.group("column"))
+    function = _AGGREGATES[match.group("agg")]
+    if column is None or function in ("AVG", "SUM") and not table.is_numeric(column):
+        return None
+    alias = quote_identifier(f"{function.lower()}_{column.lower()}")
+    return f"SELECT {function}({quote_identifier(column)}) AS {alias} FROM {quote_identifier(table.name)}"
+
+
+@dataclass(frozen=True)
+class Template:
+    """A question pattern and the function building its SQL."""
+    name: str
+    pattern: Pattern
+    build: Callable[[Match, _Catalog], Optional[str]]
+
+
+_NUMBER = r"\d+|" + "|".join(_NUMBER_WORDS)
+_ADJECTIVE = r"(?:(?:most|least)\s+)?(?:" + "|".join(_ADJECTIVES) + r")"
+
+# Tried in order; the first template whose slots all resolve wins
+TEMPLATES: Tuple[Template, ...] = (
+    Template("count", re.compile(
+        _LEAD + r"(?:count(?:\s+(?:all|the))?|how\s+many|(?:what\s+is\s+|what's\s+)?(?:the\s+)?"
+        r"(?:total\s+)?number\s+of)\s+(?:the\s+)?(?P<table>" + _NAME + r")"
+        r"(?:\s+(?:are\s+there|do\s+we\s+have|exist|in\s+total|total))?"
+    ), _count_rows),
+    Template("top", re.compile(
+        _LEAD + r"(?:" + _SHOW + r"\s+)?(?:the\s+)?(?:(?P<rank>top|bottom|first|last)\s+)?"
+        r"(?P<n>" + _NUMBER + r")\s+(?:(?P<adj>" + _ADJECTIVE + r")\s+)?(?P<table>" + _NAME + r")"
+        r"(?:\s+(?P<by>by|ordered\s+by|sorted\s+by|with\s+the\s+highest|with\s+the\s+lowest)"
+        r"\s+(?P<column>" + _NAME + r")(?:\s+(?P<order>asc|ascending|desc|descending))?)?"
+    ), _top_rows),
+    Template("aggregate", re.compile(
+        _LEAD + r"(?:(?:what\s+is|what's|show|get|calculate|compute)\s+)?(?:the\s+)?"
+        r"(?P<agg>" + "|".join(_AGGREGATES) + r")\s+(?:of\s+)?(?:the\s+)?(?P<column>" + _NAME + r")"
+        r"\s+(?:of|in|for|across|among)\s+(?:all\s+)?(?:the\s+)?(?P<table>" + _NAME + r")"
+    ), _aggregate),
+    Template("list", re.compile(
+        _LEAD + _SHOW + r"\s+(?:all\s+|every\s+)?(?:the\s+)?(?P<table>" + _NAME + r")"
+    ), _list_rows),
+)
+
+# Schemas parsed recently; a runtime sees a handful at most
+MAX_CATALOGS = 16
+
+
+class TemplateSQLGenerator:
+    """SQL generator that answers common question shapes locally and asks another generator otherwise."""
+    
+    def __init__(
+        self,
+        generator: Optional[SQLGenerator] = None,
+        templates: Sequence[Template] = TEMPLATES
+    ):
+        """
+        Wrap a generator.
+        
+        Args:
+            generator: Generator for questions no template answers (None
+                makes those raise ``SQLGenerationError``)
+            templates: Templates to try, in order
+        """
+        self.generator = generator
+        self.templates = tuple(templates)
+        self._catalogs: Dict[str, _Catalog] = {}
+    
+    def _catalog(self, schema: str) -> _Catalog:
+        catalog = self._catalogs.get(schema)
+        if catalog is None:
+            if len(self._catalogs) >= MAX_CATALOGS:
+                self._catalogs.clear()
+            catalog = self._catalogs[schema] = _Catalog(schema)
+        return catalog
+    
+    def match(self, question: str, schema: str) -> Optional[Tuple[str, str]]:
+        """
+        Answer a question from the templates.
+        
+        Args:
+            question: User's natural language question
+            schema: Schema text the question is asked against
+        
+        Returns:
+            (template name, SQL), or None when no template answers it
+        """
+        text = normalize_question(question)
+        catalog = None
+        for template in self.templates:
+            found = template.pattern.fullmatch(text)
+            if found is None:
+                continue
+            if catalog is None:
+                catalog = self._catalog(schema)
+            sql_query = template.build(found, catalog)
+            if sql_query is not None:
+                return template.name, sql_query
+        return None
+    
+    def _answer(self, question: str, schema: str) -> Optional[str]:
+        matched = self.match(question, schema)
+        TEMPLATE_REQUESTS.inc(template=matched[0] if matched else "none")
+        if matched is None:
+            if self.generator is None:
+                raise SQLGenerationError(f"No template matches the question: {question}")
+            return None
+        logger.info(f"SQL answered by the '{matched[0]}' template")
+        return matched[1]
+    
+    def generate(self, question: str, schema: str, examples: Sequence[Example] = ()) -> str:
+        """
+        Generate SQL from a template, or with the wrapped generator.
+        
+        Args:
+            question: User's natural language question
+            schema: Database schema information
+            examples: Similar verified (question, SQL) pairs, passed on to
+                the wrapped generator
+        
+        Returns:
+            Generated SQL query
+        
+        Raises:
+            SQLGenerationError: If no template matches and there is no
+                generator to fall back to
+        """
+        sql_query = self._answer(question, schema)
+        if sql_query is not None:
+            return sql_query
+        return generate_with(self.generator, question, schema, examples)
+    
+    async def agenerate(self, question: str, schema: str, examples: Sequence[Example] = ()) -> str:
+        """Async variant of :meth:`generate`."""
+        sql_query = self._answer(question, schema)
+        if sql_query is not None:
+            return sql_query
+        return await agenerate_with(self.generator, question, schema, examples)
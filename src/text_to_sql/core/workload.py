@@ -0,0 +1,145 @@
+"""
+Workload recording.
+
+Every question answered by the runtime can be appended to a JSONL log
+(``WORKLOAD_LOG``): the question, target database, generated SQL, error,
+row count, total time and per-node timings. The log can be replayed through
+the agent (see ``text_to_sql.testing.replay``) to reproduce real traffic
+when evaluating cache, pool or prompt changes.
+"""
+import json
+import random
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+from ..utils.config import config
+from ..utils.logger import logger
+
+
+@dataclass
+class WorkloadRecord:
+    """One answered question."""
+    timestamp: float  # Unix time the question arrived
+    question: str
+    database_name: str = ""
+    sql_query: str = ""
+    error: str = ""
+    rows: Optional[int] = None  # None when rows were streamed
+    truncated: bool = False
+    seconds: float = 0.0  # end-to-end time
+    timings: Dict[str, float] = field(default_factory=dict)
+    
+    @classmethod
+    def from_state(
+        cls,
+        state: Dict[str, Any],
+        timestamp: float,
+        seconds: float
+    ) -> "WorkloadRecord":
+        """
+        Build a record from a final agent state.
+        
+        Args:
+            state: Final agent state
+            timestamp: Unix time the question arrived
+            seconds: End-to-end time
+        
+        Returns:
+            Workload record
+        """
+        streamed = state.get("row_stream") is not None
+        return cls(
+            timestamp=timestamp,
+            question=state.get("user_input", ""),
+            database_name=state.get("database_name", ""),
+            sql_query=state.get("sql_query", ""),
+            error=state.get("error", ""),
+            rows=None if streamed else len(state.get("query_results") or ()),
+            truncated=state.get("results_truncated", False),
+            seconds=round(seconds, 6),
+            timings={node: round(value, 6) for node, value in (state.get("timings") or {}).items()}
+        )
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WorkloadRecord":
+        """Build a record from a decoded log line (unknown keys are ignored)."""
+        known = {name: data[name] for name in cls.__dataclass_fields__ if name in data}
+        return cls(**known)
+
+
+class WorkloadRecorder:
+    """Appends workload records to a JSONL file, one line per question."""
+    
+    def __init__(self, path: str, sample_rate: float = 1.0):
+        """
+        Open the log for appending.
+        
+        Args:
+            path: JSONL file
+            sample_rate: Fraction of questions to record
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        logger.info(f"Recording workload to {path}")
+    
+    def record(self, record: WorkloadRecord) -> None:
+        """
+        Append a record (subject to sampling).
+        
+        A failed write is logged, never raised: recording must not fail
+        the question it describes.
+        
+        Args:
+            record: Record to write
+        """
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        line = json.dumps(asdict(record), ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                self._file.write(line)
+                self._file.flush()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not record workload: {e}")
+    
+    def close(self) -> None:
+        """Close the log file."""
+        with self._lock:
+            self._file.close()
+
+
+def read_workload(path: str) -> Iterator[WorkloadRecord]:
+    """
+    Read a workload log.
+    
+    Malformed lines (e.g. one cut short by a crash) are skipped.
+    
+    Args:
+        path: JSONL file written by :class:`WorkloadRecorder`
+    
+    Yields:
+        Records in file order
+    """
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield WorkloadRecord.from_dict(json.loads(line))
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Skipping malformed workload line {number}: {e}")
+
+
+def create_workload_recorder() -> Optional[WorkloadRecorder]:
+    """
+    Create the recorder described by the configuration.
+    
+    Returns:
+        ``WorkloadRecorder`` for ``WORKLOAD_LOG``, or None when it is unset
+    """
+    if not config.agent.workload_log:
+        return None
+    return WorkloadRecorder(config.agent.workload_log, config.agent.workload_sample_rate)
@@ -1,4 +1,23 @@
 """Database operations for the Text-to-SQL agent."""
 from .manager import DatabaseManager, db_manager
+from .registry import DatabaseRegistry, ReplicaSet, Database, db_registry
+from .result import QueryResult, Row
+from .safety import SQLVerdict, classify_sql
+from .schema_index import SchemaIndex, PrunedSchema
+from .streaming import RowStream
 
-__all__ = ["DatabaseManager", "db_manager"]
+__all__ = [
+    "DatabaseManager",
+    "db_manager",
+    "DatabaseRegistry",
+    "ReplicaSet",
+    "Database",
+    "db_registry",
+    "QueryResult",
+    "Row",
+    "SQLVerdict",
+    "classify_sql",
+    "SchemaIndex",
+    "PrunedSchema",
+    "RowStream",
+]
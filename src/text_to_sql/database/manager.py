@@ -4,31 +4,117 @@ Database operations for the Text-to-SQL agent.
 This module encapsulates all database-related functionality,
 including schema retrieval and query execution.
 """
-import warnings
+import asyncio
+import sqlite3
+import threading
+import time
 from typing import List, Dict, Any, Optional
-from sqlalchemy import create_engine, text, inspect, Engine
+from sqlalchemy import text, Engine, make_url
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import exc as sa_exc
+from sqlalchemy.ext.asyncio import AsyncEngine
 
 from ..utils.config import config
-from ..utils.exceptions import DatabaseError, SchemaRetrievalError, SQLExecutionError, UnsafeQueryError
+from ..utils.exceptions import (
+    DatabaseError,
+    SchemaRetrievalError,
+    SQLExecutionError,
+    QueryTimeoutError,
+    UnsafeQueryError,
+)
 from ..utils.logger import logger
-from ..utils.constants import DANGEROUS_OPERATIONS
+from ..utils.metrics import CACHE_REQUESTS
+from ..utils.constants import ERR_QUERY_TIMEOUT
+from ..utils.singleflight import SingleFlight
+from ..cache.result_cache import ResultCache, create_result_cache
+from .schema import TableInfo, reflect_tables
+from .schema_index import SchemaIndex
+from .snapshot import SchemaSnapshotStore, create_schema_snapshot_store, read_schema_fingerprint
+from .profiles import connection_profile
+from .pagination import NULLS_SORT_HIGH_DIALECTS, PageQuery, is_read_query
+from .result import QueryResult
+from .safety import classify_sql, sql_fingerprint
+from .streaming import RowStream
+from .timeout import StatementTimeout, statement_timeout, astatement_timeout
+
+# Sync driver name -> asyncio driver used by the async execution path
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+# Cheap probe that changes whenever rows are modified in user tables.
+# Statistics are flushed at transaction end, with up to about a second of delay.
+POSTGRES_DATA_VERSION_SQL = (
+    "SELECT COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0) "
+    "FROM pg_stat_user_tables"
+)
+
+# A pool that served a query this recently still holds a live connection
+WARM_UP_IDLE_SECONDS = 5.0
+
+
+def _query_key(sql_query: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Identity of a query and its bound parameters (result cache and single-flight key)."""
+    key = sql_fingerprint(sql_query)
+    if params:
+        key += ":" + sql_fingerprint(repr(sorted(params.items())))
+    return key
 
 
 class DatabaseManager:
     """Manages database connections and operations."""
     
-    def __init__(self, database_url: Optional[str] = None):
+    def __init__(
+        self,
+        database_url: Optional[str] = None,
+        result_cache: Optional[ResultCache] = None,
+        schema_snapshots: Optional[SchemaSnapshotStore] = None,
+        single_flight: Optional[bool] = None
+    ):
         """
         Initialize the database manager.
         
         Args:
             database_url: Optional database URL. If not provided, uses config.
+            result_cache: Optional cache for query results. If not provided,
+                one is created when ``RESULT_CACHE_ENABLED`` is set.
+            schema_snapshots: Optional on-disk schema snapshot store. If not
+                provided, one is created when ``SCHEMA_SNAPSHOT_DIR`` is set.
+            single_flight: Let identical read queries running at the same
+                time share one execution (default: ``AGENT_SINGLE_FLIGHT``)
         """
         self._database_url = database_url or config.database.url
+        self.result_cache = result_cache if result_cache is not None else create_result_cache()
+        self.schema_snapshots = (
+            schema_snapshots if schema_snapshots is not None else create_schema_snapshot_store()
+        )
+        if single_flight is None:
+            single_flight = config.agent.single_flight
+        self.execution_flight = SingleFlight("execute_sql") if single_flight else None
+        self._version_conn: Optional[sqlite3.Connection] = None
+        self._version_lock = threading.Lock()
         self._engine: Optional[Engine] = None
+        self._engine_lock = threading.Lock()
+        self._async_engine: Optional[AsyncEngine] = None
+        self._async_engine_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_unavailable = False
+        self._last_used = 0.0
+        self._async_last_used = 0.0
         self._cached_schema: Optional[str] = None
+        self._schema_index: Optional[SchemaIndex] = None
+        self._schema_fingerprint: Optional[str] = None
+        self._schema_checked_at = 0.0
+        self._snapshot_loaded = False
+        self._schema_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+    
+    @property
+    def database_url(self) -> str:
+        """URL of the database this manager connects to."""
+        return self._database_url
     
     @property
     def engine(self) -> Engine:
@@ -39,129 +125,695 @@ class DatabaseManager:
             SQLAlchemy engine instance
         """
         if self._engine is None:
+            # The connection warm-up and schema fetch may get here at once
+            with self._engine_lock:
+                if self._engine is None:
+                    try:
+                        self._engine = connection_profile(self._database_url).create_engine()
+                        logger.info(f"Database engine created for: {self._database_url}")
+                    except SQLAlchemyError as e:
+                        logger.error(f"Failed to create database engine: {e}")
+                        raise DatabaseError(f"Database connection error: {e}")
+        
+        return self._engine
+    
+    @property
+    def async_engine(self) -> Optional[AsyncEngine]:
+        """
+        Get or create the asyncio database engine.
+        
+        The engine is bound to the running event loop; a new one is created
+        if the manager is used from a different loop.
+        
+        Returns:
+            SQLAlchemy async engine, or None if no async driver is available
+        """
+        if self._async_unavailable:
+            return None
+        
+        loop = asyncio.get_running_loop()
+        if self._async_engine is not None and self._async_engine_loop is not loop:
+            # Pooled connections belong to the old loop; drop them without closing
+            self._async_engine.sync_engine.dispose(close=False)
+            self._async_engine = None
+        
+        if self._async_engine is None:
+            async_url = self._async_database_url()
+            if async_url is None:
+                logger.warning(
+                    f"No async driver known for {self._database_url}; "
+                    "falling back to worker threads"
+                )
+                self._async_unavailable = True
+                return None
+            
             try:
-                self._engine = create_engine(
-                    self._database_url,
-                    echo=config.database.echo,
-                    pool_size=config.database.pool_size,
-                    max_overflow=config.database.max_overflow
+                self._async_engine = connection_profile(async_url).create_async_engine()
+                self._async_engine_loop = loop
+                self._async_last_used = 0.0
+                logger.info(f"Async database engine created for: {async_url}")
+            except (ImportError, SQLAlchemyError) as e:
+                logger.warning(
+                    f"Async driver unavailable ({e}); falling back to worker threads"
                 )
-                logger.info(f"Database engine created for: {self._database_url}")
-            except SQLAlchemyError as e:
-                logger.error(f"Failed to create database engine: {e}")
-                raise DatabaseError(f"Database connection error: {e}")
+                self._async_unavailable = True
+                return None
         
-        return self._engine
+        return self._async_engine
+    
+    def _async_database_url(self) -> Optional[str]:
+        """
+        Translate the configured URL to its asyncio driver equivalent.
+        
+        Returns:
+            Async database URL, or None if the dialect has no known async driver
+        """
+        url = make_url(self._database_url)
+        if url.get_dialect().is_async:
+            return self._database_url
+        
+        async_driver = ASYNC_DRIVERS.get(url.drivername)
+        if async_driver is None:
+            return None
+        
+        return url.set(drivername=async_driver).render_as_string(hide_password=False)
     
     def get_schema(self, use_cache: bool = True) -> str:
         """
         Retrieve the database schema information.
         
+        The cached schema is seeded from the on-disk snapshot when one
+        exists and is re-checked against the catalog fingerprint every
+        ``AGENT_SCHEMA_REFRESH_INTERVAL`` seconds on a background thread.
+        
         Args:
             use_cache: Whether to use cached schema if available
-            
+        
         Returns:
             String representation of the database schema
-            
+        
         Raises:
             SchemaRetrievalError: If schema cannot be retrieved
         """
-        if use_cache and self._cached_schema and config.agent.cache_schema:
-            logger.debug("Using cached database schema")
-            return self._cached_schema
+        if use_cache and config.agent.cache_schema:
+            if self._cached_schema is None and not self._snapshot_loaded:
+                self._load_schema_snapshot()
+            
+            if self._cached_schema is not None:
+                interval = config.agent.schema_refresh_interval
+                if interval and time.monotonic() - self._schema_checked_at >= interval:
+                    self._schedule_schema_refresh()
+                logger.debug("Using cached database schema")
+                return self._cached_schema
         
+        return self._reflect_schema()
+    
+    def _reflect_schema(self) -> str:
+        """Reflect the schema, index it and update the caches and snapshot."""
         try:
-            inspector = inspect(self.engine)
-            schema_parts = []
-            
-            table_names = inspector.get_table_names()
-            logger.info(f"Retrieved {len(table_names)} tables from database")
-            
-            for table_name in table_names:
-                schema_parts.append(f"\nTable: {table_name}")
-                # Suppress warnings for unknown types (e.g., pgvector's 'vector' type)
-                with warnings.catch_warnings():
-                    warnings.filterwarnings('ignore', category=sa_exc.SAWarning, 
-                                          message='Did not recognize type')
-                    columns = inspector.get_columns(table_name)
+            with self._schema_lock:
+                with self.engine.connect() as conn:
+                    # Read before reflecting: a concurrent DDL then shows up
+                    # as a changed fingerprint on the next check
+                    fingerprint = read_schema_fingerprint(conn)
+                tables = reflect_tables(self.engine)
+                self._install_schema(tables, fingerprint)
                 
-                for column in columns:
-                    # Handle unknown types gracefully (e.g., vector, custom types)
-                    column_type = column['type']
-                    if hasattr(column_type, '__str__'):
-                        # Convert type to string, handling unknown types
-                        try:
-                            type_str = str(column_type)
-                        except Exception:
-                            type_str = 'UNKNOWN'
-                    else:
-                        type_str = str(column_type) if column_type else 'UNKNOWN'
-                    
-                    column_info = f"  - {column['name']}: {type_str}"
-                    # Add NOT NULL constraint if column is not nullable
-                    if column.get('nullable') is False:
-                        column_info += " NOT NULL"
-                    schema_parts.append(column_info)
-            
-            schema = "\n".join(schema_parts)
-            
-            # Cache the schema
-            if config.agent.cache_schema:
-                self._cached_schema = schema
-                logger.debug("Schema cached successfully")
-            
-            return schema
-            
+                if self.schema_snapshots is not None and fingerprint is not None:
+                    self.schema_snapshots.save(self._database_url, fingerprint, tables)
+                
+                return self._schema_index.schema
+        
         except SQLAlchemyError as e:
             logger.error(f"Failed to retrieve database schema: {e}")
             raise SchemaRetrievalError(f"Schema retrieval error: {e}")
     
+    def _install_schema(self, tables: List[TableInfo], fingerprint: Optional[str]) -> None:
+        """Index reflected tables and make them the current schema."""
+        # Index the tables now so per-question pruning is a lookup
+        self._schema_index = SchemaIndex(tables)
+        self._schema_fingerprint = fingerprint
+        self._schema_checked_at = time.monotonic()
+        
+        # Cache the schema
+        if config.agent.cache_schema:
+            self._cached_schema = self._schema_index.schema
+            logger.debug("Schema cached successfully")
+    
+    def _load_schema_snapshot(self) -> None:
+        """Start from the on-disk snapshot and revalidate it in the background."""
+        self._snapshot_loaded = True
+        if self.schema_snapshots is None:
+            return
+        
+        snapshot = self.schema_snapshots.load(self._database_url)
+        if snapshot is None:
+            return
+        
+        fingerprint, tables = snapshot
+        self._install_schema(tables, fingerprint)
+        logger.info(f"Loaded schema snapshot ({len(tables)} tables)")
+        self._schedule_schema_refresh()
+    
+    def _schedule_schema_refresh(self) -> None:
+        """Run :meth:`refresh_schema` on a background thread unless one is running."""
+        with self._refresh_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            # Count the pending check as done so callers don't queue more
+            self._schema_checked_at = time.monotonic()
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_in_background,
+                name="schema-refresh",
+                daemon=True
+            )
+            self._refresh_thread.start()
+    
+    def _refresh_in_background(self) -> None:
+        """Background refresh that logs instead of raising."""
+        try:
+            self.refresh_schema()
+        except Exception as e:
+            logger.warning(f"Background schema refresh failed: {e}")
+    
+    def refresh_schema(self) -> bool:
+        """
+        Re-reflect the schema if its fingerprint changed.
+        
+        Returns:
+            True if the schema was reflected again
+        
+        Raises:
+            SchemaRetrievalError: If the schema cannot be retrieved
+        """
+        try:
+            with self.engine.connect() as conn:
+                fingerprint = read_schema_fingerprint(conn)
+        except SQLAlchemyError as e:
+            raise SchemaRetrievalError(f"Schema fingerprint error: {e}")
+        
+        self._schema_checked_at = time.monotonic()
+        if fingerprint is not None and fingerprint == self._schema_fingerprint:
+            return False
+        
+        logger.info("Schema fingerprint changed; reflecting schema again")
+        self._reflect_schema()
+        return True
+    
+    @property
+    def schema_index(self) -> Optional[SchemaIndex]:
+        """Relevance index built from the most recently reflected schema."""
+        return self._schema_index
+    
     def execute_query(
         self,
         sql_query: str,
-        check_safety: bool = True
-    ) -> List[Dict[str, Any]]:
+        check_safety: bool = True,
+        use_cache: bool = True,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None
+    ) -> QueryResult:
         """
         Execute a SQL query and return results.
         
+        Read queries are capped at ``max_rows`` rows by the database itself;
+        use :meth:`fetch_page` to learn whether the result was truncated and
+        to continue past the cap. When a result cache is configured, read
+        queries are served from it as long as the database's data version
+        has not changed.
+        
         Args:
             sql_query: The SQL query to execute
             check_safety: Whether to check if query is safe
-            
+            use_cache: Whether the result cache may be used
+            timeout: Time limit in seconds (defaults to ``AGENT_QUERY_TIMEOUT``;
+                0 disables it)
+            max_rows: Row cap (defaults to ``AGENT_MAX_ROWS``; 0 disables it)
+        
         Returns:
-            List of dictionaries representing query results
-            
+            Query results (rows behave like read-only dictionaries)
+        
         Raises:
             UnsafeQueryError: If query contains dangerous operations
+            QueryTimeoutError: If the query runs past the time limit
             SQLExecutionError: If query execution fails
         """
-        if check_safety and not self._is_safe_query(sql_query):
-            logger.warning(f"Unsafe query blocked: {sql_query[:100]}")
+        return self.fetch_page(
+            sql_query,
+            page_size=max_rows,
+            check_safety=check_safety,
+            use_cache=use_cache,
+            timeout=timeout
+        )
+    
+    def fetch_page(
+        self,
+        sql_query: str,
+        page_size: Optional[int] = None,
+        page_token: Optional[str] = None,
+        check_safety: bool = True,
+        use_cache: bool = True,
+        timeout: Optional[float] = None
+    ) -> QueryResult:
+        """
+        Execute a read query and return one page of its results.
+        
+        The page is cut by the database (``LIMIT page_size + 1``), or while
+        fetching when the select list may repeat a column name. When more
+        rows exist, the page is marked truncated and carries a continuation
+        token; pass it back with the same SQL to get the next page. Tokens
+        use keyset pagination on the query's ``ORDER BY`` columns when
+        possible and ``OFFSET`` otherwise.
+        
+        Args:
+            sql_query: The SQL query to execute
+            page_size: Rows per page (defaults to ``AGENT_MAX_ROWS``; 0 disables it)
+            page_token: Continuation token from the previous page
+            check_safety: Whether to check if query is safe
+            use_cache: Whether the result cache may be used
+            timeout: Time limit in seconds (defaults to ``AGENT_QUERY_TIMEOUT``;
+                0 disables it)
+        
+        Returns:
+            Query results for the page; ``truncated`` and ``next_token``
+            are set when more rows exist
+        
+        Raises:
+            UnsafeQueryError: If query contains dangerous operations
+            InvalidPageTokenError: If the token is malformed or for another query
+            QueryTimeoutError: If the query runs past the time limit
+            SQLExecutionError: If query execution fails
+        """
+        self._check_query_safety(sql_query, check_safety)
+        page = self._plan_page(sql_query, page_size, page_token)
+        
+        cache_key, version, cached = self._lookup_result_cache(
+            page.sql, use_cache, page.key_params
+        )
+        if cached is not None:
+            return page.finish(cached)
+        
+        if self.execution_flight is not None and is_read_query(page.sql):
+            results = self.execution_flight.do(
+                _query_key(page.sql, page.key_params), self._run_page, page, timeout
+            )
+        else:
+            results = self._run_page(page, timeout)
+        
+        if cache_key is not None:
+            self.result_cache.put(cache_key, version, results)
+        return page.finish(results)
+    
+    def _run_page(self, page: PageQuery, timeout: Optional[float]) -> QueryResult:
+        """Execute a planned page query on the sync engine."""
+        deadline = None
+        try:
+            with self.engine.connect() as conn:
+                self._last_used = time.monotonic()
+                with statement_timeout(conn, self._query_timeout(timeout)) as deadline:
+                    logger.debug(f"Executing query: {page.sql[:200]}")
+                    result = conn.execute(text(page.sql), page.params)
+                    return self._collect_results(result, page)
+        
+        except SQLAlchemyError as e:
+            raise self._execution_error(e, deadline)
+    
+    def warm_up(self) -> float:
+        """
+        Check out a pooled connection and ping it, ahead of the next query.
+        
+        Meant to run while the LLM writes the SQL: the connection (and, with
+        a result cache, the data version probe) is open and verified by the
+        time the query arrives, and the pool hands the same connection out
+        again. Does nothing when the pool served a query in the last
+        ``WARM_UP_IDLE_SECONDS``. Failures are logged, not raised; the query
+        reports them if they persist.
+        
+        Returns:
+            Seconds spent warming up
+        """
+        if time.monotonic() - self._last_used < WARM_UP_IDLE_SECONDS:
+            return 0.0
+        
+        start = time.perf_counter()
+        try:
+            with self.engine.connect() as conn:
+                conn.exec_driver_sql("SELECT 1")
+            self._last_used = time.monotonic()
+            if self.result_cache is not None:
+                self.data_version()
+        except (SQLAlchemyError, DatabaseError) as e:
+            logger.warning(f"Connection warm-up failed: {e}")
+        return time.perf_counter() - start
+    
+    async def awarm_up(self) -> float:
+        """
+        Async variant of :meth:`warm_up` on the async engine.
+        
+        Falls back to running :meth:`warm_up` in a worker thread when no
+        async driver (aiosqlite/asyncpg) is installed.
+        
+        Returns:
+            Seconds spent warming up
+        """
+        async_engine = self.async_engine
+        if async_engine is None:
+            return await asyncio.to_thread(self.warm_up)
+        if time.monotonic() - self._async_last_used < WARM_UP_IDLE_SECONDS:
+            return 0.0
+        
+        start = time.perf_counter()
+        try:
+            async with async_engine.connect() as conn:
+                await conn.exec_driver_sql("SELECT 1")
+            self._async_last_used = time.monotonic()
+            if self.result_cache is not None:
+                await asyncio.to_thread(self.data_version)
+        except SQLAlchemyError as e:
+            logger.warning(f"Connection warm-up failed: {e}")
+        return time.perf_counter() - start
+    
+    def _check_query_safety(self, sql_query: str, check_safety: bool) -> None:
+        """Raise ``UnsafeQueryError`` for queries that must not run."""
+        if not check_safety:
+            return
+        verdict = classify_sql(sql_query)
+        if not verdict.is_read_only:
+            logger.warning(f"Unsafe query blocked ({verdict.reason}): {sql_query[:100]}")
             raise UnsafeQueryError(
-                "Query contains potentially dangerous operations. "
+                f"{verdict.reason}. "
                 "Only SELECT queries are allowed by default."
             )
+    
+    def _plan_page(
+        self,
+        sql_query: str,
+        page_size: Optional[int],
+        page_token: Optional[str]
+    ) -> PageQuery:
+        """Wrap a read query for capping/pagination; other statements run as-is."""
+        if page_size is None:
+            page_size = config.agent.max_rows
+        if not is_read_query(sql_query):
+            page_size = 0
+        
+        return PageQuery(
+            sql_query,
+            page_size,
+            page_token,
+            quote=self.engine.dialect.identifier_preparer.quote,
+            nulls_sort_high=self.engine.dialect.name in NULLS_SORT_HIGH_DIALECTS
+        )
+    
+    def _lookup_result_cache(
+        self,
+        sql_query: str,
+        use_cache: bool,
+        params: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Probe the data version and look the query up in the result cache.
+        
+        Returns:
+            Tuple of (cache key, data version, cached rows). The key is None
+            when the query must not be cached; rows are None on a miss.
+        """
+        if not use_cache or self.result_cache is None:
+            return None, None, None
+        if not is_read_query(sql_query):
+            return None, None, None
+        
+        version = self.data_version()
+        if version is None:
+            return None, None, None
+        
+        cache_key = _query_key(sql_query, params)
+        cached = self.result_cache.get(cache_key, version)
+        CACHE_REQUESTS.inc(cache="result", result="miss" if cached is None else "hit")
+        if cached is not None:
+            logger.info(f"Result cache hit. Returning {len(cached)} rows")
+        return cache_key, version, cached
+    
+    def data_version(self) -> Optional[Any]:
+        """
+        Probe a cheap counter that changes whenever the data changes.
+        
+        SQLite uses ``PRAGMA data_version`` on a dedicated connection (the
+        value is only comparable within one connection); PostgreSQL sums the
+        modification counters in ``pg_stat_user_tables``.
+        
+        Returns:
+            Opaque version value, or None if the dialect has no probe
+        """
+        dialect = self.engine.dialect.name
         
         try:
-            with self.engine.connect() as conn:
-                logger.debug(f"Executing query: {sql_query[:200]}")
-                result = conn.execute(text(sql_query))
-                
-                # Fetch all rows and convert to list of dicts
-                rows = result.fetchall()
-                columns = result.keys()
-                
-                results = [
-                    dict(zip(columns, row))
-                    for row in rows
-                ]
-                
-                logger.info(f"Query executed successfully. Retrieved {len(results)} rows")
-                return results
-                
+            if dialect == "sqlite":
+                return self._sqlite_data_version()
+            if dialect == "postgresql":
+                with self.engine.connect() as conn:
+                    return conn.execute(text(POSTGRES_DATA_VERSION_SQL)).scalar()
+        except (SQLAlchemyError, sqlite3.Error) as e:
+            logger.warning(f"Data version probe failed: {e}")
+        
+        return None
+    
+    def _sqlite_data_version(self) -> Optional[int]:
+        """Read ``PRAGMA data_version`` from the long-lived probe connection."""
+        database = make_url(self._database_url).database
+        if not database or database == ":memory:":
+            return None
+        
+        with self._version_lock:
+            if self._version_conn is None:
+                self._version_conn = sqlite3.connect(
+                    f"file:{database}?mode=ro", uri=True, check_same_thread=False
+                )
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def stream_query(
+        self,
+        sql_query: str,
+        batch_size: Optional[int] = None,
+        check_safety: bool = True,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None
+    ) -> RowStream:
+        """
+        Execute a SQL query and stream its rows in batches.
+        
+        Uses server-side cursors where the driver supports them, so memory
+        stays constant regardless of result size. The returned stream holds
+        a pooled connection until it is exhausted or closed.
+        
+        Args:
+            sql_query: The SQL query to execute
+            batch_size: Rows per batch (defaults to ``AGENT_STREAM_BATCH_SIZE``)
+            check_safety: Whether to check if query is safe
+            timeout: Time limit in seconds for executing the query and for
+                fetching each batch (defaults to ``AGENT_QUERY_TIMEOUT``;
+                0 disables it)
+            max_rows: Row cap (defaults to ``AGENT_MAX_ROWS``; 0 disables it)
+        
+        Returns:
+            Row stream yielding ``QueryResult`` batches
+        
+        Raises:
+            UnsafeQueryError: If query contains dangerous operations
+            QueryTimeoutError: If the query runs past the time limit
+            SQLExecutionError: If query execution fails
+        """
+        self._check_query_safety(sql_query, check_safety)
+        
+        try:
+            conn = self.engine.connect()
         except SQLAlchemyError as e:
             logger.error(f"Query execution failed: {e}")
             raise SQLExecutionError(f"Error executing SQL: {e}")
+        
+        logger.debug(f"Streaming query: {sql_query[:200]}")
+        return RowStream(
+            conn,
+            sql_query,
+            batch_size or config.agent.stream_batch_size,
+            timeout=self._query_timeout(timeout),
+            max_rows=config.agent.max_rows if max_rows is None else max_rows
+        )
+    
+    async def aget_schema(self, use_cache: bool = True) -> str:
+        """
+        Async variant of :meth:`get_schema`.
+        
+        Reflection is rare (the schema is cached), so it runs in a worker
+        thread rather than through the async engine.
+        
+        Args:
+            use_cache: Whether to use cached schema if available
+        
+        Returns:
+            String representation of the database schema
+        """
+        if use_cache and self._cached_schema and config.agent.cache_schema:
+            # Cache hit: no I/O beyond possibly starting a background refresh
+            return self.get_schema()
+        
+        return await asyncio.to_thread(self.get_schema, use_cache)
+    
+    async def aexecute_query(
+        self,
+        sql_query: str,
+        check_safety: bool = True,
+        use_cache: bool = True,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None
+    ) -> QueryResult:
+        """
+        Execute a SQL query on the async engine and return results.
+        
+        Falls back to running :meth:`execute_query` in a worker thread when
+        no async driver (aiosqlite/asyncpg) is installed.
+        
+        Args:
+            sql_query: The SQL query to execute
+            check_safety: Whether to check if query is safe
+            use_cache: Whether the result cache may be used
+            timeout: Time limit in seconds (defaults to ``AGENT_QUERY_TIMEOUT``;
+                0 disables it)
+            max_rows: Row cap (defaults to ``AGENT_MAX_ROWS``; 0 disables it)
+        
+        Returns:
+            Query results (rows behave like read-only dictionaries)
+        
+        Raises:
+            UnsafeQueryError: If query contains dangerous operations
+            QueryTimeoutError: If the query runs past the time limit
+            SQLExecutionError: If query execution fails
+        """
+        return await self.afetch_page(
+            sql_query,
+            page_size=max_rows,
+            check_safety=check_safety,
+            use_cache=use_cache,
+            timeout=timeout
+        )
+    
+    async def afetch_page(
+        self,
+        sql_query: str,
+        page_size: Optional[int] = None,
+        page_token: Optional[str] = None,
+        check_safety: bool = True,
+        use_cache: bool = True,
+        timeout: Optional[float] = None
+    ) -> QueryResult:
+        """
+        Async variant of :meth:`fetch_page` on the async engine.
+        
+        Falls back to running :meth:`fetch_page` in a worker thread when no
+        async driver (aiosqlite/asyncpg) is installed.
+        
+        Args:
+            sql_query: The SQL query to execute
+            page_size: Rows per page (defaults to ``AGENT_MAX_ROWS``; 0 disables it)
+            page_token: Continuation token from the previous page
+            check_safety: Whether to check if query is safe
+            use_cache: Whether the result cache may be used
+            timeout: Time limit in seconds (defaults to ``AGENT_QUERY_TIMEOUT``;
+                0 disables it)
+        
+        Returns:
+            Query results for the page; ``truncated`` and ``next_token``
+            are set when more rows exist
+        
+        Raises:
+            UnsafeQueryError: If query contains dangerous operations
+            InvalidPageTokenError: If the token is malformed or for another query
+            QueryTimeoutError: If the query runs past the time limit
+            SQLExecutionError: If query execution fails
+        """
+        async_engine = self.async_engine
+        if async_engine is None:
+            return await asyncio.to_thread(
+                self.fetch_page, sql_query, page_size, page_token,
+                check_safety, use_cache, timeout
+            )
+        
+        self._check_query_safety(sql_query, check_safety)
+        page = self._plan_page(sql_query, page_size, page_token)
+        
+        cache_key = version = None
+        if use_cache and self.result_cache is not None:
+            # The version probe is a blocking call; keep it off the event loop
+            cache_key, version, cached = await asyncio.to_thread(
+                self._lookup_result_cache, page.sql, use_cache, page.key_params
+            )
+            if cached is not None:
+                return page.finish(cached)
+        
+        if self.execution_flight is not None and is_read_query(page.sql):
+            results = await self.execution_flight.ado(
+                _query_key(page.sql, page.key_params), self._arun_page, async_engine, page, timeout
+            )
+        else:
+            results = await self._arun_page(async_engine, page, timeout)
+        
+        if cache_key is not None:
+            self.result_cache.put(cache_key, version, results)
+        return page.finish(results)
+    
+    async def _arun_page(
+        self,
+        async_engine: AsyncEngine,
+        page: PageQuery,
+        timeout: Optional[float]
+    ) -> QueryResult:
+        """Execute a planned page query on the async engine."""
+        deadline = None
+        try:
+            async with async_engine.connect() as conn:
+                self._async_last_used = time.monotonic()
+                async with astatement_timeout(conn, self._query_timeout(timeout)) as deadline:
+                    logger.debug(f"Executing query (async): {page.sql[:200]}")
+                    result = await conn.execute(text(page.sql), page.params)
+                    return self._collect_results(result, page)
+        
+        except SQLAlchemyError as e:
+            raise self._execution_error(e, deadline)
+    
+    def _query_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """Resolve the effective time limit (None when disabled)."""
+        if timeout is None:
+            timeout = config.agent.query_timeout
+        return timeout or None
+    
+    def _execution_error(
+        self,
+        error: SQLAlchemyError,
+        deadline: Optional[StatementTimeout]
+    ) -> SQLExecutionError:
+        """Map a driver error to the exception raised to callers."""
+        if deadline is not None and deadline.caused(error):
+            logger.warning(f"Query cancelled after {deadline.seconds}s time limit")
+            return QueryTimeoutError(ERR_QUERY_TIMEOUT.format(timeout=deadline.seconds))
+        
+        logger.error(f"Query execution failed: {error}")
+        return SQLExecutionError(f"Error executing SQL: {error}")
+    
+    def _collect_results(self, result, page: PageQuery) -> QueryResult:
+        """
+        Fetch the page's rows of a result into a compact ``QueryResult``.
+        
+        Args:
+            result: Buffered SQLAlchemy result
+            page: Page the result was executed for
+        
+        Returns:
+            Query results with column names stored once and rows as tuples
+        """
+        results = QueryResult(result.keys(), page.collect(result))
+        
+        logger.info(f"Query executed successfully. Retrieved {len(results)} rows")
+        return results
     
     def _is_safe_query(self, sql_query: str) -> bool:
         """
@@ -169,30 +821,60 @@ class DatabaseManager:
         
         Args:
             sql_query: The SQL query to check
-            
+        
         Returns:
             True if query is safe, False otherwise
         """
-        query_upper = sql_query.upper().strip()
-        
-        # Check for dangerous operations
-        for operation in DANGEROUS_OPERATIONS:
-            if operation in query_upper:
-                return False
-        
-        return True
+        return classify_sql(sql_query).is_read_only
     
     def clear_cache(self) -> None:
         """Clear the cached schema."""
         self._cached_schema = None
+        self._schema_index = None
         logger.debug("Schema cache cleared")
     
+    @property
+    def in_use(self) -> bool:
+        """Whether a query or an open row stream holds one of the pooled connections."""
+        engines = [self._engine]
+        if self._async_engine is not None:
+            engines.append(self._async_engine.sync_engine)
+        for engine in engines:
+            # Single-connection pools (in-memory SQLite) do not count checkouts
+            checkedout = getattr(engine.pool, "checkedout", None) if engine is not None else None
+            if checkedout is not None and checkedout() > 0:
+                return True
+        return False
+    
     def close(self) -> None:
-        """Close the database connection."""
+        """Close the database connections, including the async engine's."""
+        with self._version_lock:
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+        
+        async_engine, loop = self._async_engine, self._async_engine_loop
+        self._async_engine = None
+        self._async_engine_loop = None
+        if async_engine is not None:
+            if loop is not None and loop.is_running():
+                # The pooled connections belong to that loop; close them there
+                asyncio.run_coroutine_threadsafe(async_engine.dispose(), loop)
+            else:
+                async_engine.sync_engine.dispose(close=False)
+        
         if self._engine:
             self._engine.dispose()
             self._engine = None
             logger.info("Database connection closed")
+    
+    async def aclose(self) -> None:
+        """Close both the async and the sync database connections."""
+        if self._async_engine:
+            await self._async_engine.dispose()
+            self._async_engine = None
+            self._async_engine_loop = None
+        self.close()
 
 
 # Global database manager instance
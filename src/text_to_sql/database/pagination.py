@@ -0,0 +1,412 @@
+"""
+Row caps and pagination for generated queries.
+
+Read queries are wrapped in ``SELECT * FROM (<query>) AS page LIMIT n + 1``
+so the database stops after one row more than requested; the extra row only
+tells us whether the result was truncated. Continuation tokens resume a
+query where the previous page ended: by keyset on the query's own
+``ORDER BY`` columns when possible, by ``OFFSET`` otherwise.
+
+Wrapping would rename or reject repeated column names (``SELECT a.id, b.id``),
+so queries whose select list may repeat a name run as written and the cap
+is applied while fetching instead.
+"""
+import base64
+import binascii
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..utils.exceptions import InvalidPageTokenError
+from .result import QueryResult
+from .safety import classify_sql, sql_fingerprint
+
+PAGE_TOKEN_VERSION = 1
+
+_TOKEN_RE = re.compile(r"""
+      '(?:[^']|'')*'            # string literal
+    | "(?:[^"]|"")*"            # quoted identifier
+    | `[^`]*`                   # MySQL quoted identifier
+    | --[^\n]*                  # line comment
+    | /\*.*?\*/                 # block comment
+    | [A-Za-z_][A-Za-z0-9_$]*   # keyword or identifier
+    | \S                        # any other single character
+""", re.VERBOSE | re.DOTALL)
+
+_IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_$]*|"(?:[^"]|"")*"|`[^`]*`')
+
+# JSON round-trips these losslessly; keyset values of other types use OFFSET
+_KEYSET_TYPES = (str, int, float, bool)
+
+# Dialects where NULL sorts above every value (after them in ascending order)
+NULLS_SORT_HIGH_DIALECTS = {"postgresql", "oracle"}
+
+# Keywords that end the FROM list of a SELECT
+_FROM_END_KEYWORDS = {
+    "WHERE", "GROUP", "HAVING", "WINDOW", "ORDER", "LIMIT", "OFFSET", "FETCH",
+    "UNION", "INTERSECT", "EXCEPT",
+}
+
+
+def is_read_query(sql_query: str) -> bool:
+    """Whether a query is a single plain read that can be wrapped and cached."""
+    return classify_sql(sql_query).is_subquery
+
+
+def _unquote(identifier: str) -> str:
+    """Strip identifier quotes."""
+    if identifier[:1] == '"':
+        return identifier[1:-1].replace('""', '"')
+    if identifier[:1] == "`":
+        return identifier[1:-1]
+    return identifier
+
+
+def _top_level_tokens(sql_query: str) -> List[str]:
+    """
+    Tokens outside parentheses, comments dropped.
+    
+    Each parenthesized group leaves a ``(`` marker behind, so ``f(x)`` is
+    not mistaken for a bare ``f``.
+    """
+    depth = 0
+    top_level: List[str] = []
+    for token in _TOKEN_RE.findall(sql_query):
+        if token.startswith(("--", "/*")):
+            continue
+        if token == "(":
+            if depth == 0:
+                top_level.append(token)
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0:
+            top_level.append(token)
+    return top_level
+
+
+def may_repeat_columns(sql_query: str) -> bool:
+    """
+    Whether a query's result may contain the same column name twice.
+    
+    Reads the first top-level select list. Errs on the side of True: a
+    ``*`` next to other columns or over a join, and expressions that look
+    alike, all count as possible repeats.
+    
+    Args:
+        sql_query: SQL query
+    
+    Returns:
+        True unless every output column name is known and distinct
+    """
+    top_level = _top_level_tokens(sql_query)
+    upper = [token.upper() for token in top_level]
+    if "SELECT" not in upper:
+        return True
+    
+    start = upper.index("SELECT") + 1
+    if start < len(upper) and upper[start] in ("DISTINCT", "ALL"):
+        start += 1
+    end = upper.index("FROM", start) if "FROM" in upper[start:] else len(upper)
+    
+    items: List[List[str]] = [[]]
+    for token in top_level[start:end]:
+        if token == ",":
+            items.append([])
+        elif token != ";":
+            items[-1].append(token)
+    
+    names = []
+    for item in items:
+        if not item:
+            return True
+        if item[-1] == "*":
+            # ``t.*`` alone or ``*`` over a single table cannot repeat a name
+            if len(items) > 1:
+                return True
+            if len(item) == 1 and _joins_tables(upper[end + 1:]):
+                return True
+            continue
+        if _IDENTIFIER_RE.fullmatch(item[-1]) and (len(item) == 1 or item[-1].upper() != "END"):
+            # ``col``, ``t.col``, ``expr AS name`` and ``expr name``
+            names.append(_unquote(item[-1]).lower())
+        else:
+            names.append(" ".join(item).lower())
+    return len(set(names)) != len(names)
+
+
+def _joins_tables(from_tokens: List[str]) -> bool:
+    """Whether a top-level FROM list names more than one table."""
+    for token in from_tokens:
+        if token in _FROM_END_KEYWORDS:
+            return False
+        if token in (",", "JOIN"):
+            return True
+    return False
+
+
+def order_by_keys(sql_query: str) -> Optional[Tuple[List[str], bool]]:
+    """
+    Extract the top-level ``ORDER BY`` columns of a query.
+    
+    Only plain (optionally table-qualified) column references sorted in one
+    direction qualify, and the query must not limit itself.
+    
+    Args:
+        sql_query: SQL query
+    
+    Returns:
+        (column names, descending), or None if keyset pagination is not possible
+    """
+    top_level = _top_level_tokens(sql_query)
+    upper = [token.upper() for token in top_level]
+    start = None
+    for i in range(len(upper) - 1):
+        if upper[i] == "ORDER" and upper[i + 1] == "BY":
+            start = i + 2
+    if start is None:
+        return None
+    
+    items: List[List[str]] = [[]]
+    for token, keyword in zip(top_level[start:], upper[start:]):
+        if keyword in ("LIMIT", "OFFSET", "FETCH", "NULLS"):
+            return None
+        if token == ";":
+            break
+        if token == ",":
+            items.append([])
+        else:
+            items[-1].append(token)
+    
+    keys: List[str] = []
+    directions = set()
+    for item in items:
+        descending = bool(item) and item[-1].upper() == "DESC"
+        if item and item[-1].upper() in ("ASC", "DESC"):
+            item = item[:-1]
+        # Accept ``col``, ``t.col`` and quoted forms; take the last part
+        parts = item[::2]
+        if not parts or item[1::2] != ["."] * (len(parts) - 1):
+            return None
+        if not all(_IDENTIFIER_RE.fullmatch(part) for part in parts):
+            return None
+        keys.append(_unquote(parts[-1]))
+        directions.add(descending)
+    
+    if len(directions) != 1:
+        return None
+    return keys, directions.pop()
+
+
+def encode_page_token(payload: Dict[str, Any]) -> str:
+    """Serialize a continuation token."""
+    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_page_token(token: str, sql_query: str) -> Dict[str, Any]:
+    """
+    Parse a continuation token and check that it belongs to the query.
+    
+    Args:
+        token: Token returned with a previous page
+        sql_query: Query being paginated
+    
+    Returns:
+        Token payload
+    
+    Raises:
+        InvalidPageTokenError: If the token is malformed or for another query
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError) as e:
+        raise InvalidPageTokenError(f"Malformed page token: {e}")
+    
+    if not isinstance(payload, dict) or payload.get("v") != PAGE_TOKEN_VERSION:
+        raise InvalidPageTokenError("Unsupported page token")
+    if payload.get("q") != sql_fingerprint(sql_query):
+        raise InvalidPageTokenError("Page token does not belong to this query")
+    return payload
+
+
+class PageQuery:
+    """SQL for one page of a query, and the bookkeeping to build the next token."""
+    
+    def __init__(
+        self,
+        sql_query: str,
+        page_size: int,
+        page_token: Optional[str] = None,
+        quote: Callable[[str], str] = lambda name: f'"{name}"',
+        nulls_sort_high: bool = False
+    ):
+        """
+        Plan a page.
+        
+        Args:
+            sql_query: Read query to paginate
+            page_size: Rows per page; 0 disables the cap
+            page_token: Token from the previous page, if any
+            quote: Identifier quoting function for the target dialect
+            nulls_sort_high: Whether the dialect sorts NULL above every value
+                (see ``NULLS_SORT_HIGH_DIALECTS``)
+        
+        Raises:
+            InvalidPageTokenError: If the token is malformed or for another query
+        """
+        self.sql_query = sql_query.strip().rstrip(";").rstrip()
+        self.page_size = page_size
+        self.state = decode_page_token(page_token, self.sql_query) if page_token else {}
+        self.offset = self.state.get("o", 0)
+        self.params: Dict[str, Any] = {}
+        # Set when the query runs unwrapped: rows to skip, then rows to fetch
+        self.skip_rows = 0
+        self.fetch_rows: Optional[int] = None
+        self.wrapped = bool(page_size) and not may_repeat_columns(self.sql_query)
+        
+        if not page_size:
+            if self.state:
+                raise InvalidPageTokenError("A page size is required to resume from a page token")
+            self.sql = self.sql_query
+            return
+        
+        if not self.wrapped:
+            self.sql = self.sql_query
+            self.skip_rows = self.offset
+            self.fetch_rows = page_size + 1
+            return
+        
+        inner = f"SELECT * FROM (\n{self.sql_query}\n) AS page"
+        keys = self.state.get("k")
+        if keys:
+            descending = self.state["d"]
+            direction = " DESC" if descending else ""
+            self.params = {f"k{i}": value for i, value in enumerate(self.state["a"])}
+            inner += (
+                " WHERE " + _keyset_predicate(
+                    [quote(key) for key in keys], descending, nulls_sort_high != descending
+                )
+                + " ORDER BY " + ", ".join(quote(key) + direction for key in keys)
+            )
+            skip = self.state.get("s", 0)
+        else:
+            skip = self.offset
+        
+        self.sql = f"{inner} LIMIT {page_size + 1}" + (f" OFFSET {skip}" if skip else "")
+    
+    @property
+    def key_params(self) -> Dict[str, Any]:
+        """Parameters plus the fetch window: what identifies the page's rows."""
+        if self.fetch_rows is None:
+            return self.params
+        return dict(self.params, _rows=(self.skip_rows, self.fetch_rows))
+    
+    def collect(self, result) -> List[Tuple]:
+        """
+        Fetch the rows of :attr:`sql` that belong to the page.
+        
+        Args:
+            result: SQLAlchemy result of executing :attr:`sql`
+        
+        Returns:
+            Rows as tuples
+        """
+        if self.fetch_rows is None:
+            return [tuple(row) for row in result.fetchall()]
+        rows = result.fetchmany(self.skip_rows + self.fetch_rows)
+        return [tuple(row) for row in rows[self.skip_rows:]]
+    
+    def finish(self, result: QueryResult) -> QueryResult:
+        """
+        Trim the look-ahead row and build the continuation token.
+        
+        Args:
+            result: Rows returned by :attr:`sql`
+        
+        Returns:
+            Page of at most ``page_size`` rows
+        """
+        if not self.page_size or len(result) <= self.page_size:
+            return result
+        
+        page = QueryResult(result.columns, result.rows[:self.page_size], truncated=True)
+        payload: Dict[str, Any] = {
+            "v": PAGE_TOKEN_VERSION,
+            "q": sql_fingerprint(self.sql_query),
+            "o": self.offset + len(page),
+        }
+        payload.update(self._keyset(page))
+        page.next_token = encode_page_token(payload)
+        return page
+    
+    def _keyset(self, page: QueryResult) -> Dict[str, Any]:
+        """Keyset position after ``rows``, or {} to continue by OFFSET."""
+        if not self.wrapped:
+            return {}
+        if self.state.get("k"):
+            keys, descending = self.state["k"], self.state["d"]
+        else:
+            if self.state:
+                # An earlier page already fell back to OFFSET
+                return {}
+            order = order_by_keys(self.sql_query)
+            if order is None:
+                return {}
+            keys = [_resolve_column(key, list(page.columns)) for key in order[0]]
+            descending = order[1]
+            if None in keys:
+                return {}
+        
+        positions = [page.columns.index(key) for key in keys]
+        last = [page.rows[-1][i] for i in positions]
+        if not all(isinstance(value, _KEYSET_TYPES) for value in last):
+            return {}
+        
+        # Rows equal to the last key are skipped when the next page starts at it
+        tied = 0
+        for values in reversed(page.rows):
+            if [values[i] for i in positions] != last:
+                break
+            tied += 1
+        if tied == len(page) and self.state.get("a") == last:
+            tied += self.state.get("s", 0)
+        
+        return {"k": keys, "d": descending, "a": last, "s": tied}
+
+
+def _keyset_predicate(columns: List[str], descending: bool, nulls_after: bool) -> str:
+    """
+    Rows at or past the keyset position ``:k0, :k1, ...`` in sort order.
+    
+    Spelled out column by column rather than as a row comparison, so NULL
+    keys that sort after the position are kept (``OR col IS NULL``).
+    Rows equal to the position are included; the token says how many of
+    them the previous page already returned.
+    
+    Args:
+        columns: Quoted key columns
+        descending: Whether the keys sort in descending order
+        nulls_after: Whether NULL keys sort after every value in this order
+    
+    Returns:
+        SQL boolean expression
+    """
+    op = "<" if descending else ">"
+    terms = []
+    for i, column in enumerate(columns):
+        beyond = f"{column} {op} :k{i}"
+        if nulls_after:
+            beyond = f"({beyond} OR {column} IS NULL)"
+        terms.append([f"{previous} = :k{j}" for j, previous in enumerate(columns[:i])] + [beyond])
+    terms.append([f"{column} = :k{i}" for i, column in enumerate(columns)])
+    return "(" + " OR ".join("(" + " AND ".join(term) + ")" for term in terms) + ")"
+
+
+def _resolve_column(key: str, columns: List[str]) -> Optional[str]:
+    """Map an ORDER BY key to exactly one result column."""
+    if columns.count(key) == 1:
+        return key
+    matches = [column for column in columns if column.lower() == key.lower()]
+    return matches[0] if len(matches) == 1 else None
@@ -0,0 +1,195 @@
+"""
+Per-dialect connection profiles.
+
+A profile turns a database URL and the ``DATABASE_*`` / ``SQLITE_*``
+settings into the arguments for ``create_engine``. SQLite gets a pool that
+keeps every connection (each one holds its own page cache and memory map),
+per-connection pragmas and optionally read-only URI mode; PostgreSQL gets
+pool sizing, pre-ping, recycling and batch sizes. Other dialects get the
+generic pool settings. Pools hand out the most recently returned
+connection first, which is the one a warm-up just checked.
+"""
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Dict, Tuple
+from sqlalchemy import Engine, create_engine, event, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from ..utils.config import config
+from ..utils.logger import logger
+
+# SQLITE_LARGE_CACHE=true: per connection, so roughly 1 GB for a full
+# default pool (15 connections); only worth it for large, hot files
+SQLITE_LARGE_CACHE_SIZE = -65536  # KiB
+SQLITE_LARGE_MMAP_SIZE = 256 * 1024 * 1024  # bytes
+
+@dataclass(frozen=True)
+class ConnectionProfile:
+    """Everything needed to create an engine for one database."""
+    url: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    pragmas: Tuple[Tuple[str, Any], ...] = ()
+    # Settings stored in the database file itself (e.g. journal_mode)
+    file_pragmas: Tuple[Tuple[str, Any], ...] = ()
+    
+    def create_engine(self) -> Engine:
+        """
+        Create a sync engine with this profile.
+        
+        File-level pragmas are applied right away, so the one-time change
+        (which other connections see as a data change) happens before the
+        engine serves any query.
+        
+        Returns:
+            SQLAlchemy engine instance
+        """
+        engine = create_engine(self.url, **self.options)
+        self._install_pragmas(engine, self.pragmas)
+        if self.file_pragmas:
+            with engine.connect() as conn:
+                _apply_pragmas(self.file_pragmas, conn.connection.dbapi_connection, None)
+        return engine
+    
+    def create_async_engine(self) -> AsyncEngine:
+        """
+        Create an asyncio engine with this profile.
+        
+        Returns:
+            SQLAlchemy async engine instance
+        """
+        engine = create_async_engine(self.url, **self.options)
+        # Cannot connect from here; file-level pragmas are no-ops once applied
+        self._install_pragmas(engine.sync_engine, self.file_pragmas + self.pragmas)
+        return engine
+    
+    @staticmethod
+    def _install_pragmas(engine: Engine, pragmas: Tuple[Tuple[str, Any], ...]) -> None:
+        """Run pragmas on every new DBAPI connection."""
+        if pragmas:
+            event.listen(engine, "connect", partial(_apply_pragmas, pragmas))
+
+
+def _apply_pragmas(pragmas: Tuple[Tuple[str, Any], ...], dbapi_connection, connection_record) -> None:
+    """``connect`` event handler; works for sqlite3 and the aiosqlite adapter."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def connection_profile(database_url: str) -> ConnectionProfile:
+    """
+    Build the connection profile for a database URL.
+    
+    Args:
+        database_url: Database URL (sync or async driver)
+    
+    Returns:
+        ``ConnectionProfile`` for the URL's dialect
+    """
+    backend = make_url(database_url).get_backend_name()
+    if backend == "sqlite":
+        return sqlite_profile(database_url)
+    if backend == "postgresql":
+        return postgres_profile(database_url)
+    
+    settings = config.database
+    return ConnectionProfile(database_url, {
+        "echo": settings.echo,
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_pre_ping": settings.pool_pre_ping,
+        "pool_recycle": settings.pool_recycle,
+        "pool_use_lifo": True,
+    })
+
+
+def sqlite_profile(database_url: str) -> ConnectionProfile:
+    """
+    SQLite profile: pragmas, read-only URI mode and a fixed-size pool.
+    
+    In-memory databases keep SQLAlchemy's default single-connection pool,
+    which is the only one that sees the same database on every checkout.
+    
+    Args:
+        database_url: SQLite database URL
+    
+    Returns:
+        ``ConnectionProfile`` for the database
+    """
+    settings = config.database
+    url = make_url(database_url)
+    in_memory = url.database in (None, "", ":memory:") or "mode=memory" in url.database
+    options: Dict[str, Any] = {"echo": settings.echo}
+    
+    if not in_memory:
+        # Overflow connections would be opened and closed per checkout,
+        # throwing away their page cache; keep every connection instead
+        options["pool_size"] = settings.pool_size + settings.max_overflow
+        options["max_overflow"] = 0
+        options["pool_use_lifo"] = True
+        
+        if settings.sqlite_read_only and url.query.get("uri") != "true":
+            url = url.set(database=f"file:{url.database}").update_query_dict(
+                {"mode": "ro", "uri": "true"}
+            )
+    
+    read_only = settings.sqlite_read_only and not in_memory
+    file_pragmas = []
+    if settings.sqlite_wal and not read_only and not in_memory:
+        # Readers no longer block on a writer. Opt-in: the journal mode is
+        # stored in the file and stays WAL for every other program using it
+        file_pragmas.append(("journal_mode", "WAL"))
+    if settings.sqlite_large_cache:
+        pragmas = [
+            ("mmap_size", SQLITE_LARGE_MMAP_SIZE),
+            ("cache_size", SQLITE_LARGE_CACHE_SIZE),
+        ]
+    else:
+        pragmas = [
+            ("mmap_size", settings.sqlite_mmap_size),
+            ("cache_size", settings.sqlite_cache_size),
+        ]
+    if settings.sqlite_query_only or read_only:
+        pragmas.append(("query_only", "ON"))
+    
+    logger.debug(f"SQLite profile: read_only={read_only}, pragmas={file_pragmas + pragmas}")
+    return ConnectionProfile(
+        url.render_as_string(hide_password=False),
+        options,
+        tuple(pragmas),
+        tuple(file_pragmas)
+    )
+
+
+def postgres_profile(database_url: str) -> ConnectionProfile:
+    """
+    PostgreSQL profile: pool sizing, pre-ping, recycling and batch sizes.
+    
+    Args:
+        database_url: PostgreSQL database URL
+    
+    Returns:
+        ``ConnectionProfile`` for the database
+    """
+    settings = config.database
+    url = make_url(database_url)
+    options: Dict[str, Any] = {
+        "echo": settings.echo,
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_pre_ping": settings.pool_pre_ping,
+        "pool_recycle": settings.pool_recycle,
+        # Reuse the most recently returned (warmed-up) connection first
+        "pool_use_lifo": True,
+        "insertmanyvalues_page_size": settings.executemany_page_size,
+        # Rows buffered per round trip when results are streamed
+        "execution_options": {"max_row_buffer": settings.fetch_size},
+    }
+    if url.get_driver_name() == "psycopg2":
+        options["executemany_mode"] = "values_plus_batch"
+        options["executemany_batch_page_size"] = settings.executemany_page_size
+    
+    return ConnectionProfile(database_url, options)
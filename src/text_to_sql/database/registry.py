@@ -0,0 +1,420 @@
+"""
+Named databases, tenants and read replicas.
+
+The registry maps database names (and tenant ids) to a :class:`ReplicaSet`:
+one primary plus optional read replicas. ``DatabaseManager`` instances are
+created per URL on first use and kept in a bounded LRU, so a process serving
+many tenants only holds engines for the databases it is actively using.
+
+Read-only SQL goes to the healthy replica with the fewest queries in flight.
+A replica that fails and then does not answer a ping is skipped for
+``DATABASE_REPLICA_RETRY_AFTER`` seconds, and the query is retried on the
+primary. Everything else, including schema reflection, uses the primary.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Union
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..utils.config import config
+from ..utils.exceptions import ConfigurationError, DatabaseError, QueryTimeoutError, SQLExecutionError
+from ..utils.logger import logger
+from .manager import DatabaseManager, db_manager
+from .result import QueryResult
+from .safety import classify_sql
+from .schema_index import SchemaIndex
+from .streaming import RowStream
+
+DEFAULT_DATABASE = "default"
+
+
+class _Replica:
+    """Routing state of one replica."""
+    
+    __slots__ = ("url", "in_flight", "served", "down_until")
+    
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.served = 0
+        self.down_until = 0.0
+
+
+class ReplicaSet:
+    """
+    One logical database: a primary and its read replicas.
+    
+    Offers the query and schema methods of :class:`DatabaseManager`, so it
+    can be passed wherever the agent expects a database.
+    """
+    
+    def __init__(
+        self,
+        registry: "DatabaseRegistry",
+        name: str,
+        primary_url: str,
+        replica_urls: Sequence[str] = ()
+    ):
+        """
+        Initialize the replica set.
+        
+        Args:
+            registry: Registry that owns the database managers
+            name: Database name
+            primary_url: URL of the primary (all writes and schema reads)
+            replica_urls: URLs of read replicas
+        """
+        self.name = name
+        self.primary_url = primary_url
+        self._registry = registry
+        self._replicas = [_Replica(url) for url in replica_urls]
+        self._lock = threading.Lock()
+    
+    @property
+    def primary(self) -> DatabaseManager:
+        """Database manager of the primary."""
+        return self._registry.manager(self.primary_url)
+    
+    @property
+    def replica_urls(self) -> List[str]:
+        """URLs of the read replicas."""
+        return [replica.url for replica in self._replicas]
+    
+    def healthy_replicas(self) -> List[str]:
+        """URLs of the replicas currently receiving reads."""
+        now = time.monotonic()
+        return [replica.url for replica in self._replicas if replica.down_until <= now]
+    
+    @property
+    def schema_index(self) -> Optional[SchemaIndex]:
+        """Schema index of the primary."""
+        return self.primary.schema_index
+    
+    def get_schema(self, use_cache: bool = True) -> str:
+        """Schema of the primary (see :meth:`DatabaseManager.get_schema`)."""
+        return self.primary.get_schema(use_cache)
+    
+    async def aget_schema(self, use_cache: bool = True) -> str:
+        """Async variant of :meth:`get_schema`."""
+        return await self.primary.aget_schema(use_cache)
+    
+    def execute_query(self, sql_query: str, *args, **kwargs) -> QueryResult:
+        """Route :meth:`DatabaseManager.execute_query`."""
+        return self._route("execute_query", sql_query, args, kwargs)
+    
+    def fetch_page(self, sql_query: str, *args, **kwargs) -> QueryResult:
+        """Route :meth:`DatabaseManager.fetch_page`."""
+        return self._route("fetch_page", sql_query, args, kwargs)
+    
+    def stream_query(self, sql_query: str, *args, **kwargs) -> RowStream:
+        """Route :meth:`DatabaseManager.stream_query`."""
+        return self._route("stream_query", sql_query, args, kwargs)
+    
+    async def aexecute_query(self, sql_query: str, *args, **kwargs) -> QueryResult:
+        """Route :meth:`DatabaseManager.aexecute_query`."""
+        return await self._aroute("aexecute_query", sql_query, args, kwargs)
+    
+    async def afetch_page(self, sql_query: str, *args, **kwargs) -> QueryResult:
+        """Route :meth:`DatabaseManager.afetch_page`."""
+        return await self._aroute("afetch_page", sql_query, args, kwargs)
+    
+    def warm_up(self) -> float:
+        """Warm the database the next read goes to (see :meth:`DatabaseManager.warm_up`)."""
+        return self._read_manager().warm_up()
+    
+    async def awarm_up(self) -> float:
+        """Async variant of :meth:`warm_up`."""
+        return await self._read_manager().awarm_up()
+    
+    def _read_manager(self) -> DatabaseManager:
+        """Manager the next read query would run on."""
+        with self._lock:
+            replica = self._least_loaded()
+        return self.primary if replica is None else self._registry.manager(replica.url)
+    
+    def _least_loaded(self) -> Optional[_Replica]:
+        """Healthy replica with the fewest queries in flight; call with the lock held."""
+        now = time.monotonic()
+        healthy = [replica for replica in self._replicas if replica.down_until <= now]
+        if not healthy:
+            return None
+        # Fewest in flight; ties go to the least used, i.e. round robin
+        return min(healthy, key=lambda r: (r.in_flight, r.served))
+    
+    def _acquire(self, sql_query: str) -> Optional[_Replica]:
+        """Pick the replica for a query, or None to use the primary."""
+        if not self._replicas or not classify_sql(sql_query).is_read_only:
+            return None
+        
+        with self._lock:
+            replica = self._least_loaded()
+            if replica is None:
+                return None
+            replica.in_flight += 1
+            replica.served += 1
+            return replica
+    
+    def _release(self, replica: _Replica) -> None:
+        with self._lock:
+            replica.in_flight -= 1
+    
+    def _is_outage(self, error: Exception, manager: DatabaseManager) -> bool:
+        """Whether a failed query means the replica is down (not a bad query)."""
+        if isinstance(error, QueryTimeoutError):
+            return False
+        return not _ping(manager)
+    
+    def _mark_down(self, replica: _Replica, error: Exception) -> None:
+        replica.down_until = time.monotonic() + self._registry.replica_retry_after
+        logger.warning(
+            f"Replica of '{self.name}' unreachable, using the primary for "
+            f"{self._registry.replica_retry_after}s: {error}"
+        )
+    
+    def _route(self, method: str, sql_query: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Run a manager method on the chosen replica, falling back to the primary."""
+        replica = self._acquire(sql_query)
+        if replica is not None:
+            manager = self._registry.manager(replica.url)
+            release = True
+            try:
+                result = getattr(manager, method)(sql_query, *args, **kwargs)
+                if isinstance(result, RowStream):
+                    # The query keeps running on the replica until the stream ends
+                    result.call_on_close(partial(self._release, replica))
+                    release = False
+                return result
+            except (SQLExecutionError, DatabaseError) as e:
+                if not self._is_outage(e, manager):
+                    raise
+                self._mark_down(replica, e)
+            finally:
+                if release:
+                    self._release(replica)
+        
+        return getattr(self.primary, method)(sql_query, *args, **kwargs)
+    
+    async def _aroute(self, method: str, sql_query: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Async variant of :meth:`_route`."""
+        replica = self._acquire(sql_query)
+        if replica is not None:
+            manager = self._registry.manager(replica.url)
+            try:
+                return await getattr(manager, method)(sql_query, *args, **kwargs)
+            except (SQLExecutionError, DatabaseError) as e:
+                if not await asyncio.to_thread(self._is_outage, e, manager):
+                    raise
+                self._mark_down(replica, e)
+            finally:
+                self._release(replica)
+        
+        return await getattr(self.primary, method)(sql_query, *args, **kwargs)
+
+
+def _ping(manager: DatabaseManager) -> bool:
+    """Whether a database accepts connections."""
+    try:
+        with manager.engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+        return True
+    except (SQLAlchemyError, DatabaseError):
+        return False
+
+
+# Anything the agent nodes accept as their database
+Database = Union[DatabaseManager, ReplicaSet]
+
+
+class DatabaseRegistry:
+    """Named replica sets with a bounded LRU of database managers."""
+    
+    def __init__(
+        self,
+        max_managers: Optional[int] = None,
+        replica_retry_after: Optional[float] = None,
+        manager_factory: Callable[[str], DatabaseManager] = DatabaseManager
+    ):
+        """
+        Initialize the registry.
+        
+        Args:
+            max_managers: Database managers (engines) kept open; the least
+                recently used one is closed beyond this. Defaults to
+                ``DATABASE_REGISTRY_SIZE``.
+            replica_retry_after: Seconds an unreachable replica is skipped.
+                Defaults to ``DATABASE_REPLICA_RETRY_AFTER``.
+            manager_factory: Creates the manager for a URL
+        """
+        self.max_managers = max_managers or config.database.registry_size
+        self.replica_retry_after = (
+            replica_retry_after if replica_retry_after is not None
+            else config.database.replica_retry_after
+        )
+        self._manager_factory = manager_factory
+        self._databases: Dict[str, ReplicaSet] = {}
+        self._tenants: Dict[str, str] = {}
+        self._managers: "OrderedDict[str, DatabaseManager]" = OrderedDict()
+        self._pinned: Set[str] = set()
+        self._lock = threading.Lock()
+    
+    def register(
+        self,
+        name: str,
+        url: str,
+        replicas: Sequence[str] = (),
+        tenants: Sequence[str] = ()
+    ) -> ReplicaSet:
+        """
+        Add (or replace) a named database.
+        
+        Args:
+            name: Database name
+            url: URL of the primary
+            replicas: URLs of read replicas
+            tenants: Tenant ids routed to this database
+        
+        Returns:
+            The database's ``ReplicaSet``
+        """
+        database = ReplicaSet(self, name, url, replicas)
+        with self._lock:
+            self._databases[name] = database
+            for tenant in tenants:
+                self._tenants[tenant] = name
+        logger.info(f"Registered database '{name}' with {len(replicas)} replica(s)")
+        return database
+    
+    def add_manager(self, manager: DatabaseManager, pinned: bool = False) -> None:
+        """
+        Reuse an existing manager for its URL instead of creating one.
+        
+        Args:
+            manager: Database manager
+            pinned: Never evict (or close) it; for managers used outside the
+                registry, such as the global ``db_manager``
+        """
+        with self._lock:
+            self._managers[manager.database_url] = manager
+            if pinned:
+                self._pinned.add(manager.database_url)
+    
+    def get(self, name: Optional[str] = None) -> ReplicaSet:
+        """
+        Look up a database by name or tenant id.
+        
+        Args:
+            name: Database name or tenant id; empty for the default database
+        
+        Returns:
+            The database's ``ReplicaSet``
+        
+        Raises:
+            ConfigurationError: If no database or tenant has that name
+        """
+        key = name or DEFAULT_DATABASE
+        database = self._databases.get(self._tenants.get(key, key))
+        if database is None:
+            raise ConfigurationError(f"Unknown database or tenant: {key}")
+        return database
+    
+    @property
+    def names(self) -> List[str]:
+        """Registered database names."""
+        return list(self._databases)
+    
+    def manager(self, url: str) -> DatabaseManager:
+        """
+        Get the manager for a URL, creating it and evicting the LRU one if needed.
+        
+        Pinned managers and managers with a query or row stream in progress
+        are never evicted; the registry briefly holds more than
+        ``max_managers`` if nothing else can go.
+        
+        Args:
+            url: Database URL
+        
+        Returns:
+            Database manager for the URL
+        """
+        evicted = []
+        with self._lock:
+            manager = self._managers.get(url)
+            if manager is not None:
+                self._managers.move_to_end(url)
+                return manager
+            
+            manager = self._manager_factory(url)
+            self._managers[url] = manager
+            excess = len(self._managers) - self.max_managers
+            for old_url, old in list(self._managers.items()):
+                if excess <= 0:
+                    break
+                if old_url == url or old_url in self._pinned or old.in_use:
+                    continue
+                del self._managers[old_url]
+                evicted.append(old)
+                excess -= 1
+        
+        for old in evicted:
+            logger.info(f"Closing least recently used database manager: {old.database_url}")
+            old.close()
+        return manager
+    
+    def close(self) -> None:
+        """Close every database manager the registry owns (all but the pinned ones)."""
+        with self._lock:
+            managers = [
+                manager for url, manager in self._managers.items() if url not in self._pinned
+            ]
+            self._managers.clear()
+            self._pinned.clear()
+        for manager in managers:
+            manager.close()
+
+
+def create_database_registry() -> DatabaseRegistry:
+    """
+    Create the registry described by the configuration.
+    
+    The default database is ``DATABASE_URL`` (served by the global
+    ``db_manager``) with ``DATABASE_REPLICA_URLS``. ``DATABASES`` adds named
+    databases as JSON, e.g.
+    ``{"sales": {"url": "...", "replicas": ["..."], "tenants": ["acme"]}}``
+    (a plain URL string is accepted in place of the object).
+    
+    Returns:
+        Configured ``DatabaseRegistry``
+    
+    Raises:
+        ConfigurationError: If ``DATABASES`` cannot be parsed
+    """
+    registry = DatabaseRegistry()
+    registry.add_manager(db_manager, pinned=True)
+    registry.register(DEFAULT_DATABASE, config.database.url, config.database.replica_urls)
+    
+    if not config.database.databases:
+        return registry
+    
+    try:
+        entries = json.loads(config.database.databases)
+        for name, entry in entries.items():
+            if isinstance(entry, str):
+                entry = {"url": entry}
+            registry.register(
+                name,
+                entry["url"],
+                entry.get("replicas", ()),
+                entry.get("tenants", ())
+            )
+    except (ValueError, AttributeError, KeyError, TypeError) as e:
+        raise ConfigurationError(f"Invalid DATABASES setting: {e}")
+    
+    return registry
+
+
+# Global database registry instance
+db_registry = create_database_registry()
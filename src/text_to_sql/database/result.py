@@ -0,0 +1,126 @@
+"""
+Compact query results.
+
+A :class:`QueryResult` stores the column names once and every row as a
+plain tuple, instead of one dictionary per row. Rows are exposed through a
+lightweight read-only mapping view, so code written against the old
+``List[Dict[str, Any]]`` results (``row["name"]``, ``row.get(...)``,
+``dict(row)``) keeps working; :meth:`QueryResult.to_dicts` materializes
+real dictionaries only when asked.
+"""
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+class Row(Mapping):
+    """Read-only mapping view of one result row."""
+    
+    __slots__ = ("_values", "_index")
+    
+    def __init__(self, values: Tuple[Any, ...], index: Dict[str, int]):
+        self._values = values
+        self._index = index
+    
+    def __getitem__(self, key: Union[str, int]) -> Any:
+        if isinstance(key, int):
+            return self._values[key]
+        return self._values[self._index[key]]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def __repr__(self) -> str:
+        return f"Row({dict(self)!r})"
+
+
+class QueryResult(Sequence):
+    """Query result with column names stored once and rows as tuples."""
+    
+    def __init__(
+        self,
+        columns: Iterable[str],
+        rows: Optional[List[Tuple[Any, ...]]] = None,
+        truncated: bool = False,
+        next_token: Optional[str] = None
+    ):
+        """
+        Initialize the result.
+        
+        Args:
+            columns: Column names, in result order
+            rows: Row values as tuples, in column order
+            truncated: Whether more rows exist past this result
+            next_token: Continuation token for the next page, if truncated
+        """
+        self.columns: Tuple[str, ...] = tuple(columns)
+        self.rows: List[Tuple[Any, ...]] = rows if rows is not None else []
+        self.truncated = truncated
+        self.next_token = next_token
+        # Later duplicates win, as they did with dict(zip(columns, row))
+        self._index = {name: i for i, name in enumerate(self.columns)}
+    
+    @classmethod
+    def from_dicts(cls, rows: List[Dict[str, Any]]) -> "QueryResult":
+        """
+        Build a result from a list of row dictionaries.
+        
+        Args:
+            rows: Rows sharing the first row's keys
+        
+        Returns:
+            Equivalent ``QueryResult``
+        """
+        columns = list(rows[0].keys()) if rows else []
+        return cls(columns, [tuple(row.get(col) for col in columns) for row in rows])
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return QueryResult(self.columns, self.rows[item])
+        return Row(self.rows[item], self._index)
+    
+    def __iter__(self) -> Iterator[Row]:
+        index = self._index
+        for values in self.rows:
+            yield Row(values, index)
+    
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, QueryResult):
+            return self.columns == other.columns and self.rows == other.rows
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        flag = ", truncated" if self.truncated else ""
+        return f"QueryResult(columns={list(self.columns)!r}, rows={len(self.rows)}{flag})"
+    
+    def column(self, name: str) -> List[Any]:
+        """
+        Values of one column.
+        
+        Args:
+            name: Column name
+        
+        Returns:
+            Column values, in row order
+        """
+        position = self._index[name]
+        return [values[position] for values in self.rows]
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Materialize the rows as dictionaries (the pre-``QueryResult`` format).
+        
+        Returns:
+            List of dictionaries representing query results
+        """
+        columns = self.columns
+        return [dict(zip(columns, values)) for values in self.rows]
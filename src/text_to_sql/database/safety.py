@@ -0,0 +1,240 @@
+"""
+Single-pass SQL safety classification.
+
+Generated SQL is tokenized once, left to right, to blank out string
+literals, quoted identifiers and comments, so their contents can never be
+mistaken for keywords or statement separators. Keywords are then matched as
+whole words, so a column such as ``updated_at`` or ``deleted_flag`` is not
+read as ``UPDATE`` or ``DELETE``. The verdict records the statement type,
+the number of statements and whether the SQL is a single read-only
+statement.
+"""
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+from ..utils.constants import DANGEROUS_OPERATIONS, QUERY_TYPE_INSERT, QUERY_TYPE_SELECT
+
+# Statements that only read
+READ_ONLY_STATEMENTS = frozenset({QUERY_TYPE_SELECT, "VALUES", "TABLE", "SHOW", "EXPLAIN"})
+
+# Read statements that can be used as a subquery (and so capped and paginated)
+SUBQUERY_STATEMENTS = frozenset({QUERY_TYPE_SELECT, "VALUES", "TABLE"})
+
+# Keywords that write wherever they appear, e.g. PostgreSQL's
+# ``WITH d AS (DELETE ... RETURNING *) SELECT ...`` or ``SELECT ... INTO t``
+WRITE_KEYWORDS = frozenset(DANGEROUS_OPERATIONS) | {
+    QUERY_TYPE_INSERT, "MERGE", "CREATE", "GRANT", "REVOKE", "INTO",
+}
+
+# Keywords that can start the main statement after a ``WITH`` clause
+_MAIN_STATEMENTS = frozenset({
+    QUERY_TYPE_SELECT, "VALUES", "TABLE", QUERY_TYPE_INSERT, "UPDATE", "DELETE", "MERGE",
+})
+
+CLASSIFIER_CACHE_SIZE = 4096
+
+# Characters that can open a literal, quoted identifier or comment
+_OPENER_RE = re.compile(r"[-/'\"`$]")
+
+_MASKED_RE = re.compile(r"""
+      --[^\n]*                                  # line comment
+    | /\*.*?\*/                                 # block comment
+    | '(?:[^']|'')*'                            # string literal
+    | \$(?P<tag>[A-Za-z_]*)\$.*?\$(?P=tag)\$   # PostgreSQL dollar-quoted string
+    | "(?:[^"]|"")*"                            # quoted identifier
+    | `[^`]*`                                   # MySQL quoted identifier
+""", re.VERBOSE | re.DOTALL)
+
+_UNTERMINATED_RE = re.compile(r"['\"`]|/\*|\$[A-Za-z_]*\$")
+
+_FIRST_WORD_RE = re.compile(r"\s*((?:\(\s*)*)([A-Z_][A-Z0-9_$]*)?")
+
+_CALL_RE = re.compile(r"\s*\(")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class SQLVerdict:
+    """Classification of a SQL string."""
+    statement_type: str
+    statement_count: int
+    is_read_only: bool
+    reason: str = ""
+    
+    @property
+    def is_subquery(self) -> bool:
+        """Whether the SQL is a single read that can be wrapped as a subquery."""
+        return self.is_read_only and self.statement_type in SUBQUERY_STATEMENTS
+
+
+def strip_literals(sql_query: str) -> Optional[str]:
+    """
+    Blank out string literals, quoted identifiers and comments.
+    
+    Args:
+        sql_query: SQL text
+    
+    Returns:
+        SQL with each literal, identifier and comment replaced by a space,
+        or None if one of them is unterminated
+    """
+    spans = _masked_spans(sql_query)
+    if spans is None:
+        return None
+    if not spans:
+        return sql_query
+    
+    pieces = []
+    last = 0
+    for start, end in spans:
+        pieces.append(sql_query[last:start])
+        pieces.append(" ")
+        last = end
+    pieces.append(sql_query[last:])
+    return "".join(pieces)
+
+
+def sql_fingerprint(sql_query: str) -> str:
+    """
+    Compute a fingerprint of a SQL statement (result cache, single-flight
+    and page token key).
+    
+    Whitespace runs in plain SQL text are collapsed, comments count as
+    whitespace and trailing semicolons are removed. String literals and
+    quoted identifiers are kept byte for byte, so only formatting
+    differences map to the same key. SQL with an unterminated literal is
+    keyed on its exact text.
+    
+    Args:
+        sql_query: SQL statement
+    
+    Returns:
+        Hex digest identifying the statement
+    """
+    spans = _masked_spans(sql_query)
+    if spans is None:
+        normalized = sql_query.strip()
+    else:
+        pieces = []
+        plain = []
+        last = 0
+        for start, end in spans + [(len(sql_query), len(sql_query))]:
+            plain.append(sql_query[last:start])
+            masked = sql_query[start:end]
+            if masked[:1] in ("-", "/"):
+                # Comments merge into the whitespace around them
+                plain.append(" ")
+            else:
+                pieces.append(_WHITESPACE_RE.sub(" ", "".join(plain)))
+                pieces.append(masked)
+                plain = []
+            last = end
+        normalized = "".join(pieces).strip()
+    normalized = normalized.rstrip(";").rstrip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def _masked_spans(sql_query: str) -> Optional[List[Tuple[int, int]]]:
+    """
+    Find string literals, quoted identifiers and comments.
+    
+    This is the tokenizing pass: the regex engine jumps from one possible
+    opener to the next, so plain SQL text is skipped at C speed.
+    
+    Returns:
+        (start, end) offsets in order, or None if one is unterminated
+    """
+    spans = []
+    pos = 0
+    while True:
+        opener = _OPENER_RE.search(sql_query, pos)
+        if opener is None:
+            return spans
+        start = opener.start()
+        masked = _MASKED_RE.match(sql_query, start)
+        if masked is None:
+            if _UNTERMINATED_RE.match(sql_query, start):
+                return None
+            # A minus sign, division or positional parameter
+            pos = start + 1
+            continue
+        spans.append((start, masked.end()))
+        pos = masked.end()
+
+
+def _keyword_positions(text: str, keyword: str, calls: bool = False) -> Iterator[int]:
+    """Positions where ``keyword`` occurs as a whole word (and, unless ``calls``, not as a call)."""
+    size = len(keyword)
+    index = text.find(keyword)
+    while index >= 0:
+        end = index + size
+        before = text[index - 1] if index else " "
+        after = text[end] if end < len(text) else " "
+        if (
+            not (before.isalnum() or before in "_$")
+            and not (after.isalnum() or after in "_$")
+            # Function calls such as MySQL's insert(...) are not keywords
+            and (calls or not _CALL_RE.match(text, end))
+        ):
+            yield index
+        index = text.find(keyword, end)
+
+
+@lru_cache(maxsize=CLASSIFIER_CACHE_SIZE)
+def classify_sql(sql_query: str) -> SQLVerdict:
+    """
+    Classify a SQL string.
+    
+    After :func:`strip_literals`, statements are split on semicolons and
+    keywords are looked up as whole words in the remaining text. Verdicts
+    are cached by the exact SQL text: normalizing first would cost another
+    pass, and collapsing whitespace can move text in or out of a ``--``
+    comment, which changes what the SQL does.
+    
+    Args:
+        sql_query: SQL to classify
+    
+    Returns:
+        ``SQLVerdict`` for the SQL
+    """
+    code = strip_literals(sql_query)
+    if code is None:
+        first = _FIRST_WORD_RE.match(sql_query.upper()).group(2) or ""
+        return SQLVerdict(first, 1, False, "Query contains an unterminated literal or comment")
+    
+    statements = [part for part in code.upper().split(";") if part.strip()]
+    if not statements:
+        return SQLVerdict("", 0, False, "Query is empty")
+    
+    statement = statements[0]
+    leading = _FIRST_WORD_RE.match(statement)
+    first = leading.group(2) or ""
+    statement_type = first
+    if first == "WITH":
+        # The main statement is the first one outside the CTE bodies
+        depth = leading.group(1).count("(")
+        candidates = sorted(
+            (index, keyword)
+            for keyword in _MAIN_STATEMENTS if keyword in statement
+            for index in _keyword_positions(statement, keyword, calls=True)
+        )
+        for index, keyword in candidates:
+            if statement.count("(", 0, index) - statement.count(")", 0, index) == depth:
+                statement_type = keyword
+                break
+    
+    if len(statements) > 1:
+        return SQLVerdict(statement_type, len(statements), False,
+                          "Multiple statements are not allowed")
+    if statement_type not in READ_ONLY_STATEMENTS:
+        return SQLVerdict(statement_type, 1, False,
+                          f"{statement_type or 'Unknown'} statements are not allowed")
+    
+    for keyword in sorted(WRITE_KEYWORDS):
+        if keyword in statement and next(_keyword_positions(statement, keyword), None) is not None:
+            return SQLVerdict(statement_type, 1, False, f"Query contains {keyword}")
+    return SQLVerdict(statement_type, 1, True)
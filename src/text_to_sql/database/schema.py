@@ -0,0 +1,277 @@
+"""
+Schema reflection for the Text-to-SQL agent.
+
+Reads table and column metadata with a single catalog query on dialects
+that support it (SQLite, PostgreSQL) and falls back to SQLAlchemy's
+per-table inspector everywhere else.
+"""
+import warnings
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict
+from sqlalchemy import Engine, Connection, inspect, text
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..utils.logger import logger
+
+
+@dataclass(frozen=True)
+class ColumnInfo:
+    """A reflected column."""
+    name: str
+    type: str
+    nullable: bool = True
+    comment: Optional[str] = None
+
+
+@dataclass
+class TableInfo:
+    """A reflected table, its columns and the tables it references."""
+    name: str
+    columns: List[ColumnInfo] = field(default_factory=list)
+    foreign_keys: List[str] = field(default_factory=list)
+    comment: Optional[str] = None
+
+
+# One round-trip: every user table joined with its column list
+SQLITE_BULK_COLUMNS_SQL = """
+SELECT m.name, p.name, p.type, p."notnull", NULL, NULL
+FROM sqlite_master AS m
+JOIN pragma_table_info(m.name) AS p
+WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite~_%' ESCAPE '~'
+ORDER BY m.name, p.cid
+"""
+
+SQLITE_BULK_FOREIGN_KEYS_SQL = """
+SELECT DISTINCT m.name, f."table"
+FROM sqlite_master AS m
+JOIN pragma_foreign_key_list(m.name) AS f
+WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite~_%' ESCAPE '~'
+ORDER BY m.name, f."table"
+"""
+
+# Same tables as Inspector.get_table_names() (ordinary and partitioned
+# tables in the current schema), read straight from pg_catalog
+POSTGRES_BULK_COLUMNS_SQL = """
+SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod), a.attnotnull,
+       col_description(c.oid, a.attnum), obj_description(c.oid, 'pg_class')
+FROM pg_catalog.pg_class AS c
+JOIN pg_catalog.pg_namespace AS n ON n.oid = c.relnamespace
+JOIN pg_catalog.pg_attribute AS a ON a.attrelid = c.oid
+WHERE n.nspname = current_schema()
+  AND c.relkind IN ('r', 'p')
+  AND a.attnum > 0
+  AND NOT a.attisdropped
+ORDER BY c.relname, a.attnum
+"""
+
+POSTGRES_BULK_FOREIGN_KEYS_SQL = """
+SELECT DISTINCT c.relname, r.relname
+FROM pg_catalog.pg_constraint AS k
+JOIN pg_catalog.pg_class AS c ON c.oid = k.conrelid
+JOIN pg_catalog.pg_class AS r ON r.oid = k.confrelid
+JOIN pg_catalog.pg_namespace AS n ON n.oid = c.relnamespace
+WHERE k.contype = 'f' AND n.nspname = current_schema()
+ORDER BY c.relname, r.relname
+"""
+
+# format_type() spells types the SQL-standard way; the inspector renders the
+# SQLAlchemy type it maps them to. Precision is kept only where it does so.
+POSTGRES_TYPE_NAMES = {
+    "character varying": "VARCHAR",
+    "character": "CHAR",
+    "timestamp without time zone": "TIMESTAMP",
+    "timestamp with time zone": "TIMESTAMP",
+    "time without time zone": "TIME",
+    "time with time zone": "TIME",
+    "bit varying": "BIT",
+}
+
+POSTGRES_UNSIZED_TYPES = {"TIMESTAMP", "TIME", "BIT"}
+
+BULK_COLUMNS_SQL = {
+    "sqlite": SQLITE_BULK_COLUMNS_SQL,
+    "postgresql": POSTGRES_BULK_COLUMNS_SQL,
+}
+
+BULK_FOREIGN_KEYS_SQL = {
+    "sqlite": SQLITE_BULK_FOREIGN_KEYS_SQL,
+    "postgresql": POSTGRES_BULK_FOREIGN_KEYS_SQL,
+}
+
+
+def reflect_tables(engine: Engine, bulk: bool = True) -> List[TableInfo]:
+    """
+    Reflect all user tables and their columns.
+    
+    Args:
+        engine: Database engine
+        bulk: Whether to try the single-query catalog path first
+    
+    Returns:
+        Tables ordered by name, columns in definition order
+    """
+    if bulk and engine.dialect.name in BULK_COLUMNS_SQL:
+        try:
+            with engine.connect() as conn:
+                return reflect_tables_bulk(conn)
+        except SQLAlchemyError as e:
+            logger.warning(f"Bulk schema reflection failed, using inspector: {e}")
+    
+    return reflect_tables_inspector(engine)
+
+
+def reflect_tables_bulk(conn: Connection) -> List[TableInfo]:
+    """
+    Reflect tables and columns with one catalog query (plus one for foreign keys).
+    
+    Args:
+        conn: Open connection on a dialect listed in ``BULK_COLUMNS_SQL``
+    
+    Returns:
+        Tables ordered by name, columns in definition order
+    """
+    dialect = conn.dialect.name
+    rows = conn.execute(text(BULK_COLUMNS_SQL[dialect])).fetchall()
+    
+    tables: List[TableInfo] = []
+    for table_name, column_name, type_str, not_null, column_comment, table_comment in rows:
+        if not tables or tables[-1].name != table_name:
+            tables.append(TableInfo(name=table_name, comment=table_comment))
+        if dialect == "postgresql" and type_str:
+            type_str = normalize_postgres_type(type_str)
+        tables[-1].columns.append(ColumnInfo(
+            name=column_name,
+            type=type_str.upper() if type_str else "NULL",
+            nullable=not not_null,
+            comment=column_comment
+        ))
+    
+    by_name: Dict[str, TableInfo] = {table.name: table for table in tables}
+    for table_name, referred_table in conn.execute(text(BULK_FOREIGN_KEYS_SQL[dialect])):
+        if table_name in by_name:
+            by_name[table_name].foreign_keys.append(referred_table)
+    
+    logger.info(f"Retrieved {len(tables)} tables from database (bulk)")
+    return tables
+
+
+def normalize_postgres_type(type_str: str) -> str:
+    """
+    Render a ``format_type()`` result the way the inspector path does.
+    
+    ``character varying(100)`` becomes ``VARCHAR(100)``, ``numeric(10,2)``
+    becomes ``NUMERIC(10, 2)``, time zone qualifiers and timestamp precision
+    are dropped and arrays become ``ARRAY``. Types the mapping does not know
+    (extension types such as ``vector(3)``) are only upper-cased.
+    
+    Args:
+        type_str: Type as spelled by PostgreSQL's ``format_type()``
+    
+    Returns:
+        Upper-case type name
+    """
+    type_str = type_str.strip()
+    if type_str.endswith("[]"):
+        return "ARRAY"
+    
+    # "timestamp(3) with time zone": the modifier sits inside the name
+    name, args = type_str, None
+    if "(" in type_str and ")" in type_str:
+        head, _, rest = type_str.partition("(")
+        args, _, tail = rest.partition(")")
+        name = f"{head} {tail}"
+    
+    name = " ".join(name.lower().split())
+    name = POSTGRES_TYPE_NAMES.get(name, name.upper())
+    if args is None or name in POSTGRES_UNSIZED_TYPES:
+        return name
+    return f"{name}({', '.join(arg.strip() for arg in args.split(','))})"
+
+
+def reflect_tables_inspector(engine: Engine) -> List[TableInfo]:
+    """
+    Reflect tables and columns with SQLAlchemy's inspector (one call per table).
+    
+    Args:
+        engine: Database engine
+    
+    Returns:
+        Tables in inspector order, columns in definition order
+    """
+    inspector = inspect(engine)
+    table_names = inspector.get_table_names()
+    logger.info(f"Retrieved {len(table_names)} tables from database")
+    
+    tables = []
+    for table_name in table_names:
+        # Suppress warnings for unknown types (e.g., pgvector's 'vector' type)
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', category=sa_exc.SAWarning,
+                                    message='Did not recognize type')
+            columns = inspector.get_columns(table_name)
+        
+        table = TableInfo(
+            name=table_name,
+            foreign_keys=sorted({
+                fk['referred_table'] for fk in inspector.get_foreign_keys(table_name)
+            }),
+            comment=_table_comment(inspector, table_name)
+        )
+        for column in columns:
+            # Handle unknown types gracefully (e.g., vector, custom types)
+            column_type = column['type']
+            try:
+                type_str = str(column_type) if column_type is not None else 'UNKNOWN'
+            except Exception:
+                type_str = 'UNKNOWN'
+            
+            table.columns.append(ColumnInfo(
+                name=column['name'],
+                type=type_str,
+                nullable=column.get('nullable') is not False,
+                comment=column.get('comment')
+            ))
+        tables.append(table)
+    
+    return tables
+
+
+def _table_comment(inspector, table_name: str) -> Optional[str]:
+    """Read a table comment, tolerating dialects without comment support."""
+    try:
+        return inspector.get_table_comment(table_name).get('text')
+    except NotImplementedError:
+        return None
+
+
+def format_schema(tables: List[TableInfo]) -> str:
+    """
+    Render reflected tables as the schema text used in prompts.
+    
+    Tables are ordered by name and columns by definition, so the same
+    tables always render to the same text whatever the reflection path;
+    an unpruned schema extends the cached prompt prefix.
+    
+    Args:
+        tables: Reflected tables
+    
+    Returns:
+        String representation of the database schema
+    """
+    schema_parts = []
+    for table in sorted(tables, key=lambda table: table.name):
+        table_info = f"\nTable: {table.name}"
+        if table.comment:
+            table_info += f"  -- {table.comment}"
+        schema_parts.append(table_info)
+        for column in table.columns:
+            column_info = f"  - {column.name}: {column.type}"
+            # Add NOT NULL constraint if column is not nullable
+            if not column.nullable:
+                column_info += " NOT NULL"
+            if column.comment:
+                column_info += f"  -- {column.comment}"
+            schema_parts.append(column_info)
+    
+    return "\n".join(schema_parts)
@@ -0,0 +1,219 @@
+"""
+Relevance index over the reflected schema.
+
+Large schemas do not fit comfortably in a prompt. ``SchemaIndex`` ranks
+tables against a question with BM25 over table names, column names and
+comments (plus character trigrams for partial matches), so only the most
+relevant tables and their foreign-key neighbours are sent to the LLM.
+Everything runs locally; no embeddings or network calls are involved.
+"""
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .schema import TableInfo, format_schema
+
+# Table names are the strongest signal; repeat their terms in the document
+TABLE_NAME_BOOST = 3
+
+# Trigram matches are fuzzy, so they count for less than whole words
+TRIGRAM_WEIGHT = 0.3
+
+_CAMEL_RE = re.compile(r"([a-z0-9])([A-Z])")
+_WORD_RE = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]+")
+
+
+def _stem(word: str) -> str:
+    """Strip common English plural endings."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("ses", "xes", "zes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """
+    Split text into index terms.
+    
+    Identifiers are split on underscores and camelCase, words are lower-cased
+    and de-pluralized, and words of four or more letters also yield their
+    character trigrams. CJK runs yield character bigrams.
+    
+    Args:
+        text: Question, identifier or comment
+    
+    Yields:
+        Terms; trigram terms are prefixed with ``#``
+    """
+    text = _CAMEL_RE.sub(r"\1 \2", text).lower()
+    for word in _WORD_RE.findall(text):
+        if not word.isascii():
+            if len(word) == 1:
+                yield word
+            for i in range(len(word) - 1):
+                yield word[i:i + 2]
+            continue
+        
+        word = _stem(word)
+        yield word
+        if len(word) >= 4 and not word.isdigit():
+            padded = f"^{word}$"
+            for i in range(len(padded) - 2):
+                yield "#" + padded[i:i + 3]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the LLM token count of a text.
+    
+    Roughly four ASCII characters per token; other characters (e.g. CJK)
+    count as one token each.
+    
+    Args:
+        text: Prompt text
+    
+    Returns:
+        Approximate token count
+    """
+    ascii_chars = sum(1 for char in text if char.isascii())
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+@dataclass
+class PrunedSchema:
+    """Schema text narrowed to the tables relevant to one question."""
+    schema: str
+    tables: List[str] = field(default_factory=list)
+    full_tokens: int = 0
+    pruned_tokens: int = 0
+    
+    @property
+    def tokens_saved(self) -> int:
+        """Estimated prompt tokens saved by pruning."""
+        return self.full_tokens - self.pruned_tokens
+
+
+class SchemaIndex:
+    """BM25 index over tables, built once per reflected schema."""
+    
+    def __init__(self, tables: Sequence[TableInfo], k1: float = 1.2, b: float = 0.75):
+        """
+        Build the index.
+        
+        Args:
+            tables: Reflected tables
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.tables = list(tables)
+        self.schema = format_schema(self.tables)
+        self.full_tokens = estimate_tokens(self.schema)
+        self.k1 = k1
+        self.b = b
+        
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: List[int] = []
+        for doc_id, table in enumerate(self.tables):
+            terms = Counter(self._document_terms(table))
+            self._lengths.append(sum(terms.values()))
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = count
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        
+        # Foreign keys in both directions: a join needs either side
+        names = {table.name for table in self.tables}
+        self._neighbours: Dict[str, Set[str]] = {name: set() for name in names}
+        for table in self.tables:
+            for referred in table.foreign_keys:
+                if referred in names and referred != table.name:
+                    self._neighbours[table.name].add(referred)
+                    self._neighbours[referred].add(table.name)
+    
+    @staticmethod
+    def _document_terms(table: TableInfo) -> Iterator[str]:
+        """Terms describing one table."""
+        for _ in range(TABLE_NAME_BOOST):
+            yield from tokenize(table.name)
+        if table.comment:
+            yield from tokenize(table.comment)
+        for column in table.columns:
+            yield from tokenize(column.name)
+            if column.comment:
+                yield from tokenize(column.comment)
+    
+    def search(self, question: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Rank tables by relevance to a question.
+        
+        Args:
+            question: User's natural language question
+            limit: Maximum number of tables to return
+        
+        Returns:
+            (table name, score) pairs for tables with a positive score,
+            best first
+        """
+        doc_count = len(self.tables)
+        scores: Dict[int, float] = {}
+        
+        for term in set(tokenize(question)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            weight = TRIGRAM_WEIGHT if term.startswith("#") else 1.0
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / self._avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * tf * (self.k1 + 1) / (tf + norm)
+        
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.tables[item[0]].name))
+        return [(self.tables[doc_id].name, score) for doc_id, score in ranked[:limit]]
+    
+    def prune(self, question: str, top_k: int) -> PrunedSchema:
+        """
+        Narrow the schema to the tables relevant to a question.
+        
+        The ``top_k`` best-scoring tables are kept together with up to
+        ``top_k`` of their foreign-key neighbours (best-scoring first). When
+        the schema is already small or nothing matches, the full schema is
+        returned unchanged.
+        
+        Args:
+            question: User's natural language question
+            top_k: Number of directly matched tables to keep
+        
+        Returns:
+            Pruned schema and token accounting
+        """
+        full = PrunedSchema(
+            schema=self.schema,
+            tables=[table.name for table in self.tables],
+            full_tokens=self.full_tokens,
+            pruned_tokens=self.full_tokens
+        )
+        if len(self.tables) <= top_k:
+            return full
+        
+        ranked = self.search(question)
+        if not ranked:
+            return full
+        
+        scores = dict(ranked)
+        selected = {name for name, _ in ranked[:top_k]}
+        neighbours = {n for name in selected for n in self._neighbours[name]} - selected
+        selected.update(sorted(neighbours, key=lambda n: (-scores.get(n, 0.0), n))[:top_k])
+        
+        tables = [table for table in self.tables if table.name in selected]
+        schema = format_schema(tables)
+        return PrunedSchema(
+            schema=schema,
+            tables=[table.name for table in tables],
+            full_tokens=self.full_tokens,
+            pruned_tokens=estimate_tokens(schema)
+        )
@@ -0,0 +1,185 @@
+"""
+Schema fingerprints and on-disk schema snapshots.
+
+A fingerprint is a cheap catalog probe that changes whenever the schema
+changes. Snapshots persist the reflected tables together with the
+fingerprint they were read at, so a new process can start with the schema
+immediately and only reflect again if the fingerprint no longer matches.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict
+from typing import List, Optional, Tuple
+from sqlalchemy import Connection, make_url, text
+
+from ..utils.config import config
+from ..utils.logger import logger
+from .schema import ColumnInfo, TableInfo
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# PRAGMA schema_version is bumped by every DDL statement, but the counter
+# can repeat when a file is recreated; hashing the DDL text as well keeps
+# snapshots from a previous incarnation of the file from matching.
+SQLITE_FINGERPRINT_SQL = """
+SELECT (SELECT schema_version FROM pragma_schema_version()),
+       group_concat(type || ':' || name || ':' || coalesce(sql, ''), char(10))
+FROM (SELECT type, name, sql FROM sqlite_master ORDER BY type, name)
+"""
+
+# Checksum of everything reflect_tables reads, computed server-side so only
+# 32 characters cross the wire
+POSTGRES_FINGERPRINT_SQL = """
+SELECT md5(coalesce(string_agg(entry, chr(10) ORDER BY entry), ''))
+FROM (
+    SELECT c.relname || '.' || a.attname || ':' || format_type(a.atttypid, a.atttypmod)
+           || ':' || a.attnotnull::text
+           || ':' || coalesce(col_description(c.oid, a.attnum), '')
+           || ':' || coalesce(obj_description(c.oid, 'pg_class'), '') AS entry
+    FROM pg_catalog.pg_class AS c
+    JOIN pg_catalog.pg_namespace AS n ON n.oid = c.relnamespace
+    JOIN pg_catalog.pg_attribute AS a ON a.attrelid = c.oid
+    WHERE n.nspname = current_schema()
+      AND c.relkind IN ('r', 'p')
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+    UNION ALL
+    SELECT 'fk:' || k.conrelid::regclass::text || '>' || k.confrelid::regclass::text
+    FROM pg_catalog.pg_constraint AS k
+    JOIN pg_catalog.pg_namespace AS n ON n.oid = k.connamespace
+    WHERE k.contype = 'f' AND n.nspname = current_schema()
+) AS catalog
+"""
+
+
+def read_schema_fingerprint(conn: Connection) -> Optional[str]:
+    """
+    Probe the catalog for a value that changes whenever the schema changes.
+    
+    Args:
+        conn: Open database connection
+    
+    Returns:
+        Fingerprint string, or None if the dialect has no probe
+    """
+    dialect = conn.dialect.name
+    
+    if dialect == "sqlite":
+        version, ddl = conn.execute(text(SQLITE_FINGERPRINT_SQL)).one()
+        digest = hashlib.sha256((ddl or "").encode("utf-8")).hexdigest()[:16]
+        return f"{version}:{digest}"
+    
+    if dialect == "postgresql":
+        return conn.execute(text(POSTGRES_FINGERPRINT_SQL)).scalar()
+    
+    return None
+
+
+class SchemaSnapshotStore:
+    """Directory of schema snapshots, one JSON file per database."""
+    
+    def __init__(self, directory: str):
+        """
+        Initialize the store.
+        
+        Args:
+            directory: Directory holding snapshot files (created on first save)
+        """
+        self.directory = directory
+    
+    def path_for(self, database_url: str) -> Optional[str]:
+        """
+        Snapshot file for a database.
+        
+        Args:
+            database_url: Database URL
+        
+        Returns:
+            File path, or None for in-memory databases
+        """
+        url = make_url(database_url)
+        if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+            return None
+        
+        key = url.render_as_string(hide_password=True)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"schema-{digest}.json")
+    
+    def load(self, database_url: str) -> Optional[Tuple[str, List[TableInfo]]]:
+        """
+        Read the snapshot for a database.
+        
+        Args:
+            database_url: Database URL
+        
+        Returns:
+            (fingerprint, tables), or None if there is no usable snapshot
+        """
+        path = self.path_for(database_url)
+        if path is None or not os.path.exists(path):
+            return None
+        
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("format") != SNAPSHOT_FORMAT_VERSION:
+                return None
+            
+            tables = [
+                TableInfo(
+                    name=table["name"],
+                    columns=[ColumnInfo(**column) for column in table["columns"]],
+                    foreign_keys=table["foreign_keys"],
+                    comment=table["comment"]
+                )
+                for table in data["tables"]
+            ]
+            return data["fingerprint"], tables
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable schema snapshot {path}: {e}")
+            return None
+    
+    def save(self, database_url: str, fingerprint: str, tables: List[TableInfo]) -> None:
+        """
+        Write the snapshot for a database (atomically).
+        
+        Args:
+            database_url: Database URL
+            fingerprint: Fingerprint the tables were reflected at
+            tables: Reflected tables
+        """
+        path = self.path_for(database_url)
+        if path is None:
+            return
+        
+        data = {
+            "format": SNAPSHOT_FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "created_at": time.time(),
+            "tables": [asdict(table) for table in tables],
+        }
+        
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+            logger.debug(f"Schema snapshot written to {path}")
+        except OSError as e:
+            logger.warning(f"Failed to write schema snapshot {path}: {e}")
+
+
+def create_schema_snapshot_store() -> Optional[SchemaSnapshotStore]:
+    """
+    Create the snapshot store described by the configuration.
+    
+    Returns:
+        ``SchemaSnapshotStore``, or None when ``SCHEMA_SNAPSHOT_DIR`` is unset
+    """
+    if not config.cache.schema_snapshot_dir:
+        return None
+    return SchemaSnapshotStore(config.cache.schema_snapshot_dir)
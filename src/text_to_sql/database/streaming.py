@@ -0,0 +1,131 @@
+"""
+Streaming query results.
+
+A :class:`RowStream` keeps a connection open and hands out rows in
+fixed-size batches using server-side cursors (``stream_results`` /
+``yield_per``), so memory use does not grow with the result size.
+The statement timeout covers executing the query and fetching the first
+batch, and starts over for every later batch, so a slow consumer does not
+run the stream out of time.
+"""
+from contextlib import ExitStack
+from typing import Callable, List, Iterator, Optional
+from sqlalchemy import Connection, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..utils.constants import ERR_QUERY_TIMEOUT
+from ..utils.exceptions import QueryTimeoutError, SQLExecutionError
+from ..utils.logger import logger
+from .result import QueryResult
+from .timeout import statement_timeout
+
+
+class RowStream:
+    """Lazily fetched query result, consumed batch by batch."""
+    
+    def __init__(
+        self,
+        connection: Connection,
+        sql_query: str,
+        batch_size: int,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None
+    ):
+        """
+        Execute the query and prepare to stream its rows.
+        
+        Args:
+            connection: Open connection; the stream owns and closes it
+            sql_query: The SQL query to execute
+            batch_size: Number of rows per batch
+            timeout: Time limit in seconds for executing the query and for
+                fetching each batch; None or 0 disables it
+            max_rows: Row cap; None or 0 streams every row
+        
+        Raises:
+            QueryTimeoutError: If the query runs past the time limit
+            SQLExecutionError: If query execution fails
+        """
+        self.sql_query = sql_query
+        self.batch_size = batch_size
+        self.max_rows = max_rows or None
+        self.row_count = 0
+        self.truncated = False
+        self._connection: Optional[Connection] = connection
+        self._cleanup = ExitStack()
+        self._deadline = None
+        
+        try:
+            self._deadline = self._cleanup.enter_context(statement_timeout(connection, timeout))
+            self._result = connection.execution_options(
+                stream_results=True,
+                yield_per=batch_size
+            ).execute(text(sql_query))
+        except SQLAlchemyError as e:
+            self.close()
+            raise self._error(e, "Query execution failed", "Error executing SQL")
+        
+        self.columns: List[str] = list(self._result.keys())
+    
+    def __iter__(self) -> Iterator[QueryResult]:
+        """
+        Yield rows in batches.
+        
+        Stops at ``max_rows``; the last batch is then marked truncated (it
+        may be empty when the cap fell on a batch boundary). The connection
+        is released once the stream is exhausted.
+        
+        Raises:
+            SQLExecutionError: If fetching rows fails
+        """
+        try:
+            for partition in self._result.partitions():
+                rows = [tuple(row) for row in partition]
+                if self.max_rows is not None and self.row_count + len(rows) > self.max_rows:
+                    rows = rows[:self.max_rows - self.row_count]
+                    self.truncated = True
+                self.row_count += len(rows)
+                yield QueryResult(self.columns, rows, truncated=self.truncated)
+                if self.truncated:
+                    break
+                # Time spent by the consumer does not count against the limit
+                self._deadline.restart()
+        except SQLAlchemyError as e:
+            raise self._error(e, "Streaming rows failed", "Error streaming SQL results")
+        finally:
+            logger.info(f"Streamed {self.row_count} rows")
+            self.close()
+    
+    def call_on_close(self, callback: Callable[[], None]) -> None:
+        """
+        Run ``callback`` once the stream is closed or exhausted.
+        
+        Args:
+            callback: Called without arguments, right away if already closed
+        """
+        if self._connection is None:
+            callback()
+        else:
+            self._cleanup.callback(callback)
+    
+    def close(self) -> None:
+        """Release the underlying connection back to the pool."""
+        if self._connection is not None:
+            self._cleanup.close()
+            self._connection.close()
+            self._connection = None
+    
+    def _error(self, error: SQLAlchemyError, log_message: str, message: str) -> SQLExecutionError:
+        """Map a driver error to the exception raised to callers."""
+        if self._deadline is not None and self._deadline.caused(error):
+            logger.warning(f"Query cancelled after {self._deadline.seconds}s time limit")
+            return QueryTimeoutError(ERR_QUERY_TIMEOUT.format(timeout=self._deadline.seconds))
+        
+        logger.error(f"{log_message}: {error}")
+        return SQLExecutionError(f"{message}: {error}")
+    
+    def __enter__(self) -> "RowStream":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
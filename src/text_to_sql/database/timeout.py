@@ -0,0 +1,150 @@
+"""
+Server-side statement timeouts.
+
+PostgreSQL enforces ``statement_timeout`` itself and cancels the statement
+on the server. SQLite has no such setting, so a progress handler interrupts
+the running statement once the deadline has passed. Either way the
+connection stays usable and goes back to the pool.
+"""
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+from sqlalchemy import Connection, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# SQLSTATE for "canceling statement due to statement timeout"
+POSTGRES_QUERY_CANCELED = "57014"
+
+# SQLite VM instructions between deadline checks
+SQLITE_PROGRESS_STEPS = 1000
+
+
+class StatementTimeout:
+    """Deadline for the statements run inside one timeout block."""
+    
+    def __init__(self, seconds: Optional[float]):
+        """
+        Initialize the timeout.
+        
+        Args:
+            seconds: Time limit; None or 0 disables it
+        """
+        self.seconds = seconds or None
+        self.expired = False
+        self._deadline = time.monotonic() + seconds if seconds else None
+    
+    def restart(self) -> None:
+        """Start the time limit over, e.g. before fetching the next batch of rows."""
+        self.expired = False
+        if self.seconds is not None:
+            self._deadline = time.monotonic() + self.seconds
+    
+    def _check(self) -> int:
+        """SQLite progress handler: a non-zero return interrupts the statement."""
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            self.expired = True
+            return 1
+        return 0
+    
+    def caused(self, error: BaseException) -> bool:
+        """
+        Whether an execution error was caused by this timeout.
+        
+        Args:
+            error: Exception raised while executing (usually a DBAPIError)
+        
+        Returns:
+            True if the statement was cancelled for running too long
+        """
+        if self.seconds is None:
+            return False
+        if self.expired:
+            return True
+        
+        orig = getattr(error, "orig", None)
+        sqlstate = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+        return sqlstate == POSTGRES_QUERY_CANCELED
+
+
+def _set_local_timeout(seconds: float):
+    """``SET LOCAL statement_timeout`` for the current transaction."""
+    # SET does not accept bind parameters; the value is an int we built
+    return text(f"SET LOCAL statement_timeout = {int(seconds * 1000)}")
+
+
+@contextmanager
+def statement_timeout(conn: Connection, seconds: Optional[float]) -> Iterator[StatementTimeout]:
+    """
+    Limit how long statements on a connection may run.
+    
+    Statements and row fetches inside the block are cancelled by the
+    database once ``seconds`` have elapsed. Dialects without support run
+    unbounded.
+    
+    Args:
+        conn: Open connection
+        seconds: Time limit; None or 0 disables it
+    
+    Yields:
+        ``StatementTimeout`` for recognizing timeout errors
+    """
+    timeout = StatementTimeout(seconds)
+    if timeout.seconds is None:
+        yield timeout
+        return
+    
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        # Scoped to the connection's transaction, which ends when it is returned
+        conn.execute(_set_local_timeout(timeout.seconds))
+        yield timeout
+        return
+    
+    if dialect == "sqlite":
+        raw = conn.connection.driver_connection
+        raw.set_progress_handler(timeout._check, SQLITE_PROGRESS_STEPS)
+        try:
+            yield timeout
+        finally:
+            raw.set_progress_handler(None, SQLITE_PROGRESS_STEPS)
+        return
+    
+    yield timeout
+
+
+@asynccontextmanager
+async def astatement_timeout(
+    conn: AsyncConnection,
+    seconds: Optional[float]
+) -> AsyncIterator[StatementTimeout]:
+    """
+    Async variant of :func:`statement_timeout` (asyncpg, aiosqlite).
+    
+    Args:
+        conn: Open async connection
+        seconds: Time limit; None or 0 disables it
+    
+    Yields:
+        ``StatementTimeout`` for recognizing timeout errors
+    """
+    timeout = StatementTimeout(seconds)
+    if timeout.seconds is None:
+        yield timeout
+        return
+    
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        await conn.execute(_set_local_timeout(timeout.seconds))
+        yield timeout
+        return
+    
+    if dialect == "sqlite":
+        raw = (await conn.get_raw_connection()).driver_connection
+        await raw.set_progress_handler(timeout._check, SQLITE_PROGRESS_STEPS)
+        try:
+            yield timeout
+        finally:
+            await raw.set_progress_handler(None, SQLITE_PROGRESS_STEPS)
+        return
+    
+    yield timeout
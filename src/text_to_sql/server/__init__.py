@@ -0,0 +1,11 @@
+"""HTTP serving mode for the Text-to-SQL agent."""
+from .app import TextToSQLApp, create_app
+
+# ASGI application for ``uvicorn text_to_sql.server:app``
+app = create_app()
+
+__all__ = [
+    "TextToSQLApp",
+    "create_app",
+    "app",
+]
@@ -0,0 +1,364 @@
+"""
+ASGI application serving the Text-to-SQL agent over HTTP.
+
+One process keeps one :class:`TextToSQLRuntime` - compiled graph, LLM
+connection pool, schema and caches - warm across requests. Endpoints:
+
+    POST /query    {"question": "...", "database": "sales", "timeout": 10}
+    GET  /health   worker and queue occupancy
+    GET  /metrics  Prometheus text format
+
+At most ``concurrency`` questions are answered at once and at most
+``queue_size`` wait for a free worker; further requests are refused at once
+with ``429`` and ``Retry-After`` rather than queueing without bound. Every
+request has a deadline (``request_timeout``, or a shorter ``timeout`` in the
+body) that covers queueing and answering; past it the response is ``504``.
+A question past its deadline keeps its worker until it finishes, so the
+worker count also bounds the threads doing database and LLM work.
+
+The application has no web framework dependency. Serve it with any ASGI
+server, e.g. ``uvicorn text_to_sql.server:app`` or ``scripts/serve.py``.
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Sequence, Set, Tuple
+
+from ..core.runtime import TextToSQLRuntime, get_runtime
+from ..database.result import QueryResult
+from ..utils.config import config
+from ..utils.logger import logger
+from ..utils.metrics import CONTENT_TYPE, HTTP_QUEUE_SECONDS, HTTP_REQUESTS, metrics
+
+JSON_CONTENT_TYPE = b"application/json; charset=utf-8"
+PATHS = ("/query", "/health", "/metrics")
+
+
+class _HTTPError(Exception):
+    """Request that is answered with an error status."""
+    
+    def __init__(self, status: int, message: str, headers: Sequence[Tuple[bytes, bytes]] = ()):
+        super().__init__(message)
+        self.status = status
+        self.headers = list(headers)
+
+
+def _json_default(value: Any) -> Any:
+    """Encode database values that ``json`` does not know (dates, decimals, bytes)."""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def _encode(body: Dict[str, Any]) -> bytes:
+    return json.dumps(body, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+class TextToSQLApp:
+    """ASGI application answering questions with a shared runtime."""
+    
+    def __init__(
+        self,
+        runtime: Optional[TextToSQLRuntime] = None,
+        concurrency: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        request_timeout: Optional[float] = None,
+        max_body_bytes: Optional[int] = None
+    ):
+        """
+        Initialize the application.
+        
+        Args:
+            runtime: Runtime to answer with (default: the process-wide
+                runtime, created at startup)
+            concurrency: Questions answered at once (default: ``SERVER_CONCURRENCY``)
+            queue_size: Questions waiting for a worker before new ones are
+                refused with 429 (default: ``SERVER_QUEUE_SIZE``)
+            request_timeout: Longest time from arrival to response, in
+                seconds (default: ``SERVER_REQUEST_TIMEOUT``)
+            max_body_bytes: Largest accepted request body (default:
+                ``SERVER_MAX_BODY_BYTES``)
+        """
+        self.runtime = runtime
+        self.concurrency = concurrency or config.server.concurrency
+        self.queue_size = config.server.queue_size if queue_size is None else queue_size
+        self.request_timeout = request_timeout or config.server.request_timeout
+        self.max_body_bytes = max_body_bytes or config.server.max_body_bytes
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+        # Startup state belongs to the event loop it ran on
+        self._startup_lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._started_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiting = 0
+        self._running = 0
+        self._closing = False
+    
+    @property
+    def running(self) -> int:
+        """Questions being answered right now."""
+        return self._running
+    
+    @property
+    def waiting(self) -> int:
+        """Questions waiting for a free worker."""
+        return self._waiting
+    
+    async def startup(self) -> None:
+        """
+        Prepare the worker pool and warm the runtime.
+        
+        Compiles the graph, fetches the default database schema and opens
+        the database and LLM connections (:meth:`TextToSQLRuntime.aprewarm`)
+        so the first request does not pay for them. Failures are logged,
+        not raised: the database or LLM may come up after the server.
+        
+        Runs once per event loop: concurrent callers (lifespan and the
+        first requests) wait for the first one to finish.
+        """
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._startup_lock = asyncio.Lock()
+            self._lock_loop = loop
+        async with self._startup_lock:
+            if self._started_loop is not loop:
+                await self._start()
+                self._started_loop = loop
+    
+    async def _start(self) -> None:
+        start = time.perf_counter()
+        if self.runtime is None:
+            # Warmed below, on this loop
+            self.runtime = get_runtime(prewarm=False)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        # Blocking database and LLM calls (asyncio.to_thread) run in the
+        # loop's default executor. The app owns it, sized so every worker
+        # can have one call in flight, and shuts it down at shutdown.
+        loop = asyncio.get_running_loop()
+        previous = getattr(loop, "_default_executor", None)
+        if self._executor is not None:
+            # Started before, on another event loop
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="text-to-sql"
+        )
+        loop.set_default_executor(self._executor)
+        if previous is not None:
+            # e.g. the server's address lookups; its idle threads would linger
+            previous.shutdown(wait=False)
+        
+        await self.runtime.aprewarm()
+        logger.info(
+            f"Server ready in {time.perf_counter() - start:.2f}s: {self.concurrency} workers, "
+            f"queue of {self.queue_size}, {self.request_timeout:g}s deadline"
+        )
+    
+    async def shutdown(self) -> None:
+        """
+        Stop admitting questions, release the runtime's HTTP clients and
+        shut down the worker threads.
+        
+        Questions still running past their deadline are cancelled; a
+        database or LLM call already in a thread finishes on its own.
+        """
+        self._closing = True
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.runtime is not None:
+            await self.runtime.aclose()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        logger.info("Server stopped")
+    
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        """ASGI entry point."""
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        if self._started_loop is not asyncio.get_running_loop():
+            # ASGI servers without lifespan support
+            await self.startup()
+        
+        path, method = scope["path"], scope["method"]
+        headers = []
+        content_type = JSON_CONTENT_TYPE
+        try:
+            if path not in PATHS:
+                raise _HTTPError(404, f"Not found: {path}")
+            if method != ("POST" if path == "/query" else "GET"):
+                raise _HTTPError(405, f"{method} is not allowed on {path}")
+            if path == "/query":
+                status, body = 200, _encode(await self._query(receive))
+            elif path == "/health":
+                status, body = self._health()
+            else:
+                status, body = 200, metrics.render().encode("utf-8")
+                content_type = CONTENT_TYPE.encode("ascii")
+        except _HTTPError as e:
+            status, body, headers = e.status, _encode({"error": str(e)}), e.headers
+        except Exception as e:
+            logger.error(f"Unhandled error answering {method} {path}: {e}")
+            status, body = 500, _encode({"error": "Internal server error"})
+        
+        HTTP_REQUESTS.inc(path=path if path in PATHS else "other", status=str(status))
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", content_type),
+                (b"content-length", str(len(body)).encode("ascii")),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+    
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    
+    async def _read_body(self, receive) -> bytes:
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise _HTTPError(400, "Client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                raise _HTTPError(413, f"Request body exceeds {self.max_body_bytes} bytes")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                return b"".join(chunks)
+    
+    async def _query(self, receive) -> Dict[str, Any]:
+        """
+        Answer one ``POST /query``.
+        
+        Returns:
+            Response body: SQL, columns, rows, timings and the agent's error
+            (if any; the status stays 200 for questions the agent answered)
+        
+        Raises:
+            _HTTPError: For invalid requests, a full queue, shutdown or a
+                missed deadline
+        """
+        loop = asyncio.get_running_loop()
+        arrived = loop.time()
+        
+        try:
+            payload = json.loads(await self._read_body(receive) or b"{}")
+        except ValueError:
+            raise _HTTPError(400, "Request body must be JSON")
+        if not isinstance(payload, dict):
+            raise _HTTPError(400, "Request body must be a JSON object")
+        question = payload.get("question")
+        if not isinstance(question, str) or not question.strip():
+            raise _HTTPError(400, "'question' must be a non-empty string")
+        database_name = payload.get("database") or ""
+        if not isinstance(database_name, str):
+            raise _HTTPError(400, "'database' must be a string")
+        timeout = payload.get("timeout")
+        if timeout is None:
+            timeout = self.request_timeout
+        elif isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not timeout > 0:
+            # "not > 0" also rejects NaN
+            raise _HTTPError(400, "'timeout' must be a positive number of seconds")
+        timeout = min(float(timeout), self.request_timeout)
+        
+        if self._closing:
+            raise _HTTPError(503, "Server is shutting down")
+        if not self._slots.locked():
+            # A free worker is taken without yielding, so admission stays exact
+            await self._slots.acquire()
+        elif self._waiting >= self.queue_size:
+            raise _HTTPError(429, "Too many questions in flight", [(b"retry-after", b"1")])
+        else:
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout)
+            except asyncio.TimeoutError:
+                raise _HTTPError(504, f"No worker became free within {timeout:g}s")
+            finally:
+                self._waiting -= 1
+        
+        self._running += 1
+        queued = loop.time() - arrived
+        HTTP_QUEUE_SECONDS.observe(queued)
+        # Not cancelled at the deadline: its threads would keep running, so
+        # the worker is released only when the question is done
+        task = loop.create_task(self.runtime.ainvoke(question, database_name=database_name))
+        self._tasks.add(task)
+        task.add_done_callback(self._release_worker)
+        done, _ = await asyncio.wait({task}, timeout=timeout - queued)
+        if not done:
+            raise _HTTPError(504, f"Question not answered within {timeout:g}s")
+        state = task.result()
+        
+        results = state.get("query_results") or QueryResult([])
+        return {
+            "question": question,
+            "sql": state.get("sql_query", ""),
+            "columns": list(results.columns),
+            "rows": [list(row) for row in results.rows],
+            "row_count": len(results),
+            "truncated": state.get("results_truncated", False),
+            "next_page_token": state.get("next_page_token"),
+            "error": state.get("error", ""),
+            "timings": state.get("timings") or {},
+            "queued": round(queued, 6),
+            "seconds": round(loop.time() - arrived, 6),
+        }
+    
+    def _release_worker(self, task: asyncio.Task) -> None:
+        """Done callback of a question's task: free its worker."""
+        self._tasks.discard(task)
+        self._running -= 1
+        self._slots.release()
+        if not task.cancelled():
+            # Mark the error retrieved; past the deadline nobody else reads it
+            task.exception()
+    
+    def _health(self) -> Tuple[int, bytes]:
+        body = {
+            "status": "closing" if self._closing else "ok",
+            "running": self.running,
+            "waiting": self.waiting,
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+        }
+        return (503 if self._closing else 200), _encode(body)
+
+
+def create_app(runtime: Optional[TextToSQLRuntime] = None, **kwargs) -> TextToSQLApp:
+    """
+    Create the ASGI application.
+    
+    Args:
+        runtime: Runtime to answer with (default: the process-wide runtime)
+        **kwargs: ``TextToSQLApp`` settings overriding the configuration
+    
+    Returns:
+        ASGI application
+    """
+    return TextToSQLApp(runtime, **kwargs)
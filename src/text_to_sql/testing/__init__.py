@@ -0,0 +1,24 @@
+"""Offline test and benchmark helpers for the Text-to-SQL agent."""
+from .fake_llm import (
+    DEFAULT_SQL,
+    LatencyModel,
+    ScriptedResponses,
+    FakeSQLGenerator,
+    FakeOpenAIServer,
+)
+from .replay import RecordedSQLGenerator, ReplayReport, areplay, replay
+from .synthetic import SyntheticDataSpec, load_synthetic_data
+
+__all__ = [
+    "DEFAULT_SQL",
+    "LatencyModel",
+    "ScriptedResponses",
+    "FakeSQLGenerator",
+    "FakeOpenAIServer",
+    "RecordedSQLGenerator",
+    "ReplayReport",
+    "areplay",
+    "replay",
+    "SyntheticDataSpec",
+    "load_synthetic_data",
+]
@@ -0,0 +1,383 @@
+"""
+Offline stand-ins for the LLM.
+
+``FakeSQLGenerator`` plugs into the agent in place of ``LLMSQLGenerator``;
+``FakeOpenAIServer`` is a local OpenAI-compatible chat completions endpoint,
+so the real ``ChatOpenAI`` client, HTTP pool and response parsing are
+exercised too. Both answer from a scripted question -> SQL mapping and wait
+for a delay drawn from a :class:`LatencyModel`, so throughput and tail
+latency can be measured without paying for API calls.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Mapping, Optional, Sequence, Tuple
+
+from ..utils.exceptions import SQLGenerationError
+from ..utils.logger import logger
+from ..utils.normalize import normalize_question
+
+DEFAULT_SQL = "SELECT * FROM users LIMIT 5"
+
+# Simulated provider prefix cache: recent prompts kept, cache granularity in tokens
+PREFIX_CACHE_PROMPTS = 32
+PREFIX_CACHE_BLOCK = 64
+
+# Parameters of each latency distribution, in seconds
+_LATENCY_PARAMS = {
+    "fixed": ("delay",),
+    "uniform": ("low", "high"),
+    "exponential": ("mean",),
+    "lognormal": ("median", "sigma"),
+}
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """Distribution of simulated LLM response times."""
+    kind: str = "fixed"
+    params: Tuple[float, ...] = (0.0,)
+    
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """
+        Parse a latency specification.
+        
+        Accepted forms: ``0.2`` (fixed), ``fixed:0.2``, ``uniform:0.1,0.5``,
+        ``exponential:0.3`` (mean) and ``lognormal:0.8,0.5`` (median, sigma).
+        
+        Args:
+            spec: Latency specification, in seconds
+        
+        Returns:
+            Parsed latency model
+        
+        Raises:
+            ValueError: If the specification is malformed
+        """
+        kind, _, values = spec.partition(":")
+        if not values:
+            kind, values = "fixed", spec
+        kind = kind.strip().lower()
+        if kind not in _LATENCY_PARAMS:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        
+        params = tuple(float(value) for value in values.split(","))
+        if len(params) != len(_LATENCY_PARAMS[kind]):
+            raise ValueError(
+                f"{kind} latency takes {', '.join(_LATENCY_PARAMS[kind])}; got {values!r}"
+            )
+        if any(value < 0 for value in params):
+            raise ValueError(f"Latency parameters must not be negative: {spec}")
+        return cls(kind, params)
+    
+    def sample(self, rng: random.Random) -> float:
+        """
+        Draw one delay.
+        
+        Args:
+            rng: Random source
+        
+        Returns:
+            Delay in seconds
+        """
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "exponential":
+            return rng.expovariate(1 / self.params[0]) if self.params[0] else 0.0
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return rng.lognormvariate(math.log(median), sigma) if median else 0.0
+        return self.params[0]
+
+
+class ScriptedResponses:
+    """Question -> SQL answers, matched on the normalized question."""
+    
+    def __init__(self, answers: Optional[Mapping[str, str]] = None, default: str = DEFAULT_SQL):
+        """
+        Initialize the script.
+        
+        Args:
+            answers: SQL to return for each question
+            default: SQL for questions that are not in the script
+        """
+        self.default = default
+        self._answers: Dict[str, str] = {
+            normalize_question(question): sql_query
+            for question, sql_query in (answers or {}).items()
+        }
+    
+    @classmethod
+    def load(cls, path: str, default: str = DEFAULT_SQL) -> "ScriptedResponses":
+        """
+        Load a script from a JSON object of ``{"question": "SQL"}``.
+        
+        Args:
+            path: JSON file
+            default: SQL for questions that are not in the script
+        
+        Returns:
+            Loaded script
+        """
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), default)
+    
+    @property
+    def questions(self) -> Tuple[str, ...]:
+        """Normalized questions with a scripted answer."""
+        return tuple(self._answers)
+    
+    def answer(self, question: str) -> str:
+        """
+        SQL for a question.
+        
+        Args:
+            question: Natural language question
+        
+        Returns:
+            The scripted SQL, or the default
+        """
+        return self._answers.get(normalize_question(question), self.default)
+
+
+class _Simulator:
+    """Shared latency and failure sampling (``random.Random`` is not thread-safe)."""
+    
+    def __init__(self, latency: Optional[LatencyModel], error_rate: float, seed: Optional[int]):
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def draw(self) -> Tuple[float, bool]:
+        """Return (delay, whether the call fails)."""
+        with self._lock:
+            return self.latency.sample(self._rng), self._rng.random() < self.error_rate
+
+
+class FakeSQLGenerator:
+    """In-process SQL generator with scripted answers and simulated latency."""
+    
+    def __init__(
+        self,
+        script: Optional[ScriptedResponses] = None,
+        latency: Optional[LatencyModel] = None,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the generator.
+        
+        Args:
+            script: Answers to give; every question gets ``DEFAULT_SQL`` when omitted
+            latency: Delay of each call (none when omitted)
+            error_rate: Fraction of calls that raise ``SQLGenerationError``
+            seed: Seed for the latency and failure draws
+        """
+        self.script = script or ScriptedResponses()
+        self._simulator = _Simulator(latency, error_rate, seed)
+    
+    def generate(
+        self,
+        question: str,
+        schema: str,
+        examples: Sequence[Tuple[str, str]] = ()
+    ) -> str:
+        """
+        Answer after a simulated delay (blocks the calling thread).
+        
+        Args:
+            question: User's natural language question
+            schema: Database schema information (unused)
+            examples: Similar examples (unused)
+        
+        Returns:
+            Scripted SQL query
+        
+        Raises:
+            SQLGenerationError: For the simulated fraction of failed calls
+        """
+        delay, fail = self._simulator.draw()
+        time.sleep(delay)
+        return self._respond(question, fail)
+    
+    async def agenerate(
+        self,
+        question: str,
+        schema: str,
+        examples: Sequence[Tuple[str, str]] = ()
+    ) -> str:
+        """Async variant of :meth:`generate` (sleeps without blocking the loop)."""
+        delay, fail = self._simulator.draw()
+        await asyncio.sleep(delay)
+        return self._respond(question, fail)
+    
+    def _respond(self, question: str, fail: bool) -> str:
+        if fail:
+            raise SQLGenerationError("Simulated LLM failure")
+        return self.script.answer(question)
+
+
+class FakeOpenAIServer:
+    """
+    Local OpenAI-compatible ``/v1/chat/completions`` endpoint.
+    
+    The last user message is taken as the question. Each request is served
+    on its own thread, so concurrent calls overlap their simulated delays
+    the way a real API does. Usage includes cached prompt tokens: the
+    longest prefix shared with a recent prompt, in 64-token blocks, like
+    the providers' prefix caches.
+    """
+    
+    def __init__(
+        self,
+        script: Optional[ScriptedResponses] = None,
+        latency: Optional[LatencyModel] = None,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        Initialize the server (call :meth:`start` to serve).
+        
+        Args:
+            script: Answers to give; every question gets ``DEFAULT_SQL`` when omitted
+            latency: Delay of each response (none when omitted)
+            error_rate: Fraction of requests answered with HTTP 500
+            seed: Seed for the latency and failure draws
+            host: Interface to bind
+            port: TCP port (0 picks a free one)
+        """
+        self.script = script or ScriptedResponses()
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+        self._simulator = _Simulator(latency, error_rate, seed)
+        self._recent_prompts: Deque[str] = deque(maxlen=PREFIX_CACHE_PROMPTS)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass to the OpenAI client (``.../v1``)."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+    
+    def start(self) -> "FakeOpenAIServer":
+        """Serve requests from a daemon thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-openai", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Fake OpenAI server listening on {self.base_url}")
+        return self
+    
+    def close(self) -> None:
+        """Stop serving and release the port."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+    
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def completion(self, request: dict) -> Tuple[int, dict]:
+        """
+        Build the response to one chat completion request.
+        
+        Args:
+            request: Decoded request body
+        
+        Returns:
+            Tuple of (HTTP status, response body)
+        """
+        with self._requests_lock:
+            self.requests += 1
+            request_id = self.requests
+        messages = request.get("messages", [])
+        question = next(
+            (m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), ""
+        )
+        
+        delay, fail = self._simulator.draw()
+        time.sleep(delay)
+        if fail:
+            return 500, {"error": {"message": "Simulated LLM failure", "type": "server_error"}}
+        
+        sql_query = self.script.answer(question)
+        prompt = "".join(f"{m.get('role')}:{m.get('content', '')}\n" for m in messages)
+        # Rough count (~4 characters per token), enough for usage metrics
+        prompt_tokens = len(prompt) // 4
+        cached_tokens = self._cached_tokens(prompt)
+        completion_tokens = max(len(sql_query) // 4, 1)
+        return 200, {
+            "id": f"chatcmpl-fake-{request_id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": sql_query},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                "prompt_cache_hit_tokens": cached_tokens,
+                "prompt_cache_miss_tokens": prompt_tokens - cached_tokens,
+            },
+        }
+    
+    def _cached_tokens(self, prompt: str) -> int:
+        """Tokens of ``prompt`` a provider prefix cache would serve."""
+        with self._requests_lock:
+            shared = max((len(os.path.commonprefix([prompt, seen])) for seen in self._recent_prompts),
+                         default=0)
+            self._recent_prompts.append(prompt)
+        return shared // 4 // PREFIX_CACHE_BLOCK * PREFIX_CACHE_BLOCK
+    
+    def _handler_class(self):
+        fake = self
+        
+        class ChatCompletionsHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._reply(404, {"error": {"message": "Not found"}})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._reply(400, {"error": {"message": "Invalid JSON"}})
+                    return
+                self._reply(*fake.completion(request))
+            
+            def _reply(self, status: int, body: dict) -> None:
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            def log_message(self, format, *args):
+                logger.debug("fake-openai: " + format % args)
+        
+        return ChatCompletionsHandler
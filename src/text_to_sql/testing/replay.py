@@ -0,0 +1,256 @@
+"""
+Workload replay.
+
+Feeds a recorded workload log (``WORKLOAD_LOG``) back through a
+:class:`TextToSQLRuntime` with the original pacing, an accelerated one or
+as fast as possible. The LLM can be the real one, a ``FakeSQLGenerator``, or
+:class:`RecordedSQLGenerator`, which answers every question with the SQL it
+got in production after the time the LLM took then. Comparing reports
+before and after a change shows whether it helps the real workload.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..core.sql_generator import Example
+from ..core.workload import WorkloadRecord
+from ..utils.exceptions import SQLGenerationError
+from ..utils.normalize import normalize_question
+from .fake_llm import DEFAULT_SQL
+
+NODES = ("schema", "generate_sql", "execute_sql", "format_output")
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile.
+    
+    Args:
+        values: Observations (any order)
+        fraction: Percentile as a fraction, e.g. 0.99
+    
+    Returns:
+        The percentile, or 0.0 for no observations
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class RecordedSQLGenerator:
+    """Answers with the recorded SQL, optionally after the recorded LLM time."""
+    
+    def __init__(
+        self,
+        records: Iterable[WorkloadRecord],
+        replay_latency: bool = True,
+        default: str = DEFAULT_SQL
+    ):
+        """
+        Initialize the generator.
+        
+        Args:
+            records: Workload records; the last answer per question wins
+            replay_latency: Wait as long as generation took when recorded
+            default: SQL for questions that are not in the records
+        """
+        self.replay_latency = replay_latency
+        self.default = default
+        self._answers: Dict[str, Tuple[str, float, str]] = {}
+        for record in records:
+            timings = record.timings or {}
+            # generate_sql includes the schema fetch, which is replayed for real
+            llm_seconds = max(timings.get("generate_sql", 0.0) - timings.get("schema", 0.0), 0.0)
+            failed = record.error if not record.sql_query else ""
+            self._answers[normalize_question(record.question)] = (record.sql_query, llm_seconds, failed)
+    
+    def _answer(self, question: str) -> Tuple[str, float, str]:
+        return self._answers.get(normalize_question(question), (self.default, 0.0, ""))
+    
+    def generate(self, question: str, schema: str, examples: Sequence[Example] = ()) -> str:
+        """
+        Answer a question the way it was answered when recorded.
+        
+        Args:
+            question: User's natural language question
+            schema: Database schema information (unused)
+            examples: Similar examples (unused)
+        
+        Returns:
+            Recorded SQL query
+        
+        Raises:
+            SQLGenerationError: If generation failed when recorded
+        """
+        sql_query, delay, failed = self._answer(question)
+        if self.replay_latency:
+            time.sleep(delay)
+        if failed:
+            raise SQLGenerationError(failed)
+        return sql_query
+    
+    async def agenerate(self, question: str, schema: str, examples: Sequence[Example] = ()) -> str:
+        """Async variant of :meth:`generate`."""
+        sql_query, delay, failed = self._answer(question)
+        if self.replay_latency:
+            await asyncio.sleep(delay)
+        if failed:
+            raise SQLGenerationError(failed)
+        return sql_query
+
+
+@dataclass
+class ReplayResult:
+    """Outcome of one replayed question."""
+    record: WorkloadRecord
+    sql_query: str = ""
+    error: str = ""
+    rows: Optional[int] = None
+    seconds: float = 0.0  # from the scheduled start, so queueing counts
+    lag: float = 0.0  # how late the question was started
+    timings: Dict[str, float] = field(default_factory=dict)
+    
+    @property
+    def sql_matches(self) -> bool:
+        """Whether the SQL is the one recorded."""
+        return self.sql_query.strip() == self.record.sql_query.strip()
+
+
+@dataclass
+class ReplayReport:
+    """Results of a replay."""
+    results: List[ReplayResult]
+    elapsed: float
+    
+    @property
+    def qps(self) -> float:
+        """Questions completed per second."""
+        return len(self.results) / self.elapsed if self.elapsed else 0.0
+    
+    @property
+    def errors(self) -> int:
+        """Questions that ended with an error."""
+        return sum(1 for result in self.results if result.error)
+    
+    @property
+    def sql_mismatches(self) -> int:
+        """Questions answered with different SQL than recorded."""
+        return sum(1 for result in self.results if not result.sql_matches)
+    
+    def summary(self) -> str:
+        """
+        Human-readable comparison of the replay with the recording.
+        
+        Returns:
+            Multi-line report
+        """
+        lines = [
+            f"{len(self.results)} questions in {self.elapsed:.2f}s ({self.qps:.1f} QPS), "
+            f"{self.errors} errors, {self.sql_mismatches} with different SQL, "
+            f"max start lag {max((r.lag for r in self.results), default=0.0) * 1000:.1f} ms",
+            f"  {'stage':16}{'replay p50/p95/p99 ms':>30}{'recorded p50/p95/p99 ms':>32}",
+        ]
+        rows = [("end-to-end",
+                 [r.seconds for r in self.results],
+                 [r.record.seconds for r in self.results])]
+        for node in NODES:
+            rows.append((
+                node,
+                [r.timings[node] for r in self.results if node in r.timings],
+                [r.record.timings[node] for r in self.results if node in r.record.timings],
+            ))
+        for label, replayed, recorded in rows:
+            if replayed or recorded:
+                lines.append(f"  {label:16}{_triple(replayed):>30}{_triple(recorded):>32}")
+        return "\n".join(lines)
+
+
+def _triple(values: Sequence[float]) -> str:
+    if not values:
+        return "-"
+    return " / ".join(f"{percentile(values, q) * 1000:.1f}" for q in (0.50, 0.95, 0.99))
+
+
+async def areplay(
+    runtime,
+    records: Sequence[WorkloadRecord],
+    speed: float = 1.0,
+    max_in_flight: Optional[int] = None
+) -> ReplayReport:
+    """
+    Replay records through ``runtime.ainvoke``.
+    
+    Questions start at their recorded offsets divided by ``speed``, whether
+    or not earlier ones have finished (open loop), like real traffic.
+    
+    Args:
+        runtime: ``TextToSQLRuntime`` to answer with
+        records: Workload records
+        speed: Pacing factor: 1 is the original pace, 10 is ten times
+            faster, 0 starts everything at once
+        max_in_flight: Cap on concurrent questions (None for no cap)
+    
+    Returns:
+        Replay report
+    """
+    ordered = sorted(records, key=lambda record: record.timestamp)
+    if not ordered:
+        return ReplayReport([], 0.0)
+    
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+    first = ordered[0].timestamp
+    start = loop.time()
+    
+    async def run(record: WorkloadRecord, scheduled: float) -> ReplayResult:
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            lag = loop.time() - scheduled
+            state = await runtime.ainvoke(record.question, database_name=record.database_name)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+        return ReplayResult(
+            record=record,
+            sql_query=state.get("sql_query", ""),
+            error=state.get("error", ""),
+            rows=len(state.get("query_results") or ()),
+            seconds=loop.time() - scheduled,
+            lag=lag,
+            timings=dict(state.get("timings") or {})
+        )
+    
+    tasks = []
+    for record in ordered:
+        scheduled = start + ((record.timestamp - first) / speed if speed > 0 else 0.0)
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(run(record, scheduled)))
+    
+    results = await asyncio.gather(*tasks)
+    return ReplayReport(list(results), loop.time() - start)
+
+
+def replay(
+    runtime,
+    records: Sequence[WorkloadRecord],
+    speed: float = 1.0,
+    max_in_flight: Optional[int] = None
+) -> ReplayReport:
+    """
+    Blocking wrapper around :func:`areplay`.
+    
+    Args:
+        runtime: ``TextToSQLRuntime`` to answer with
+        records: Workload records
+        speed: Pacing factor (see :func:`areplay`)
+        max_in_flight: Cap on concurrent questions (None for no cap)
+    
+    Returns:
+        Replay report
+    """
+    return asyncio.run(areplay(runtime, records, speed, max_in_flight))
@@ -7,10 +7,14 @@ from .exceptions import (
     DatabaseError,
     SchemaRetrievalError,
     SQLExecutionError,
+    QueryTimeoutError,
+    InvalidPageTokenError,
     UnsafeQueryError,
     SQLGenerationError,
 )
 from .formatter import OutputFormatter
+from .metrics import MetricsRegistry, metrics
+from .singleflight import SingleFlight
 
 __all__ = [
     "logger",
@@ -19,7 +23,12 @@ __all__ = [
     "DatabaseError",
     "SchemaRetrievalError",
     "SQLExecutionError",
+    "QueryTimeoutError",
+    "InvalidPageTokenError",
     "UnsafeQueryError",
     "SQLGenerationError",
     "OutputFormatter",
+    "MetricsRegistry",
+    "metrics",
+    "SingleFlight",
 ]
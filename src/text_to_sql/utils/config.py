@@ -5,7 +5,7 @@ This module centralizes all configuration settings and provides
 a clean interface for accessing them.
 """
 import os
-from typing import Optional
+from typing import Optional, Tuple
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
@@ -20,6 +20,20 @@ class DatabaseConfig:
     echo: bool = False
     pool_size: int = 5
     max_overflow: int = 10
+    pool_pre_ping: bool = True
+    pool_recycle: int = 1800  # seconds; -1 keeps connections forever
+    executemany_page_size: int = 1000
+    fetch_size: int = 1000  # rows buffered per round trip by server-side cursors
+    sqlite_read_only: bool = False  # open SQLite files with mode=ro
+    sqlite_wal: bool = False  # switch SQLite files to WAL (changes the file itself)
+    sqlite_mmap_size: int = 0  # bytes per connection; 0 disables memory mapping
+    sqlite_cache_size: int = -8192  # pages, or KiB when negative; per connection
+    sqlite_large_cache: bool = False  # 64 MiB cache and 256 MiB mmap per connection
+    sqlite_query_only: bool = False
+    replica_urls: Tuple[str, ...] = ()  # read replicas of the default database
+    databases: str = ""  # JSON: named databases, their replicas and tenants
+    registry_size: int = 16  # database managers (engines) kept open
+    replica_retry_after: float = 30.0  # seconds an unreachable replica is skipped
 
 
 @dataclass(frozen=True)
@@ -30,6 +44,9 @@ class LLMConfig:
     max_tokens: Optional[int] = None
     api_key: Optional[str] = None
     base_url: Optional[str] = None
+    max_connections: int = 20
+    keepalive_expiry: float = 60.0  # seconds
+    few_shot_path: Optional[str] = None  # JSON examples placed in the static prompt prefix
 
 
 @dataclass(frozen=True)
@@ -38,6 +55,52 @@ class AgentConfig:
     max_retries: int = 3
     query_timeout: int = 30  # seconds
     cache_schema: bool = True
+    max_concurrency: int = 8
+    stream_batch_size: int = 500
+    max_rows: int = 1000  # row cap applied by the database; 0 disables it
+    schema_top_k: int = 10  # tables kept in the prompt; 0 sends the full schema
+    schema_refresh_interval: float = 60.0  # seconds between schema checks; 0 disables
+    workload_log: Optional[str] = None  # JSONL file recording every answered question
+    workload_sample_rate: float = 1.0  # fraction of questions recorded
+    single_flight: bool = True  # coalesce identical concurrent LLM calls and queries
+    few_shot_k: int = 3  # similar verified examples added to the prompt; 0 disables
+    example_store_path: Optional[str] = None  # None keeps verified examples in memory
+    example_store_max_entries: int = 100000
+    templates: bool = True  # answer common question shapes without the LLM
+    overlap_warm_up: bool = True  # warm a DB connection while the LLM writes the SQL
+    prewarm: bool = True  # warm the process-wide runtime in the background on creation
+
+
+@dataclass(frozen=True)
+class CacheConfig:
+    """Cache configuration settings."""
+    sql_cache_enabled: bool = True
+    sql_cache_path: Optional[str] = None  # None keeps the cache in memory
+    sql_cache_max_entries: int = 10000
+    sql_cache_ttl: int = 86400  # seconds
+    result_cache_enabled: bool = False
+    result_cache_max_bytes: int = 64 * 1024 * 1024
+    schema_snapshot_dir: Optional[str] = None  # None disables on-disk snapshots
+
+
+@dataclass(frozen=True)
+class MetricsConfig:
+    """Metrics configuration settings."""
+    enabled: bool = True
+    port: int = 0  # serve /metrics on this port; 0 disables the endpoint
+    host: str = "127.0.0.1"
+    file: Optional[str] = None  # Prometheus textfile written at exit
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    """HTTP server configuration settings."""
+    host: str = "127.0.0.1"
+    port: int = 8000
+    concurrency: int = 8  # questions answered at once
+    queue_size: int = 64  # questions waiting for a slot; more get 429
+    request_timeout: float = 30.0  # seconds from arrival to response
+    max_body_bytes: int = 64 * 1024
 
 
 class Config:
@@ -47,20 +110,81 @@ class Config:
         """Initialize configuration from environment variables."""
         self.database = DatabaseConfig(
             url=os.getenv("DATABASE_URL", "sqlite:///./sample.db"),
-            echo=os.getenv("DATABASE_ECHO", "false").lower() == "true"
+            echo=os.getenv("DATABASE_ECHO", "false").lower() == "true",
+            pool_size=int(os.getenv("DATABASE_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DATABASE_MAX_OVERFLOW", "10")),
+            pool_pre_ping=os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true",
+            pool_recycle=int(os.getenv("DATABASE_POOL_RECYCLE", "1800")),
+            executemany_page_size=int(os.getenv("DATABASE_EXECUTEMANY_PAGE_SIZE", "1000")),
+            fetch_size=int(os.getenv("DATABASE_FETCH_SIZE", "1000")),
+            sqlite_read_only=os.getenv("SQLITE_READ_ONLY", "false").lower() == "true",
+            sqlite_wal=os.getenv("SQLITE_WAL", "false").lower() == "true",
+            sqlite_mmap_size=int(os.getenv("SQLITE_MMAP_SIZE", "0")),
+            sqlite_cache_size=int(os.getenv("SQLITE_CACHE_SIZE", "-8192")),
+            sqlite_large_cache=os.getenv("SQLITE_LARGE_CACHE", "false").lower() == "true",
+            sqlite_query_only=os.getenv("SQLITE_QUERY_ONLY", "false").lower() == "true",
+            replica_urls=tuple(
+                url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+            ),
+            databases=os.getenv("DATABASES", ""),
+            registry_size=int(os.getenv("DATABASE_REGISTRY_SIZE", "16")),
+            replica_retry_after=float(os.getenv("DATABASE_REPLICA_RETRY_AFTER", "30"))
         )
         
         self.llm = LLMConfig(
             model_name=os.getenv("LLM_MODEL", "deepseek-chat"),
             temperature=float(os.getenv("LLM_TEMPERATURE", "0.0")),
             api_key=os.getenv("DEEPSEEK_API_KEY") or os.getenv("OPENAI_API_KEY"),
-            base_url=os.getenv("DEEPSEEK_BASE_URL")
+            base_url=os.getenv("DEEPSEEK_BASE_URL"),
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60")),
+            few_shot_path=os.getenv("LLM_FEW_SHOT_PATH") or None
         )
         
         self.agent = AgentConfig(
             max_retries=int(os.getenv("AGENT_MAX_RETRIES", "3")),
             query_timeout=int(os.getenv("AGENT_QUERY_TIMEOUT", "30")),
-            cache_schema=os.getenv("AGENT_CACHE_SCHEMA", "true").lower() == "true"
+            cache_schema=os.getenv("AGENT_CACHE_SCHEMA", "true").lower() == "true",
+            max_concurrency=int(os.getenv("AGENT_MAX_CONCURRENCY", "8")),
+            stream_batch_size=int(os.getenv("AGENT_STREAM_BATCH_SIZE", "500")),
+            max_rows=int(os.getenv("AGENT_MAX_ROWS", "1000")),
+            schema_top_k=int(os.getenv("AGENT_SCHEMA_TOP_K", "10")),
+            schema_refresh_interval=float(os.getenv("AGENT_SCHEMA_REFRESH_INTERVAL", "60")),
+            workload_log=os.getenv("WORKLOAD_LOG") or None,
+            workload_sample_rate=float(os.getenv("WORKLOAD_SAMPLE_RATE", "1.0")),
+            single_flight=os.getenv("AGENT_SINGLE_FLIGHT", "true").lower() == "true",
+            few_shot_k=int(os.getenv("AGENT_FEW_SHOT_K", "3")),
+            example_store_path=os.getenv("EXAMPLE_STORE_PATH") or None,
+            example_store_max_entries=int(os.getenv("EXAMPLE_STORE_MAX_ENTRIES", "100000")),
+            templates=os.getenv("AGENT_TEMPLATES", "true").lower() == "true",
+            overlap_warm_up=os.getenv("AGENT_OVERLAP_WARM_UP", "true").lower() == "true",
+            prewarm=os.getenv("AGENT_PREWARM", "true").lower() == "true"
+        )
+        
+        self.cache = CacheConfig(
+            sql_cache_enabled=os.getenv("SQL_CACHE_ENABLED", "true").lower() == "true",
+            sql_cache_path=os.getenv("SQL_CACHE_PATH") or None,
+            sql_cache_max_entries=int(os.getenv("SQL_CACHE_MAX_ENTRIES", "10000")),
+            sql_cache_ttl=int(os.getenv("SQL_CACHE_TTL", "86400")),
+            result_cache_enabled=os.getenv("RESULT_CACHE_ENABLED", "false").lower() == "true",
+            result_cache_max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            schema_snapshot_dir=os.getenv("SCHEMA_SNAPSHOT_DIR") or None
+        )
+        
+        self.metrics = MetricsConfig(
+            enabled=os.getenv("METRICS_ENABLED", "true").lower() == "true",
+            port=int(os.getenv("METRICS_PORT", "0")),
+            host=os.getenv("METRICS_HOST", "127.0.0.1"),
+            file=os.getenv("METRICS_FILE") or None
+        )
+        
+        self.server = ServerConfig(
+            host=os.getenv("SERVER_HOST", "127.0.0.1"),
+            port=int(os.getenv("SERVER_PORT", "8000")),
+            concurrency=int(os.getenv("SERVER_CONCURRENCY", os.getenv("AGENT_MAX_CONCURRENCY", "8"))),
+            queue_size=int(os.getenv("SERVER_QUEUE_SIZE", "64")),
+            request_timeout=float(os.getenv("SERVER_REQUEST_TIMEOUT", "30")),
+            max_body_bytes=int(os.getenv("SERVER_MAX_BODY_BYTES", str(64 * 1024)))
         )
     
     def validate(self) -> bool:
@@ -73,6 +197,15 @@ class Config:
         if not self.database.url:
             return False
         
+        if self.database.pool_size < 1 or self.database.max_overflow < 0:
+            return False
+        
+        if self.database.executemany_page_size < 1 or self.database.fetch_size < 1:
+            return False
+        
+        if self.database.registry_size < 1:
+            return False
+        
         # Temperature must be between 0 and 2 (OpenAI API requirement)
         # 0 = deterministic, 1 = balanced, 2 = maximum creativity
         if self.llm.temperature < 0 or self.llm.temperature > 2:
@@ -81,6 +214,33 @@ class Config:
         if self.agent.max_retries < 0:
             return False
         
+        if self.agent.max_concurrency < 1:
+            return False
+        
+        if self.agent.max_rows < 0:
+            return False
+        
+        if self.agent.schema_top_k < 0:
+            return False
+        
+        if not 0 <= self.agent.workload_sample_rate <= 1:
+            return False
+        
+        if self.agent.few_shot_k < 0 or self.agent.example_store_max_entries < 1:
+            return False
+        
+        if not 0 <= self.metrics.port <= 65535:
+            return False
+        
+        if not 0 < self.server.port <= 65535:
+            return False
+        
+        if self.server.concurrency < 1 or self.server.queue_size < 0:
+            return False
+        
+        if self.server.request_timeout <= 0:
+            return False
+        
         return True
 
 
@@ -25,15 +25,24 @@ DANGEROUS_OPERATIONS = [
 SYSTEM_PROMPT_SQL_GENERATION = """You are a SQL expert. Given a database schema and a user question, 
 generate a valid SQL query to answer the question.
 
-Database Schema:
-{schema}
-
 Rules:
 1. Generate ONLY the SQL query, no explanations
 2. Use proper SQL syntax
 3. Make sure the query is safe (no DROP, DELETE, or UPDATE unless explicitly requested)
 4. Return only SELECT queries unless the user explicitly requests modifications
-"""
+{examples}
+Database Schema:
+{schema}"""
+
+# Few-shot examples placed before the schema: the schema sent to the LLM is
+# pruned per question, so only the text ahead of it is a shared cached prefix
+FEW_SHOT_HEADER = "\nExamples:\n"
+FEW_SHOT_EXAMPLE = "Question: {question}\nSQL: {sql}\n"
+
+# Verified examples retrieved per question; they go in the human message so
+# the cached system prefix stays the same for every question
+SIMILAR_EXAMPLES_HEADER = "Similar questions answered before:\n"
+SIMILAR_EXAMPLES_QUESTION = "\nQuestion: {question}"
 
 # Output Formatting
 OUTPUT_SEPARATOR = "=" * 80
@@ -46,6 +55,7 @@ MSG_EXECUTING_SQL = "🔄 Executing SQL query..."
 MSG_FORMATTING_OUTPUT = "📋 Formatting output..."
 MSG_QUERY_SUCCESS = "✅ Query executed successfully. Found {count} rows."
 MSG_QUERY_NO_RESULTS = "✅ Query executed successfully. No results returned."
+MSG_RESULTS_TRUNCATED = "⚠️ 仅显示前 {count} 行 / Showing the first {count} rows; more are available."
 MSG_ERROR_PREFIX = "❌ "
 
 # CLI Messages
@@ -57,6 +67,7 @@ CLI_EXIT_COMMANDS = ['quit', 'exit', '退出']
 # Error Messages
 ERR_GENERATING_SQL = "Error generating SQL: {error}"
 ERR_EXECUTING_SQL = "Error executing SQL: {error}"
+ERR_QUERY_TIMEOUT = "Query exceeded the {timeout}s time limit and was cancelled"
 ERR_INVALID_CONFIG = "Invalid configuration: {error}"
 ERR_DATABASE_CONNECTION = "Database connection error: {error}"
 
@@ -31,6 +31,16 @@ class SQLExecutionError(TextToSQLError):
     pass
 
 
+class QueryTimeoutError(SQLExecutionError):
+    """Raised when a query exceeds its time limit and is cancelled."""
+    pass
+
+
+class InvalidPageTokenError(TextToSQLError):
+    """Raised when a pagination token is malformed or belongs to another query."""
+    pass
+
+
 class UnsafeQueryError(TextToSQLError):
     """Raised when attempting to execute an unsafe SQL query."""
     pass
@@ -4,9 +4,9 @@ Output formatting utilities for the Text-to-SQL agent.
 This module provides utilities for formatting query results
 and other outputs in a user-friendly way.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Any, Optional, Iterable, Iterator, Sequence, Tuple
 
-from .constants import OUTPUT_TAB
+from .constants import OUTPUT_TAB, MSG_RESULTS_TRUNCATED
 
 
 class OutputFormatter:
@@ -14,43 +14,104 @@ class OutputFormatter:
     
     @staticmethod
     def format_table(
-        results: List[Dict[str, Any]],
+        results: Sequence[Any],
         max_col_width: int = 50
     ) -> str:
         """
         Format query results as a table.
         
         Args:
-            results: List of dictionaries representing rows
+            results: ``QueryResult`` or list of dictionaries representing rows
             max_col_width: Maximum width for column values
-            
+        
         Returns:
             Formatted table string
         """
         if not results:
             return "No results returned."
         
-        # Get column names from first row
-        columns = list(results[0].keys())
+        columns, rows = OutputFormatter._columns_and_rows(results)
         
         # Build table
         lines = [OUTPUT_TAB.join(columns)]
-        
-        for row in results:
-            formatted_values = [
-                OutputFormatter._format_value(row.get(col), max_col_width)
-                for col in columns
-            ]
-            lines.append(OUTPUT_TAB.join(formatted_values))
+        lines.extend(OutputFormatter._format_rows(rows, max_col_width))
         
         return "\n".join(lines)
     
+    @staticmethod
+    def iter_table(
+        batches: Iterable[Sequence[Any]],
+        max_col_width: int = 50
+    ) -> Iterator[str]:
+        """
+        Format batches of rows as a table, one chunk per batch.
+        
+        Only one batch is held in memory at a time, so arbitrarily large
+        results can be written out as they arrive. A batch marked
+        ``truncated`` ends the table with the row-cap notice.
+        
+        Args:
+            batches: Iterable of row batches (``QueryResult`` or lists of dictionaries)
+            max_col_width: Maximum width for column values
+        
+        Yields:
+            Table text chunks, each ending with a newline
+        """
+        columns = None
+        row_count = 0
+        truncated = False
+        
+        for batch in batches:
+            truncated = truncated or getattr(batch, "truncated", False)
+            row_count += len(batch)
+            if not batch:
+                continue
+            
+            lines = []
+            batch_columns, rows = OutputFormatter._columns_and_rows(batch)
+            if columns is None:
+                columns = batch_columns
+                lines.append(OUTPUT_TAB.join(columns))
+            
+            lines.extend(OutputFormatter._format_rows(rows, max_col_width))
+            yield "\n".join(lines) + "\n"
+        
+        if columns is None:
+            yield "No results returned.\n"
+        if truncated:
+            yield MSG_RESULTS_TRUNCATED.format(count=row_count) + "\n"
+    
+    @staticmethod
+    def _columns_and_rows(results: Sequence[Any]) -> Tuple[List[str], Iterable[Sequence[Any]]]:
+        """
+        Split results into column names and rows of values in column order.
+        
+        ``QueryResult`` rows are already value tuples; dictionaries are
+        looked up by the first row's keys.
+        """
+        if hasattr(results, "columns") and hasattr(results, "rows"):
+            return list(results.columns), results.rows
+        
+        columns = list(results[0].keys())
+        return columns, ([row.get(col) for col in columns] for row in results)
+    
+    @staticmethod
+    def _format_rows(
+        rows: Iterable[Sequence[Any]],
+        max_col_width: int
+    ) -> Iterator[str]:
+        """Format each row as a tab-separated line."""
+        format_value = OutputFormatter._format_value
+        for values in rows:
+            yield OUTPUT_TAB.join([format_value(value, max_col_width) for value in values])
+    
     @staticmethod
     def format_query_output(
         user_input: str,
         sql_query: str,
-        results: List[Dict[str, Any]],
-        error: Optional[str] = None
+        results: Sequence[Any],
+        error: Optional[str] = None,
+        truncated: bool = False
     ) -> str:
         """
         Format the complete query output.
@@ -60,7 +121,8 @@ class OutputFormatter:
             sql_query: Generated SQL query
             results: Query results
             error: Error message if any
-            
+            truncated: Whether the results stopped at the row cap
+        
         Returns:
             Formatted output string
         """
@@ -69,8 +131,10 @@ class OutputFormatter:
 错误 / Error:
 {error}
 """
-        
+
         table_output = OutputFormatter.format_table(results)
+        if truncated:
+            table_output += "\n" + MSG_RESULTS_TRUNCATED.format(count=len(results))
         
         return f"""
 用户问题 / User Question:
@@ -82,6 +146,40 @@ class OutputFormatter:
 查询结果 / Query Results:
 {table_output}
 """
+
+    @staticmethod
+    def iter_query_output(
+        user_input: str,
+        sql_query: str,
+        batches: Iterable[Sequence[Any]],
+        error: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Streaming variant of :meth:`format_query_output`.
+        
+        Args:
+            user_input: Original user question
+            sql_query: Generated SQL query
+            batches: Iterable of row batches
+            error: Error message if any
+        
+        Yields:
+            Output text chunks
+        """
+        if error:
+            yield OutputFormatter.format_query_output(user_input, sql_query, [], error)
+            return
+        
+        yield f"""
+用户问题 / User Question:
+{user_input}
+
+生成的SQL / Generated SQL:
+{sql_query}
+
+查询结果 / Query Results:
+"""
+        yield from OutputFormatter.iter_table(batches)
     
     @staticmethod
     def _format_value(value: Any, max_width: int) -> str:
@@ -91,7 +189,7 @@ class OutputFormatter:
         Args:
             value: Value to format
             max_width: Maximum width for the value
-            
+        
         Returns:
             Formatted string value
         """
@@ -115,7 +213,7 @@ class OutputFormatter:
         Args:
             error: Error message
             context: Optional context information
-            
+        
         Returns:
             Formatted error message
         """
@@ -131,7 +229,7 @@ class OutputFormatter:
         Args:
             message: Success message
             count: Optional count of results
-            
+        
         Returns:
             Formatted success message
         """
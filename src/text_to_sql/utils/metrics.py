@@ -0,0 +1,412 @@
+"""
+In-process metrics with a Prometheus text exposition.
+
+Counters and histograms live in a :class:`MetricsRegistry` and are updated
+in place (a lock per metric, no allocation per observation), so recording is
+cheap enough for every query. The registry renders the Prometheus text format
+(version 0.0.4), which can be scraped from ``METRICS_PORT`` or written to
+``METRICS_FILE`` for node_exporter's textfile collector.
+
+The agent records:
+
+* ``text_to_sql_node_seconds{node}``: wall time of each graph node
+* ``text_to_sql_node_errors_total{node}``: nodes that ended with an error
+* ``text_to_sql_schema_seconds``: schema fetch (reflection or cache) time
+* ``text_to_sql_llm_seconds{model}``: LLM round trips
+* ``text_to_sql_llm_tokens_total{model,kind}``: prompt and completion tokens
+* ``text_to_sql_rows_returned``: rows per query
+* ``text_to_sql_formatted_bytes``: size of the formatted output
+* ``text_to_sql_cache_requests_total{cache,result}``: SQL and result cache hits and misses
+"""
+import atexit
+import bisect
+import math
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .config import config
+from .logger import logger
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans cached lookups (sub-millisecond) to slow LLM calls
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """Labelled series of one metric."""
+    
+    kind = ""
+    
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._registry = registry
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def render(self) -> List[str]:
+        """Exposition lines for this metric."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    
+    kind = "counter"
+    
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increase the counter.
+        
+        Args:
+            amount: Non-negative increment
+            **labels: Value for each of the metric's label names
+        """
+        if not self._registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels: str) -> float:
+        """Current value of one series (0 if never incremented)."""
+        return self._values.get(self._key(labels), 0)
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """Distribution of observations in fixed buckets."""
+    
+    kind = "histogram"
+    
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: [count per bucket (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record one observation.
+        
+        Args:
+            value: Observed value
+            **labels: Value for each of the metric's label names
+        """
+        if not self._registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def count(self, **labels: str) -> int:
+        """Number of observations in one series."""
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+    
+    def sum(self, **labels: str) -> float:
+        """Sum of the observations in one series."""
+        series = self._series.get(self._key(labels))
+        return series[1] if series else 0.0
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        
+        lines = []
+        names = self.labelnames + ("le",)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """Named counters and histograms of one process."""
+    
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize the registry.
+        
+        Args:
+            enabled: When False, updates are dropped (rendering still works)
+        """
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        """
+        Get or create a counter.
+        
+        Args:
+            name: Metric name (``_total`` suffix by convention)
+            help_text: One-line description
+            labelnames: Label names of the metric's series
+        
+        Returns:
+            The counter
+        """
+        return self._register(Counter, name, help_text, labelnames)
+    
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        """
+        Get or create a histogram.
+        
+        Args:
+            name: Metric name
+            help_text: One-line description
+            labelnames: Label names of the metric's series
+            buckets: Upper bounds of the buckets (``+Inf`` is implicit)
+        
+        Returns:
+            The histogram
+        """
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+    
+    def _register(self, cls, name: str, help_text: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered differently")
+            return metric
+    
+    def get(self, name: str) -> Optional[_Metric]:
+        """Metric registered under ``name``, if any."""
+        return self._metrics.get(name)
+    
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format.
+        
+        Returns:
+            Exposition text
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+    
+    def write_textfile(self, path: str) -> None:
+        """
+        Write the exposition to a file atomically.
+        
+        The file is replaced in one rename, so a collector never reads a
+        partial file.
+        
+        Args:
+            path: Target file (e.g. ``*.prom`` in the textfile collector directory)
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    
+    def reset(self) -> None:
+        """Drop every recorded value (metrics stay registered)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+def start_metrics_server(
+    registry: MetricsRegistry,
+    port: int,
+    host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """
+    Serve ``GET /metrics`` from a daemon thread.
+    
+    Args:
+        registry: Registry to expose
+        port: TCP port (0 picks a free one)
+        host: Interface to bind
+    
+    Returns:
+        The running server; call ``shutdown()`` to stop it
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            logger.debug("metrics: " + format % args)
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def start_metrics_exporter() -> Optional[ThreadingHTTPServer]:
+    """
+    Start the exporters configured by ``METRICS_PORT`` and ``METRICS_FILE``.
+    
+    Safe to call more than once; only the first call starts anything. The
+    metrics file is written when the process exits.
+    
+    Returns:
+        The metrics HTTP server, or None when no port is configured
+    """
+    global _exporter_started
+    
+    with _exporter_lock:
+        if _exporter_started or not metrics.enabled:
+            return None
+        _exporter_started = True
+    
+    settings = config.metrics
+    if settings.file:
+        atexit.register(metrics.write_textfile, settings.file)
+    if settings.port:
+        return start_metrics_server(metrics, settings.port, settings.host)
+    return None
+
+
+# Global metrics registry
+metrics = MetricsRegistry(enabled=config.metrics.enabled)
+
+NODE_SECONDS = metrics.histogram(
+    "text_to_sql_node_seconds", "Wall time of each agent graph node.", ["node"]
+)
+NODE_ERRORS = metrics.counter(
+    "text_to_sql_node_errors_total", "Agent graph nodes that ended with an error.", ["node"]
+)
+SCHEMA_SECONDS = metrics.histogram(
+    "text_to_sql_schema_seconds", "Time to fetch the database schema for a question."
+)
+LLM_SECONDS = metrics.histogram(
+    "text_to_sql_llm_seconds", "Wall time of LLM SQL generation calls.", ["model"]
+)
+LLM_TOKENS = metrics.counter(
+    "text_to_sql_llm_tokens_total", "LLM tokens used, by kind (prompt or completion).",
+    ["model", "kind"]
+)
+ROWS_RETURNED = metrics.histogram(
+    "text_to_sql_rows_returned", "Rows returned per query.", buckets=ROW_BUCKETS
+)
+FORMATTED_BYTES = metrics.histogram(
+    "text_to_sql_formatted_bytes", "Size of the formatted output per query.", buckets=BYTE_BUCKETS
+)
+CACHE_REQUESTS = metrics.counter(
+    "text_to_sql_cache_requests_total", "Cache lookups, by cache and result (hit or miss).",
+    ["cache", "result"]
+)
+COALESCED_CALLS = metrics.counter(
+    "text_to_sql_coalesced_calls_total",
+    "Calls that waited for an identical call in progress instead of repeating it.", ["call"]
+)
+HTTP_REQUESTS = metrics.counter(
+    "text_to_sql_http_requests_total", "HTTP requests served, by path and status code.",
+    ["path", "status"]
+)
+HTTP_QUEUE_SECONDS = metrics.histogram(
+    "text_to_sql_http_queue_seconds", "Time questions waited for a free server worker."
+)
+OVERLAP_SAVED_SECONDS = metrics.histogram(
+    "text_to_sql_overlap_saved_seconds",
+    "Connection warm-up time hidden behind SQL generation instead of added to the query."
+)
+EXAMPLE_LOOKUP_SECONDS = metrics.histogram(
+    "text_to_sql_example_lookup_seconds", "Time spent finding similar few-shot examples."
+)
+TEMPLATE_REQUESTS = metrics.counter(
+    "text_to_sql_template_requests_total",
+    "Questions checked against the SQL templates, by the template that answered ('none' if none did).",
+    ["template"]
+)
@@ -0,0 +1,47 @@
+"""
+Text normalization helpers.
+
+Used to decide when two questions or schemas are "the same" for batching
+and caching purposes. SQL statements are fingerprinted by
+``database.safety.sql_fingerprint``, which knows SQL's quoting rules.
+"""
+import hashlib
+import re
+import unicodedata
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Trailing punctuation that does not change a question's meaning
+_TRAILING_PUNCTUATION = " ?.!;。？！；"
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a natural language question.
+    
+    Applies Unicode NFKC folding (full-width to half-width), case folding,
+    whitespace collapsing and strips trailing punctuation.
+    
+    Args:
+        question: Raw user question
+    
+    Returns:
+        Normalized question text
+    """
+    normalized = unicodedata.normalize("NFKC", question).casefold()
+    normalized = _WHITESPACE_RE.sub(" ", normalized).strip()
+    return normalized.rstrip(_TRAILING_PUNCTUATION)
+
+
+def schema_fingerprint(schema: str) -> str:
+    """
+    Compute a short, stable fingerprint of a schema description.
+    
+    Args:
+        schema: Schema text as returned by ``DatabaseManager.get_schema``
+    
+    Returns:
+        Hex digest identifying the schema
+    """
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
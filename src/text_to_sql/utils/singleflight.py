@@ -0,0 +1,122 @@
+"""
+Single-flight call coalescing.
+
+When many callers ask for the same thing at the same moment (a dashboard
+loading, a retry storm), only the first one does the work; the others wait
+for its result instead of repeating the LLM call or database query. Nothing
+is kept once the call finishes - that is what the caches are for - so a
+caller arriving afterwards starts a new call.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .metrics import COALESCED_CALLS
+
+
+class _Call:
+    """A call in progress, waited on by threads."""
+    
+    __slots__ = ("done", "result", "error")
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key."""
+    
+    def __init__(self, name: str):
+        """
+        Initialize the group.
+        
+        Args:
+            name: Label of the coalesced-calls counter (e.g. ``generate_sql``)
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+    
+    def do(self, key: Hashable, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Call ``func(*args)``, or wait for the identical call in progress.
+        
+        Args:
+            key: Identity of the call
+            func: Function doing the work
+            *args: Arguments for ``func``
+        
+        Returns:
+            The result of the (shared) call
+        
+        Raises:
+            Whatever the shared call raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        
+        if not leader:
+            COALESCED_CALLS.inc(call=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = func(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    async def ado(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """
+        Await ``func(*args)``, or the identical call in progress on this loop.
+        
+        The call runs as its own task, so a caller that is cancelled (e.g.
+        by a request deadline) does not cancel it for the others.
+        
+        Args:
+            key: Identity of the call
+            func: Coroutine function doing the work
+            *args: Arguments for ``func``
+        
+        Returns:
+            The result of the (shared) call
+        
+        Raises:
+            Whatever the shared call raised
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = self._tasks[task_key] = loop.create_task(func(*args))
+                task.add_done_callback(lambda done: self._forget(task_key, done))
+            else:
+                COALESCED_CALLS.inc(call=self.name)
+        return await asyncio.shield(task)
+    
+    def _forget(self, task_key: Tuple[int, Hashable], task: asyncio.Task) -> None:
+        with self._lock:
+            if self._tasks.get(task_key) is task:
+                del self._tasks[task_key]
+        if not task.cancelled():
+            # Mark the error retrieved even if every waiter was cancelled
+            task.exception()
+    
+    def __len__(self) -> int:
+        """Calls in progress."""
+        with self._lock:
+            return len(self._calls) + len(self._tasks)
@@ -0,0 +1,94 @@
+"""Shared fixtures: throwaway SQLite databases and a scripted SQL generator."""
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from text_to_sql.database import DatabaseManager
+
+USERS_SQL = (
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)",
+    "INSERT INTO users (name) VALUES ('alice'), ('bob')",
+)
+
+
+class StubSQLGenerator:
+    """SQL generator that records its calls and answers from a script."""
+    
+    def __init__(self, sql="SELECT name FROM users ORDER BY id", script=None, delay=0.0):
+        """
+        Args:
+            sql: Answer for questions not in ``script``
+            script: Question -> SQL answers
+            delay: Seconds every call takes, to simulate LLM latency
+        """
+        self.sql = sql
+        self.script = dict(script or {})
+        self.delay = delay
+        self.questions = []
+        self.examples = []
+        self._lock = threading.Lock()
+    
+    @property
+    def calls(self):
+        return len(self.questions)
+    
+    def _answer(self, question, examples):
+        with self._lock:
+            self.questions.append(question)
+            self.examples.append(list(examples))
+        return self.script.get(question, self.sql)
+    
+    def generate(self, question, schema, examples=()):
+        sql_query = self._answer(question, examples)
+        if self.delay:
+            time.sleep(self.delay)
+        return sql_query
+    
+    async def agenerate(self, question, schema, examples=()):
+        sql_query = self._answer(question, examples)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return sql_query
+
+
+@pytest.fixture
+def make_sqlite_url(tmp_path):
+    """
+    Factory creating ``<name>.db`` in ``tmp_path``.
+    
+    Call it as ``make_sqlite_url(name, *statements)``; without statements the
+    file gets a ``users`` table holding alice and bob. Returns the URL.
+    """
+    def make(name="test", *statements):
+        url = f"sqlite:///{tmp_path / f'{name}.db'}"
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            for statement in statements or USERS_SQL:
+                conn.execute(text(statement))
+        engine.dispose()
+        return url
+    
+    return make
+
+
+@pytest.fixture
+def sqlite_url(make_sqlite_url):
+    """URL of a SQLite file with a ``users`` table holding alice and bob."""
+    return make_sqlite_url()
+
+
+@pytest.fixture
+def database(sqlite_url):
+    """``DatabaseManager`` for :func:`sqlite_url`, closed after the test."""
+    manager = DatabaseManager(sqlite_url)
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def generator():
+    """Fresh :class:`StubSQLGenerator` answering ``SELECT name FROM users ORDER BY id``."""
+    return StubSQLGenerator()
@@ -0,0 +1,117 @@
+"""Tests for the caching layers."""
+from sqlalchemy import create_engine, text
+
+from text_to_sql.cache import (
+    MemorySQLCache,
+    SQLiteSQLCache,
+    ResultCache,
+    estimate_size,
+    sql_cache_key,
+)
+from text_to_sql.core.runtime import TextToSQLRuntime
+from text_to_sql.database import DatabaseManager, QueryResult
+
+from .conftest import USERS_SQL
+
+
+WIDE_SCHEMA_SQL = tuple(
+    f"CREATE TABLE table_{i} (id INTEGER PRIMARY KEY, label_{i} TEXT)" for i in range(20)
+) + USERS_SQL + ("CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER, total REAL)",)
+
+
+def test_sql_cache_hits_with_pruned_schemas(make_sqlite_url, generator):
+    """Questions pruned to different tables still hit; failed SQL is never stored."""
+    database = DatabaseManager(make_sqlite_url("wide", *WIDE_SCHEMA_SQL))
+    generator.script["Show the total of all orders"] = "SELECT total FROM orders"
+    generator.script["broken question"] = "SELECT * FROM missing_table"
+    cache = MemorySQLCache(max_entries=10)
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator, sql_cache=cache)
+    
+    questions = ["Show the names of all users", "Show the total of all orders"] * 2
+    states = [runtime.invoke(question) for question in questions]
+    states.append(runtime.invoke("show the names of ALL users?"))
+    
+    assert states[0]["schema_tokens_saved"] > 0
+    assert generator.questions == questions[:2]
+    assert [state["sql_cached"] for state in states] == [False, False, True, True, True]
+    assert cache.stats.hits == 3 and cache.stats.invalidations == 0
+    
+    assert runtime.invoke("broken question")["error"]
+    assert runtime.invoke("broken question")["error"]
+    assert generator.questions.count("broken question") == 2
+    assert len(cache) == 2
+    
+    # Another database with the same schema has its own entries
+    assert sql_cache_key("q", "schema", "sales") != sql_cache_key("q", "schema")
+    database.close()
+
+
+def test_sql_cache_lru_and_ttl():
+    """Least recently used entries are evicted and expired ones are misses."""
+    cache = MemorySQLCache(max_entries=2, ttl=None)
+    cache.put("a", "fp", "SELECT 'a'")
+    cache.put("b", "fp", "SELECT 'b'")
+    cache.get("a", "fp")
+    cache.put("c", "fp", "SELECT 'c'")
+    
+    assert cache.get("b", "fp") is None
+    assert cache.get("a", "fp") == "SELECT 'a'"
+    assert cache.stats.evictions == 1
+    
+    expiring = MemorySQLCache(ttl=-1)
+    expiring.put("a", "fp", "SELECT 1")
+    assert expiring.get("a", "fp") is None and expiring.stats.expirations == 1
+
+
+def test_sqlite_sql_cache_survives_restart(tmp_path):
+    """Entries persist on disk and LRU eviction respects the size limit."""
+    path = str(tmp_path / "sql_cache.db")
+    cache = SQLiteSQLCache(path, max_entries=2)
+    cache.put("a", "fp", "SELECT 'a'")
+    cache.put("b", "fp", "SELECT 'b'")
+    cache.put("b", "fp", "SELECT 'b2'")
+    assert len(cache) == 2
+    cache.close()
+    
+    reopened = SQLiteSQLCache(path, max_entries=2)
+    assert reopened.get("b", "fp") == "SELECT 'b2'"
+    reopened.put("c", "fp", "SELECT 'c'")
+    assert len(reopened) == 2
+    assert reopened.get("a", "fp") is None
+    assert reopened.invalidate("fp") == 2
+    reopened.close()
+
+
+def test_result_cache_invalidated_by_data_version(sqlite_url):
+    """Repeated reads hit the cache until another connection commits a change."""
+    engine = create_engine(sqlite_url)
+    database = DatabaseManager(sqlite_url, result_cache=ResultCache(max_bytes=1024 * 1024))
+    query = "SELECT id FROM users ORDER BY id"
+    
+    assert len(database.execute_query(query)) == 2
+    assert len(database.execute_query("SELECT  id FROM users\nORDER BY id;")) == 2
+    assert database.result_cache.stats.hits == 1
+    
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (name) VALUES ('carol')"))
+    
+    assert len(database.execute_query(query)) == 3
+    assert database.result_cache.stats.invalidations == 1
+    
+    database.close()
+    engine.dispose()
+
+
+def test_result_cache_byte_budget():
+    """Entries are evicted least recently used first once over budget."""
+    rows = QueryResult.from_dicts([{"id": i, "name": "x" * 100} for i in range(10)])
+    cache = ResultCache(max_bytes=estimate_size(rows) * 2)
+    cache.put("a", 1, rows)
+    cache.put("b", 1, rows)
+    cache.get("a", 1)
+    cache.put("c", 1, rows)
+    
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == rows
+    assert cache.current_bytes <= cache.max_bytes
+    assert cache.put("huge", 1, QueryResult(rows.columns, rows.rows * 10)) is False
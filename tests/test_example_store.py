@@ -0,0 +1,68 @@
+"""Tests for the few-shot example store and its use in prompts."""
+import asyncio
+
+from text_to_sql.cache import ExampleStore
+from text_to_sql.core.runtime import TextToSQLRuntime
+from text_to_sql.core.sql_generator import LLMSQLGenerator, format_question
+
+
+def test_search_ranks_similar_questions_per_database():
+    store = ExampleStore()
+    store.add("How many users signed up last month?", "SELECT COUNT(*) FROM users WHERE ...")
+    store.add("How many orders were placed last month?", "SELECT COUNT(*) FROM orders WHERE ...")
+    store.add("List the ten most expensive products", "SELECT * FROM products ORDER BY price DESC LIMIT 10")
+    store.add("How many users signed up last month?", "SELECT 1", database_name="tenant-b")
+    
+    results = store.search("how many users signed up last week", k=2)
+    assert results[0] == ("How many users signed up last month?", "SELECT COUNT(*) FROM users WHERE ...")
+    assert all(sql != "SELECT 1" for _, sql in results)
+    assert store.search("how many users signed up last week", database_name="tenant-b") == [
+        ("How many users signed up last month?", "SELECT 1")
+    ]
+    assert store.search("completely unrelated zebra facts") == []
+    assert store.search("How many users signed up last month?", k=0) == []
+    
+    store.add("how many users signed up last month", "SELECT 2")
+    assert len(store) == 4  # same question after normalization replaces the SQL
+    assert store.search("How many users signed up last month?", k=1)[0][1] == "SELECT 2"
+
+
+def test_store_persists_and_evicts_oldest(tmp_path):
+    path = str(tmp_path / "examples.db")
+    store = ExampleStore(path, max_entries=2)
+    store.add("Show all customers in Berlin", "SELECT * FROM customers WHERE city = 'Berlin'")
+    store.add("Show all customers in Paris", "SELECT * FROM customers WHERE city = 'Paris'")
+    store.add("Show all customers in Rome", "SELECT * FROM customers WHERE city = 'Rome'")
+    store.close()
+    
+    reopened = ExampleStore(path, max_entries=2)
+    assert len(reopened) == 2
+    found = [sql for _, sql in reopened.search("show all customers in berlin", k=5)]
+    assert found and not any("Berlin" in sql for sql in found)
+    reopened.close()
+
+
+def test_runtime_learns_answered_questions_and_reuses_them(database, generator):
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator, example_store=ExampleStore())
+    
+    runtime.invoke("Show the names of all users")
+    asyncio.run(runtime.ainvoke("Show the names of every user"))
+    
+    assert generator.examples[0] == []
+    assert generator.examples[1] == [("Show the names of all users", "SELECT name FROM users ORDER BY id")]
+    assert len(runtime.example_store) == 2
+
+
+def test_retrieved_examples_go_after_the_static_prefix():
+    generator = LLMSQLGenerator(model_name="fake-model", api_key="fake-key", examples=[])
+    examples = [("How many users?", "SELECT COUNT(*) FROM users")]
+    
+    messages = generator.prompt.format_messages(
+        schema="Table: users", examples=generator._examples_text,
+        question=format_question("How many orders?", examples)
+    )
+    assert "How many users?" not in messages[0].content
+    assert messages[-1].content.index("SELECT COUNT(*) FROM users") < messages[-1].content.index(
+        "How many orders?"
+    )
+    assert format_question("How many orders?") == "How many orders?"
@@ -0,0 +1,52 @@
+"""Tests for the offline LLM stand-ins used by the load test."""
+import asyncio
+import random
+
+import pytest
+
+from text_to_sql.core.sql_generator import LLMSQLGenerator
+from text_to_sql.testing import FakeOpenAIServer, FakeSQLGenerator, LatencyModel, ScriptedResponses
+from text_to_sql.utils.exceptions import SQLGenerationError
+from text_to_sql.utils.metrics import LLM_TOKENS
+
+
+def test_latency_model_parsing():
+    assert LatencyModel.parse("0.2") == LatencyModel("fixed", (0.2,))
+    assert LatencyModel.parse("uniform:0.1,0.5") == LatencyModel("uniform", (0.1, 0.5))
+    
+    rng = random.Random(1)
+    delays = [LatencyModel.parse("lognormal:0.1,0.5").sample(rng) for _ in range(200)]
+    assert all(delay > 0 for delay in delays)
+    assert 0.05 < sorted(delays)[100] < 0.2
+    
+    for spec in ("gamma:1", "uniform:0.1", "fixed:-1"):
+        with pytest.raises(ValueError):
+            LatencyModel.parse(spec)
+
+
+def test_fake_generator_follows_script():
+    """Questions are matched after normalization; unknown ones get the default."""
+    script = ScriptedResponses({"Show all users": "SELECT * FROM users"}, default="SELECT 1")
+    generator = FakeSQLGenerator(script)
+    
+    assert generator.generate("  show ALL users? ", "") == "SELECT * FROM users"
+    assert asyncio.run(generator.agenerate("something else", "")) == "SELECT 1"
+    
+    failing = FakeSQLGenerator(script, error_rate=1.0)
+    with pytest.raises(SQLGenerationError):
+        failing.generate("Show all users", "")
+
+
+def test_fake_server_speaks_openai_protocol():
+    """The real LLM generator talks to the fake server and records token usage."""
+    script = ScriptedResponses({"Show all users": "SELECT id FROM users"})
+    
+    with FakeOpenAIServer(script, LatencyModel.parse("0.01")) as server:
+        generator = LLMSQLGenerator(model_name="fake-model", api_key="fake-key",
+                                    base_url=server.base_url)
+        tokens_before = LLM_TOKENS.value(model="fake-model", kind="completion")
+        
+        assert generator.generate("Show all users", "users(id)") == "SELECT id FROM users"
+        assert asyncio.run(generator.agenerate("Show all users", "users(id)")) == "SELECT id FROM users"
+        assert server.requests == 2
+        assert LLM_TOKENS.value(model="fake-model", kind="completion") > tokens_before
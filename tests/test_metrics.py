@@ -0,0 +1,82 @@
+"""Tests for the in-process metrics and their instrumentation."""
+import urllib.request
+
+from text_to_sql.core.runtime import TextToSQLRuntime
+from text_to_sql.core.sql_generator import MockSQLGenerator
+from text_to_sql.utils.metrics import (
+    MetricsRegistry,
+    NODE_SECONDS,
+    ROWS_RETURNED,
+    FORMATTED_BYTES,
+    start_metrics_server,
+)
+
+
+def test_registry_renders_prometheus_text():
+    """Counters and histograms render in the text exposition format."""
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ["route"])
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+    
+    output = registry.render()
+    assert "# TYPE requests_total counter" in output
+    assert 'requests_total{route="/a"} 3' in output
+    assert 'latency_seconds_bucket{le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{le="1"} 2' in output
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in output
+    assert "latency_seconds_count 3" in output
+    assert registry.counter("requests_total", "Requests.", ["route"]) is requests
+
+
+def test_disabled_registry_drops_updates():
+    registry = MetricsRegistry(enabled=False)
+    counter = registry.counter("events_total", "Events.")
+    counter.inc()
+    assert counter.value() == 0
+
+
+def test_textfile_and_http_exposition(tmp_path):
+    """The exposition can be written to a file or scraped over HTTP."""
+    registry = MetricsRegistry()
+    registry.counter("events_total", "Events.").inc()
+    
+    path = tmp_path / "agent.prom"
+    registry.write_textfile(str(path))
+    assert "events_total 1" in path.read_text()
+    
+    server = start_metrics_server(registry, 0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "events_total 1" in response.read().decode()
+    finally:
+        server.shutdown()
+
+
+def test_nodes_record_timings_and_metrics(database):
+    """Each node's time lands in the state and in the global histograms."""
+    runtime = TextToSQLRuntime(database=database, sql_generator=MockSQLGenerator())
+    
+    nodes_before = NODE_SECONDS.count(node="execute_sql")
+    rows_before = ROWS_RETURNED.sum()
+    bytes_before = FORMATTED_BYTES.count()
+    
+    state = runtime.invoke("show users")
+    chunks = list(runtime.stream("show users"))
+    
+    assert set(state["timings"]) == {
+        "schema", "warm_up", "warm_up_wait", "overlap_saved",
+        "generate_sql", "execute_sql", "format_output",
+    }
+    assert all(seconds >= 0 for seconds in state["timings"].values())
+    assert NODE_SECONDS.count(node="execute_sql") == nodes_before + 2
+    assert ROWS_RETURNED.sum() == rows_before + 4
+    assert FORMATTED_BYTES.count() == bytes_before + 2
+    assert "bob" in "".join(chunks)
@@ -0,0 +1,137 @@
+"""Tests for row caps and pagination."""
+import asyncio
+
+import pytest
+
+from text_to_sql.database import QueryResult
+from text_to_sql.database.pagination import (
+    PageQuery,
+    decode_page_token,
+    may_repeat_columns,
+    order_by_keys,
+)
+from text_to_sql.utils.exceptions import InvalidPageTokenError
+
+
+ITEMS_SQL = (
+    "CREATE TABLE items (id INTEGER PRIMARY KEY, grp INTEGER, label TEXT)",
+    "INSERT INTO items (grp, label) VALUES "
+    + ", ".join(f"({i % 3}, 'item {i}')" for i in range(1, 24)),
+    "CREATE TABLE notes (id INTEGER PRIMARY KEY, score INTEGER)",
+    "INSERT INTO notes (score) VALUES "
+    + ", ".join("(NULL)" if i % 4 == 0 else f"({i % 5})" for i in range(1, 20)),
+)
+
+
+@pytest.fixture
+def sqlite_url(make_sqlite_url):
+    return make_sqlite_url("pages", *ITEMS_SQL)
+
+
+def _all_pages(database, sql_query, page_size):
+    rows, tokens, token = [], [], None
+    while True:
+        page = database.fetch_page(sql_query, page_size=page_size, page_token=token)
+        rows.extend(page)
+        if not page.truncated:
+            return rows, tokens
+        token = page.next_token
+        tokens.append(decode_page_token(token, sql_query))
+
+
+def test_order_by_keys():
+    """Only plain, single-direction top-level ORDER BY lists qualify for keyset."""
+    assert order_by_keys("SELECT * FROM t ORDER BY t.a, \"b\"") == (["a", "b"], False)
+    assert order_by_keys("SELECT * FROM t ORDER BY a DESC;") == (["a"], True)
+    assert order_by_keys("SELECT * FROM (SELECT * FROM t ORDER BY a) s") is None
+    assert order_by_keys("SELECT * FROM t ORDER BY a LIMIT 5") is None
+    assert order_by_keys("SELECT * FROM t ORDER BY a ASC, b DESC") is None
+    assert order_by_keys("SELECT * FROM t ORDER BY lower(a)") is None
+
+
+def test_row_cap_marks_truncation(database):
+    """The database stops at the cap and the page says more rows exist."""
+    
+    page = database.fetch_page("SELECT * FROM items;", page_size=5)
+    assert len(page) == 5 and page.truncated and page.next_token
+    assert page.columns == ("id", "grp", "label")
+    assert len(database.execute_query("SELECT * FROM items", max_rows=7)) == 7
+    assert not database.fetch_page("SELECT * FROM items", page_size=100).truncated
+    
+    with pytest.raises(InvalidPageTokenError):
+        database.fetch_page("SELECT id FROM items", page_size=5, page_token=page.next_token)
+
+
+@pytest.mark.parametrize("sql_query, keyset", [
+    ("SELECT id, grp FROM items ORDER BY grp", True),
+    ("SELECT id, grp FROM items ORDER BY grp DESC, id DESC", True),
+    ("SELECT id, grp FROM items", False),
+])
+def test_pages_cover_every_row_once(database, sql_query, keyset):
+    """Keyset (with ties on the key) and OFFSET pages both return each row once."""
+    expected = database.execute_query(sql_query, max_rows=0)
+    
+    rows, tokens = _all_pages(database, sql_query, page_size=4)
+    
+    assert sorted(row["id"] for row in rows) == sorted(row["id"] for row in expected)
+    assert [row["grp"] for row in rows] == [row["grp"] for row in expected]
+    assert all(("k" in token) == keyset for token in tokens)
+    
+    async def first_async_page():
+        page = await database.afetch_page(sql_query, page_size=4)
+        await database.aclose()
+        return page
+    
+    assert list(asyncio.run(first_async_page())) == rows[:4]
+
+
+@pytest.mark.parametrize("sql_query", [
+    "SELECT id, score FROM notes ORDER BY score",
+    "SELECT id, score FROM notes ORDER BY score DESC",
+    "SELECT id, score FROM notes ORDER BY score DESC, id DESC",
+])
+def test_keyset_pages_keep_null_keys(database, sql_query):
+    """Rows whose sort key is NULL are neither lost nor repeated."""
+    expected = database.execute_query(sql_query, max_rows=0)
+    
+    rows, tokens = _all_pages(database, sql_query, page_size=5)
+    
+    assert sorted(row["id"] for row in rows) == list(range(1, 20))
+    assert [row["score"] for row in rows] == [row["score"] for row in expected]
+    assert any("k" in token for token in tokens)
+
+
+@pytest.mark.parametrize("order, nulls_sort_high, keeps_nulls", [
+    ("", False, False),
+    ("", True, True),
+    (" DESC", False, True),
+    (" DESC", True, False),
+])
+def test_keyset_predicate_follows_null_ordering(order, nulls_sort_high, keeps_nulls):
+    """NULL keys are matched only where the dialect sorts them after the position."""
+    sql_query = f"SELECT id FROM t ORDER BY id{order}"
+    token = PageQuery(sql_query, 2).finish(QueryResult(["id"], [(1,), (2,), (3,)])).next_token
+    
+    page = PageQuery(sql_query, 2, token, nulls_sort_high=nulls_sort_high)
+    
+    assert ('"id" IS NULL' in page.sql) == keeps_nulls
+    assert page.params == {"k0": 2}
+
+
+def test_repeated_column_names_keep_the_result_shape(database):
+    """Queries that repeat a column name run unwrapped and are capped while fetching."""
+    sql_query = "SELECT a.id, b.id FROM items AS a JOIN items AS b ON b.id = a.id ORDER BY a.id"
+    
+    rows, tokens = _all_pages(database, sql_query, page_size=5)
+    
+    first = database.fetch_page(sql_query, page_size=5)
+    assert first.columns == ("id", "id") and first.truncated
+    assert first.rows == [(i, i) for i in range(1, 6)]
+    assert len(rows) == 23
+    assert not any("k" in token for token in tokens)
+    
+    assert may_repeat_columns("SELECT * FROM a JOIN b ON a.x = b.x")
+    assert may_repeat_columns("SELECT a.*, b.name FROM a, b")
+    assert may_repeat_columns("SELECT count(*), count(*) FROM a")
+    assert not may_repeat_columns("SELECT * FROM a WHERE x IN (SELECT x FROM b JOIN c)")
+    assert not may_repeat_columns("SELECT a.id, b.id AS other_id, count(*) AS n FROM a, b")
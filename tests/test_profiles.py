@@ -0,0 +1,58 @@
+"""Tests for per-dialect connection profiles."""
+from dataclasses import replace
+
+import pytest
+
+from text_to_sql.database import DatabaseManager
+from text_to_sql.database.profiles import connection_profile
+from text_to_sql.utils.config import config
+from text_to_sql.utils.exceptions import SQLExecutionError
+
+
+def test_sqlite_profile_applies_pragmas(sqlite_url):
+    """File databases get the per-connection pragmas and keep their journal mode."""
+    profile = connection_profile(sqlite_url)
+    assert profile.options["max_overflow"] == 0
+    
+    engine = profile.create_engine()
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == config.database.sqlite_cache_size
+    engine.dispose()
+    
+    # In-memory databases must not get pool sizing arguments
+    assert DatabaseManager("sqlite:///:memory:").execute_query("SELECT 1 AS x") == [{"x": 1}]
+
+
+def test_sqlite_large_cache_is_opt_in(sqlite_url, monkeypatch):
+    """Per-connection memory stays small unless SQLITE_LARGE_CACHE is set."""
+    pragmas = dict(connection_profile(sqlite_url).pragmas)
+    assert pragmas["cache_size"] == -8192
+    assert pragmas["mmap_size"] == 0
+    
+    monkeypatch.setattr(config, "database", replace(config.database, sqlite_large_cache=True))
+    engine = connection_profile(sqlite_url).create_engine()
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -65536
+    engine.dispose()
+
+
+def test_sqlite_wal_is_opt_in(sqlite_url, monkeypatch):
+    """SQLITE_WAL=true switches the file to WAL."""
+    monkeypatch.setattr(config, "database", replace(config.database, sqlite_wal=True))
+    
+    engine = connection_profile(sqlite_url).create_engine()
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+    engine.dispose()
+
+
+def test_sqlite_read_only(sqlite_url, monkeypatch):
+    """Read-only mode opens the file with mode=ro and rejects writes."""
+    monkeypatch.setattr(config, "database", replace(config.database, sqlite_read_only=True))
+    
+    database = DatabaseManager(sqlite_url)
+    assert database.execute_query("SELECT id FROM users") == [{"id": 1}, {"id": 2}]
+    with pytest.raises(SQLExecutionError, match="readonly"):
+        database.execute_query("INSERT INTO users (name) VALUES ('carol')", check_safety=False)
+    database.close()
@@ -0,0 +1,77 @@
+"""Tests for the cache-friendly prompt layout."""
+import json
+
+import pytest
+
+from text_to_sql.core.sql_generator import LLMSQLGenerator, load_examples
+from text_to_sql.database.schema import ColumnInfo, TableInfo, format_schema
+from text_to_sql.testing import FakeOpenAIServer, ScriptedResponses
+from text_to_sql.utils.exceptions import ConfigurationError
+from text_to_sql.utils.metrics import LLM_TOKENS
+
+EXAMPLES = [("How many users?", "SELECT COUNT(*) FROM users")]
+
+
+def _messages(generator, question, schema):
+    return generator.prompt.format_messages(
+        schema=schema, examples=generator._examples_text, question=question
+    )
+
+
+def test_static_prefix_comes_first_and_question_last():
+    generator = LLMSQLGenerator(model_name="fake-model", api_key="fake-key", examples=EXAMPLES)
+    schema = "\nTable: users\n  - id: INTEGER NOT NULL"
+    
+    first = _messages(generator, "Show all users", schema)
+    second = _messages(generator, "Count orders per user", schema)
+    
+    system = first[0].content
+    assert system == second[0].content
+    assert system.index("Rules:") < system.index("How many users?") < system.index("Table: users")
+    assert first[-1].content == "Show all users"
+
+
+def test_static_prefix_survives_schema_pruning():
+    """Rules and examples are identical across questions with different pruned schemas."""
+    generator = LLMSQLGenerator(model_name="fake-model", api_key="fake-key", examples=EXAMPLES)
+    users = _messages(generator, "Show all users", "\nTable: users\n  - id: INTEGER")[0].content
+    orders = _messages(generator, "Count orders", "\nTable: orders\n  - id: INTEGER")[0].content
+    
+    static = users[:users.index("Table: users")]
+    assert "How many users?" in static
+    assert orders.startswith(static)
+
+
+def test_schema_text_is_canonical():
+    users = TableInfo(name="users", columns=[ColumnInfo(name="id", type="INTEGER")])
+    orders = TableInfo(name="orders", columns=[ColumnInfo(name="id", type="INTEGER")])
+    
+    assert format_schema([users, orders]) == format_schema([orders, users])
+
+
+def test_load_examples(tmp_path):
+    mapping = tmp_path / "mapping.json"
+    mapping.write_text(json.dumps(dict(EXAMPLES)), encoding="utf-8")
+    listing = tmp_path / "listing.json"
+    listing.write_text(json.dumps([{"question": q, "sql": s} for q, s in EXAMPLES]), encoding="utf-8")
+    
+    assert load_examples(str(mapping)) == EXAMPLES
+    assert load_examples(str(listing)) == EXAMPLES
+    with pytest.raises(ConfigurationError):
+        load_examples(str(tmp_path / "missing.json"))
+
+
+def test_cached_prompt_tokens_are_counted():
+    """The second question shares the static prefix, which the provider serves from cache."""
+    script = ScriptedResponses({"Show all users": "SELECT id FROM users"})
+    schema = "".join(f"\nTable: t{i}\n  - id: INTEGER NOT NULL" for i in range(100))
+    
+    with FakeOpenAIServer(script) as server:
+        generator = LLMSQLGenerator(model_name="cache-model", api_key="fake-key",
+                                    base_url=server.base_url, examples=EXAMPLES)
+        generator.generate("Show all users", schema)
+        assert LLM_TOKENS.value(model="cache-model", kind="cached_prompt") == 0
+        
+        generator.generate("Count orders per user", schema)
+        cached = LLM_TOKENS.value(model="cache-model", kind="cached_prompt")
+        assert 0 < cached <= LLM_TOKENS.value(model="cache-model", kind="prompt")
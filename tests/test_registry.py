@@ -0,0 +1,166 @@
+"""Tests for the multi-database registry and read-replica routing."""
+import asyncio
+
+import pytest
+
+from text_to_sql.core.agent import create_initial_state, execute_sql
+from text_to_sql.database import DatabaseManager, DatabaseRegistry
+from text_to_sql.utils.exceptions import ConfigurationError
+
+
+@pytest.fixture
+def whoami_url(make_sqlite_url):
+    """Factory: URL of a database whose ``whoami`` table holds its own name."""
+    def make(name):
+        return make_sqlite_url(
+            name, "CREATE TABLE whoami (name TEXT)", f"INSERT INTO whoami VALUES ('{name}')"
+        )
+    return make
+
+
+def _served_by(database):
+    return database.execute_query("SELECT name FROM whoami")[0]["name"]
+
+
+def test_registry_resolves_names_and_tenants(whoami_url):
+    """Databases are found by name or tenant id; unknown names are an error."""
+    registry = DatabaseRegistry()
+    registry.register("default", whoami_url("main"))
+    registry.register("sales", whoami_url("sales"), tenants=["acme"])
+    
+    assert _served_by(registry.get()) == "main"
+    assert _served_by(registry.get("sales")) == "sales"
+    assert registry.get("acme") is registry.get("sales")
+    assert sorted(registry.names) == ["default", "sales"]
+    with pytest.raises(ConfigurationError):
+        registry.get("nope")
+    
+    registry.close()
+
+
+def test_reads_are_balanced_over_replicas(whoami_url):
+    """Reads alternate between replicas; writes always go to the primary."""
+    registry = DatabaseRegistry()
+    database = registry.register(
+        "default",
+        whoami_url("primary"),
+        replicas=[whoami_url("replica1"), whoami_url("replica2")]
+    )
+    
+    served = [_served_by(database) for _ in range(4)]
+    assert sorted(served) == ["replica1", "replica1", "replica2", "replica2"]
+    
+    written = database.execute_query(
+        "INSERT INTO whoami SELECT name FROM whoami RETURNING name", check_safety=False
+    )
+    assert written[0]["name"] == "primary"
+    
+    registry.close()
+
+
+def test_open_stream_keeps_its_replica_busy(whoami_url):
+    """A replica serving a stream counts as busy until the stream is closed."""
+    registry = DatabaseRegistry()
+    database = registry.register(
+        "default",
+        whoami_url("primary"),
+        replicas=[whoami_url("replica1"), whoami_url("replica2")]
+    )
+    
+    stream = database.stream_query("SELECT name FROM whoami")
+    batches = iter(stream)
+    streamed_from = next(batches)[0]["name"]
+    other = ({"replica1", "replica2"} - {streamed_from}).pop()
+    assert [_served_by(database) for _ in range(2)] == [other, other]
+    
+    stream.close()
+    assert _served_by(database) == streamed_from
+    
+    registry.close()
+
+
+def test_unreachable_replica_falls_back_to_primary(whoami_url, tmp_path):
+    """A replica that fails and does not answer a ping is skipped."""
+    registry = DatabaseRegistry(replica_retry_after=60)
+    database = registry.register(
+        "default",
+        whoami_url("primary"),
+        replicas=[f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"]
+    )
+    
+    assert _served_by(database) == "primary"
+    assert database.healthy_replicas() == []
+    assert asyncio.run(database.aexecute_query("SELECT name FROM whoami"))[0]["name"] == "primary"
+    
+    registry.close()
+
+
+def test_manager_lru_is_bounded(whoami_url):
+    """Only ``max_managers`` engines stay open; the least recently used is closed."""
+    closed = []
+    
+    class TrackingManager(DatabaseManager):
+        def close(self):
+            closed.append(self.database_url)
+            super().close()
+    
+    registry = DatabaseRegistry(max_managers=2, manager_factory=TrackingManager)
+    urls = [whoami_url(name) for name in ("a", "b", "c")]
+    
+    first = registry.manager(urls[0])
+    registry.manager(urls[1])
+    assert registry.manager(urls[0]) is first
+    registry.manager(urls[2])
+    
+    assert closed == [urls[1]]
+    assert registry.manager(urls[0]) is first
+    
+    registry.close()
+
+
+def test_lru_keeps_pinned_and_busy_managers(whoami_url):
+    """Eviction skips pinned managers and managers with an open stream."""
+    registry = DatabaseRegistry(max_managers=2)
+    urls = [whoami_url(name) for name in ("pinned", "busy", "idle", "new", "newer")]
+    pinned = DatabaseManager(urls[0])
+    registry.add_manager(pinned, pinned=True)
+    
+    busy = registry.manager(urls[1])
+    stream = busy.stream_query("SELECT name FROM whoami")
+    batches = iter(stream)
+    next(batches)
+    assert busy.in_use
+    
+    idle = registry.manager(urls[2])
+    assert asyncio.run(idle.aexecute_query("SELECT name FROM whoami"))[0]["name"] == "idle"
+    
+    registry.manager(urls[3])
+    # Only the idle manager could go; its async engine was disposed with it
+    assert registry.manager(urls[0]) is pinned
+    assert registry.manager(urls[1]) is busy
+    assert idle._engine is None and idle._async_engine is None
+    
+    stream.close()
+    assert not busy.in_use
+    registry.manager(urls[4])
+    assert busy._engine is None
+    
+    registry.close()
+    assert _served_by(pinned) == "pinned"
+    pinned.close()
+
+
+def test_agent_state_selects_database(whoami_url):
+    """The node executes against the database named in the state."""
+    registry = DatabaseRegistry()
+    registry.register("default", whoami_url("main"))
+    registry.register("sales", whoami_url("sales"), tenants=["acme"])
+    
+    state = create_initial_state("who", database_name="acme")
+    state["sql_query"] = "SELECT name FROM whoami"
+    result = execute_sql(state, registry=registry)
+    
+    assert result["error"] == ""
+    assert result["query_results"][0]["name"] == "sales"
+    
+    registry.close()
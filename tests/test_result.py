@@ -0,0 +1,23 @@
+"""Tests for the compact query result."""
+import pytest
+
+from text_to_sql.database import QueryResult
+from text_to_sql.utils.formatter import OutputFormatter
+
+
+def test_query_result_behaves_like_list_of_dicts():
+    """Rows are read-only mapping views over shared tuples."""
+    dicts = [{"id": 1, "name": "alice"}, {"id": 2, "name": None}]
+    result = QueryResult(["id", "name"], [(1, "alice"), (2, None)])
+    
+    assert result == dicts and result.to_dicts() == dicts
+    assert result[0]["name"] == "alice" and result[1].get("name", "?") is None
+    assert dict(result[1]) == dicts[1] and result[0][1] == "alice"
+    assert result.column("id") == [1, 2]
+    assert QueryResult.from_dicts(dicts) == result
+    assert not hasattr(result[0], "__dict__")
+    with pytest.raises(KeyError):
+        result[0]["missing"]
+    
+    assert OutputFormatter.format_table(result) == OutputFormatter.format_table(dicts)
+    assert OutputFormatter.format_table(QueryResult(["id"])) == "No results returned."
@@ -0,0 +1,144 @@
+"""Tests for the long-lived Text-to-SQL runtime."""
+import asyncio
+import time
+from dataclasses import replace
+
+import pytest
+
+from text_to_sql.core.runtime import TextToSQLRuntime
+from text_to_sql.core.sql_generator import MockSQLGenerator
+from text_to_sql.cache import MemorySQLCache
+from text_to_sql.utils.config import config
+from text_to_sql.utils.constants import MSG_RESULTS_TRUNCATED
+from text_to_sql.utils.exceptions import QueryTimeoutError, SQLExecutionError
+
+
+def test_runtime_reuses_graph_and_generator(database):
+    """The graph is compiled once and the same generator serves every query."""
+    generator = MockSQLGenerator()
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator)
+    
+    first = runtime.invoke("show users")
+    graph = runtime.graph
+    second = runtime.invoke("show users again")
+    
+    assert runtime.graph is graph
+    assert runtime.sql_generator is generator
+    assert first["error"] == "" and second["error"] == ""
+    assert [row["name"] for row in second["query_results"]] == ["alice", "bob"]
+    assert "alice" in runtime.run("show users")
+
+
+def test_runtime_async_pipeline(database):
+    """arun/abatch go through the async nodes and the async engine."""
+    runtime = TextToSQLRuntime(database=database, sql_generator=MockSQLGenerator())
+    
+    async def scenario():
+        state = await runtime.ainvoke("show users")
+        outputs = await runtime.abatch(["show users", "list users"])
+        await database.aclose()
+        return state, outputs
+    
+    state, outputs = asyncio.run(scenario())
+    
+    assert state["error"] == ""
+    assert [row["name"] for row in state["query_results"]] == ["alice", "bob"]
+    assert len(outputs) == 2 and all("bob" in output for output in outputs)
+
+
+def test_run_queries_collapses_duplicates_and_keeps_order(database, generator):
+    """Duplicates run once; results come back in input order with per-item errors."""
+    generator.script["broken query"] = "SELECT * FROM missing_table"
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator)
+    questions = ["Show users?", "broken query", "show  USERS", "show users"]
+    
+    outcomes = runtime.run_queries(questions, max_concurrency=4)
+    
+    assert [o.question for o in outcomes] == questions
+    assert sorted(generator.questions) == ["Show users?", "broken query"]
+    assert outcomes[0].ok and outcomes[2].results == outcomes[0].results
+    assert not outcomes[1].ok and "missing_table" in outcomes[1].error
+    
+    async_outcomes = asyncio.run(runtime.arun_queries(questions, max_concurrency=2))
+    assert [o.ok for o in async_outcomes] == [True, False, True, True]
+
+
+def test_runtime_stream_yields_batches(database, generator):
+    """Streaming mode formats rows batch by batch and releases the connection."""
+    generator.script["broken query"] = "SELECT * FROM missing_table"
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator)
+    
+    chunks = list(runtime.stream("show users"))
+    
+    assert "Generated SQL" in chunks[0]
+    assert "".join(chunks[1:]).splitlines() == ["name", "alice", "bob"]
+    assert database.engine.pool.checkedout() == 0
+    
+    errors = list(runtime.stream("broken query"))
+    assert len(errors) == 1 and "missing_table" in errors[0]
+
+
+
+def test_stream_is_capped_and_recorded_only_after_success(database, generator, monkeypatch):
+    """Streams stop at the row cap; SQL is cached only once its rows streamed."""
+    monkeypatch.setattr(
+        config, "agent", replace(config.agent, max_rows=1, stream_batch_size=1)
+    )
+    # Fails on the second row, after the first batch went out
+    generator.script["overflow"] = (
+        "SELECT CASE WHEN id > 1 THEN abs(-9223372036854775807 - 1) ELSE id END AS v FROM users"
+    )
+    cache = MemorySQLCache()
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator, sql_cache=cache)
+    
+    chunks = runtime.stream("show users")
+    assert "Generated SQL" in next(chunks)
+    assert len(cache) == 0
+    rest = "".join(chunks)
+    assert "alice" in rest and "bob" not in rest
+    assert MSG_RESULTS_TRUNCATED.format(count=1) in rest
+    assert len(cache) == 1
+    
+    monkeypatch.setattr(config, "agent", replace(config.agent, max_rows=0))
+    with pytest.raises(SQLExecutionError, match="overflow"):
+        list(runtime.stream("overflow"))
+    assert len(cache) == 1
+    assert database.engine.pool.checkedout() == 0
+
+
+RUNAWAY_SQL = (
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+    "SELECT count(*) FROM n"
+)
+
+
+def test_query_timeout_cancels_and_releases_connection(database):
+    """A runaway query is interrupted and the connection stays usable."""
+    
+    with pytest.raises(QueryTimeoutError):
+        database.execute_query(RUNAWAY_SQL, timeout=0.2)
+    assert len(database.execute_query("SELECT * FROM users", timeout=0.2)) == 2
+    
+    async def scenario():
+        with pytest.raises(QueryTimeoutError):
+            await database.aexecute_query(RUNAWAY_SQL, timeout=0.2)
+        rows = await database.aexecute_query("SELECT * FROM users", timeout=0.2)
+        await database.aclose()
+        return rows
+    
+    assert len(asyncio.run(scenario())) == 2
+
+
+def test_stream_timeout_cancels_and_releases_connection(database):
+    """Streams honour the time limit for the query, not for the consumer."""
+    
+    with pytest.raises(QueryTimeoutError):
+        list(database.stream_query(RUNAWAY_SQL, timeout=0.2))
+    assert database.engine.pool.checkedout() == 0
+    
+    batches = []
+    for batch in database.stream_query("SELECT name FROM users", batch_size=1, timeout=0.05):
+        batches.append(batch)
+        time.sleep(0.1)
+    assert [len(batch) for batch in batches] == [1, 1]
+    assert database.engine.pool.checkedout() == 0
@@ -0,0 +1,57 @@
+"""Tests for the SQL safety classifier."""
+import pytest
+
+from text_to_sql.database import DatabaseManager
+from text_to_sql.database.safety import classify_sql, sql_fingerprint
+from text_to_sql.utils.exceptions import UnsafeQueryError
+
+
+@pytest.mark.parametrize("sql_query", [
+    "SELECT updated_at, deleted_flag FROM orders",
+    "SELECT 'DROP TABLE users; --' AS note",
+    "SELECT \"update\" FROM t -- DELETE everything\n",
+    "SELECT replace(name, 'a', 'b') FROM users;",
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT (i) FROM n",
+    "EXPLAIN QUERY PLAN SELECT * FROM users",
+])
+def test_reads_are_allowed(sql_query):
+    """Keywords inside identifiers, literals and comments do not count."""
+    assert classify_sql(sql_query).is_read_only
+
+
+@pytest.mark.parametrize("sql_query, statement_type, count", [
+    ("DELETE FROM users", "DELETE", 1),
+    ("SELECT 1; DROP TABLE users", "SELECT", 2),
+    ("WITH d AS (DELETE FROM users RETURNING *) SELECT * FROM d", "SELECT", 1),
+    ("SELECT * INTO backup FROM users", "SELECT", 1),
+    ("EXPLAIN ANALYZE UPDATE users SET name = 'x'", "EXPLAIN", 1),
+    ("SELECT 'unterminated", "SELECT", 1),
+    ("PRAGMA writable_schema = 1", "PRAGMA", 1),
+    ("  ; -- nothing", "", 0),
+])
+def test_writes_are_rejected(sql_query, statement_type, count):
+    """Writes anywhere in the SQL, and multiple statements, are rejected."""
+    verdict = classify_sql(sql_query)
+    assert not verdict.is_read_only
+    assert verdict.reason
+    assert (verdict.statement_type, verdict.statement_count) == (statement_type, count)
+
+
+def test_manager_uses_classifier(tmp_path):
+    """Reads that used to trip the substring scan now execute."""
+    database = DatabaseManager(f"sqlite:///{tmp_path / 'safety.db'}")
+
+    rows = database.execute_query("SELECT 1 AS updated_at, 2 AS deleted_flag")
+    assert rows == [{"updated_at": 1, "deleted_flag": 2}]
+
+    with pytest.raises(UnsafeQueryError, match="Multiple statements"):
+        database.execute_query("SELECT 1; DELETE FROM users")
+
+
+def test_sql_fingerprint_ignores_formatting_only():
+    """Whitespace and comments do not change the key; quoted text and code do."""
+    assert sql_fingerprint("SELECT  a\nFROM t;") == sql_fingerprint("SELECT a /* note */ FROM t")
+    # A line comment swallows the rest of its line only
+    assert sql_fingerprint("SELECT 1 -- x\n, 2") != sql_fingerprint("SELECT 1 -- x , 2")
+    assert sql_fingerprint("SELECT 'a  b'") != sql_fingerprint("SELECT 'a b'")
+    assert sql_fingerprint('SELECT "a  b" FROM t') != sql_fingerprint('SELECT "a b" FROM t')
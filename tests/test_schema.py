@@ -0,0 +1,124 @@
+"""Tests for schema reflection."""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+
+from text_to_sql.database import DatabaseManager
+from text_to_sql.database.schema import (
+    ColumnInfo,
+    TableInfo,
+    reflect_tables,
+    format_schema,
+    normalize_postgres_type,
+)
+from text_to_sql.database.schema_index import SchemaIndex
+from text_to_sql.database.snapshot import SchemaSnapshotStore
+
+
+def _create_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, age INTEGER)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE orders (id INTEGER PRIMARY KEY, "
+            "user_id INTEGER NOT NULL REFERENCES users (id), total FLOAT)"
+        ))
+        conn.execute(text("CREATE VIEW adults AS SELECT * FROM users WHERE age >= 18"))
+    return engine
+
+
+def test_bulk_reflection_matches_inspector(tmp_path):
+    """The single-query path renders exactly what the inspector path renders."""
+    engine = _create_engine(tmp_path)
+    
+    bulk = reflect_tables(engine)
+    inspected = reflect_tables(engine, bulk=False)
+    
+    assert [table.name for table in bulk] == ["orders", "users"]
+    assert format_schema(bulk) == format_schema(inspected)
+    assert "  - name: VARCHAR(100) NOT NULL" in format_schema(bulk)
+    assert [table.foreign_keys for table in bulk] == [table.foreign_keys for table in inspected]
+    assert bulk[0].foreign_keys == ["users"]
+    
+    engine.dispose()
+
+
+@pytest.mark.parametrize("format_type, reflected", [
+    ("character varying(100)", postgresql.VARCHAR(100)),
+    ("character varying", postgresql.VARCHAR()),
+    ("character(3)", postgresql.CHAR(3)),
+    ("numeric(10,2)", postgresql.NUMERIC(10, 2)),
+    ("numeric", postgresql.NUMERIC()),
+    ("timestamp without time zone", postgresql.TIMESTAMP()),
+    ("timestamp(3) with time zone", postgresql.TIMESTAMP(timezone=True, precision=3)),
+    ("time without time zone", postgresql.TIME()),
+    ("double precision", postgresql.DOUBLE_PRECISION()),
+    ("integer", postgresql.INTEGER()),
+    ("bit varying(5)", postgresql.BIT(5, varying=True)),
+    ("integer[]", postgresql.ARRAY(postgresql.INTEGER())),
+    ("jsonb", postgresql.JSONB()),
+])
+def test_postgres_bulk_types_match_inspector(format_type, reflected):
+    """Catalog type names render like the types the inspector reflects them as."""
+    assert normalize_postgres_type(format_type) == str(reflected)
+
+
+def _table(name, *columns, foreign_keys=()):
+    return TableInfo(
+        name=name,
+        columns=[ColumnInfo(name=column, type="INTEGER") for column in columns],
+        foreign_keys=list(foreign_keys)
+    )
+
+
+def test_schema_index_prunes_to_relevant_tables():
+    """Matched tables and their foreign-key neighbours survive pruning."""
+    tables = [
+        _table("customers", "id", "full_name", "email"),
+        _table("order_items", "id", "order_id", "product_id", "quantity",
+               foreign_keys=["orders", "products"]),
+        _table("orders", "id", "customer_id", "order_date", foreign_keys=["customers"]),
+        _table("products", "id", "title", "price"),
+    ] + [_table(f"audit_log_{i}", "id", "event", "created_at") for i in range(20)]
+    index = SchemaIndex(tables)
+    
+    assert index.search("What is the price of each product?")[0][0] == "products"
+    
+    pruned = index.prune("Total quantity per product", top_k=2)
+    assert set(pruned.tables) == {"order_items", "products", "orders"}
+    assert "audit_log" not in pruned.schema
+    assert pruned.tokens_saved > 0
+    
+    # Nothing matches: fall back to the full schema
+    unmatched = index.prune("xyzzy", top_k=2)
+    assert unmatched.schema == index.schema
+    assert unmatched.tokens_saved == 0
+
+
+def test_schema_snapshot_warm_start_and_change_detection(tmp_path):
+    """A new manager starts from the snapshot and re-reflects only after DDL."""
+    engine = _create_engine(tmp_path)
+    url = str(engine.url)
+    store = SchemaSnapshotStore(str(tmp_path / "snapshots"))
+    
+    first = DatabaseManager(url, schema_snapshots=store)
+    schema = first.get_schema()
+    assert store.load(url) is not None
+    
+    second = DatabaseManager(url, schema_snapshots=store)
+    assert second.get_schema() == schema
+    second._refresh_thread.join()
+    assert second.refresh_schema() is False
+    
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE users ADD COLUMN email VARCHAR(200)"))
+    
+    assert second.refresh_schema() is True
+    assert "  - email: VARCHAR(200)" in second.get_schema()
+    assert "  - email: VARCHAR(200)" in DatabaseManager(url, schema_snapshots=store).get_schema()
+    
+    for manager in (first, second):
+        manager.close()
+    engine.dispose()
@@ -0,0 +1,151 @@
+"""Tests for the ASGI server."""
+import asyncio
+import json
+import threading
+
+import httpx
+
+from text_to_sql.core.runtime import TextToSQLRuntime
+from text_to_sql.database import DatabaseManager
+from text_to_sql.server import create_app
+from text_to_sql.testing import FakeSQLGenerator, LatencyModel, ScriptedResponses
+
+SCRIPT = {"Show all users": "SELECT id, name FROM users ORDER BY id"}
+
+
+def _create_runtime(url, latency="0"):
+    generator = FakeSQLGenerator(ScriptedResponses(SCRIPT), LatencyModel.parse(latency))
+    return TextToSQLRuntime(database=DatabaseManager(url), sql_generator=generator)
+
+
+async def _serve(app, requests):
+    """Start the app and send ``(method, path, body)`` requests concurrently."""
+    await app.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(
+            client.request(method, path, content=json.dumps(body) if body is not None else None)
+            for method, path, body in requests
+        ))
+
+
+def test_query_returns_sql_rows_and_timings(sqlite_url):
+    runtime = _create_runtime(sqlite_url)
+    app = create_app(runtime)
+    
+    answer, health, missing, bad = asyncio.run(_serve(app, [
+        ("POST", "/query", {"question": "Show all users"}),
+        ("GET", "/health", None),
+        ("GET", "/nowhere", None),
+        ("POST", "/query", {"question": ""}),
+    ]))
+    
+    assert answer.status_code == 200
+    body = answer.json()
+    assert body["sql"] == SCRIPT["Show all users"]
+    assert body["columns"] == ["id", "name"]
+    assert body["rows"] == [[1, "alice"], [2, "bob"]]
+    assert body["error"] == "" and "generate_sql" in body["timings"]
+    assert health.status_code == 200 and health.json()["concurrency"] == app.concurrency
+    assert missing.status_code == 404
+    assert bad.status_code == 400
+    runtime.database.close()
+
+
+def test_full_queue_is_refused_and_deadline_enforced(sqlite_url):
+    """One worker, one queue slot: the third concurrent question gets 429."""
+    runtime = _create_runtime(sqlite_url, latency="0.3")
+    app = create_app(runtime, concurrency=1, queue_size=1, request_timeout=5)
+    
+    responses = asyncio.run(_serve(app, [
+        ("POST", "/query", {"question": "Show all users"}) for _ in range(3)
+    ]))
+    assert sorted(response.status_code for response in responses) == [200, 200, 429]
+    assert any(response.headers.get("retry-after") for response in responses)
+    
+    late, = asyncio.run(_serve(app, [("POST", "/query", {"question": "Show all users", "timeout": 0.05})]))
+    assert late.status_code == 504
+    runtime.database.close()
+
+
+def test_lazy_startup_runs_once(sqlite_url):
+    """Requests arriving during startup wait for it; startup runs once."""
+    runtime = _create_runtime(sqlite_url)
+    app = create_app(runtime)
+    events = []
+    ainvoke = runtime.ainvoke
+    
+    async def slow_prewarm():
+        events.append("prewarm")
+        await asyncio.sleep(0.05)
+        events.append("ready")
+        return {}
+    
+    async def recorded_ainvoke(*args, **kwargs):
+        events.append("query")
+        return await ainvoke(*args, **kwargs)
+    
+    runtime.aprewarm = slow_prewarm
+    runtime.ainvoke = recorded_ainvoke
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                app.startup(),
+                *(client.post("/query", json={"question": "Show all users"}) for _ in range(3))
+            )
+    
+    _, *answers = asyncio.run(scenario())
+    
+    assert [answer.status_code for answer in answers] == [200, 200, 200]
+    assert events == ["prewarm", "ready", "query", "query", "query"]
+    runtime.database.close()
+
+
+def test_invalid_timeout_is_rejected(sqlite_url):
+    runtime = _create_runtime(sqlite_url)
+    app = create_app(runtime)
+    
+    responses = asyncio.run(_serve(app, [
+        ("POST", "/query", {"question": "Show all users", "timeout": timeout})
+        for timeout in (0, -1, "10", True, None)
+    ]))
+    
+    assert [response.status_code for response in responses] == [400, 400, 400, 400, 200]
+    runtime.database.close()
+
+
+def test_question_past_deadline_keeps_its_worker(sqlite_url):
+    """The worker is freed when the question finishes, not at its deadline."""
+    runtime = _create_runtime(sqlite_url, latency="0.3")
+    app = create_app(runtime, concurrency=1, queue_size=1, request_timeout=5)
+    threads = []
+    record = runtime._record
+    
+    def recorded(*args):
+        threads.append(threading.current_thread())
+        record(*args)
+    
+    runtime._record = recorded
+    
+    async def scenario():
+        await app.startup()
+        executor = app._executor
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            late = await client.post("/query", json={"question": "Show all users", "timeout": 0.05})
+            health = await client.get("/health")
+            answer = await client.post("/query", json={"question": "Show all users"})
+        await app.shutdown()
+        return late, health.json(), answer.json(), executor
+    
+    late, health, answer, executor = asyncio.run(scenario())
+    
+    assert late.status_code == 504
+    assert health["running"] == 1
+    assert answer["queued"] > 0.1 and answer["error"] == ""
+    # Answers are recorded off the event loop, in the app's worker threads
+    assert threads and all(thread.name.startswith("text-to-sql") for thread in threads)
+    assert app._executor is None and executor._shutdown
+    runtime.database.close()
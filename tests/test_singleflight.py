@@ -0,0 +1,81 @@
+"""Tests for single-flight coalescing of identical concurrent calls."""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from text_to_sql.core.runtime import TextToSQLRuntime
+from text_to_sql.utils.metrics import COALESCED_CALLS
+from text_to_sql.utils.singleflight import SingleFlight
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+    
+    def work(value):
+        calls.append(value)
+        time.sleep(0.2)
+        return value * 2
+    
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: flight.do("key", work, 21), range(4)))
+    
+    assert results == [42] * 4
+    assert calls == [21]
+    assert len(flight) == 0
+    assert flight.do("key", work, 1) == 2  # nothing is kept once the call finishes
+
+
+def test_errors_are_shared_and_cancelled_callers_do_not_cancel_the_call():
+    flight = SingleFlight("test")
+    
+    async def fail():
+        await asyncio.sleep(0.1)
+        raise ValueError("boom")
+    
+    async def slow():
+        await asyncio.sleep(0.1)
+        return "done"
+    
+    async def scenario():
+        errors = await asyncio.gather(*(flight.ado("fail", fail) for _ in range(3)),
+                                      return_exceptions=True)
+        leader = asyncio.ensure_future(flight.ado("slow", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.ado("slow", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return errors, await follower
+    
+    errors, result = asyncio.run(scenario())
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert result == "done"
+
+
+def test_runtime_coalesces_identical_questions(database, generator):
+    generator.delay = 0.2
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator)
+    coalesced = COALESCED_CALLS.value(call="generate_sql")
+    
+    async def scenario():
+        return await asyncio.gather(*(runtime.ainvoke(q) for q in ("Show users", "show users?") * 3))
+    
+    states = asyncio.run(scenario())
+    assert generator.calls == 1
+    assert COALESCED_CALLS.value(call="generate_sql") == coalesced + 5
+    assert all([row["name"] for row in state["query_results"]] == ["alice", "bob"] for state in states)
+    
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(runtime.invoke, ["Show users"] * 4))
+    assert generator.calls == 2
+
+
+def test_single_flight_can_be_disabled(database, generator):
+    generator.delay = 0.2
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator, single_flight=False)
+    
+    async def scenario():
+        return await asyncio.gather(*(runtime.ainvoke("Show users") for _ in range(3)))
+    
+    asyncio.run(scenario())
+    assert generator.calls == 3
@@ -0,0 +1,54 @@
+"""Tests for the synthetic sample-data generator."""
+from sqlalchemy import create_engine, inspect, text
+
+from text_to_sql.testing.synthetic import SyntheticDataSpec, load_synthetic_data
+
+
+def test_load_creates_schema_data_and_indexes(tmp_path):
+    """Volumes match the spec, rows are consistent and indexes exist."""
+    url = f"sqlite:///{tmp_path / 'synthetic.db'}"
+    spec = SyntheticDataSpec(users=500, products=50, orders=5000, batch_size=700)
+    
+    assert load_synthetic_data(url, spec) == {"users": 500, "products": 50, "orders": 5000}
+    
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        orphans = conn.execute(text(
+            "SELECT COUNT(*) FROM orders o LEFT JOIN users u ON u.id = o.user_id "
+            "LEFT JOIN products p ON p.id = o.product_id WHERE u.id IS NULL OR p.id IS NULL"
+        )).scalar()
+        mispriced = conn.execute(text(
+            "SELECT COUNT(*) FROM orders o JOIN products p ON p.id = o.product_id "
+            "WHERE ABS(o.total_price - p.price * o.quantity) > 0.01"
+        )).scalar()
+        # A tenth of the users should place far more than a tenth of the orders
+        top_share = conn.execute(text(
+            "SELECT SUM(n) FROM (SELECT COUNT(*) AS n FROM orders GROUP BY user_id "
+            "ORDER BY n DESC LIMIT 50)"
+        )).scalar() / 5000
+    
+    indexes = {index["name"] for index in inspect(engine).get_indexes("orders")}
+    engine.dispose()
+    
+    assert orphans == 0 and mispriced == 0
+    assert top_share > 0.3
+    assert {"ix_orders_user_id", "ix_orders_product_id", "ix_orders_order_date"} <= indexes
+
+
+def test_load_is_reproducible_and_replaces_tables(tmp_path):
+    url = f"sqlite:///{tmp_path / 'synthetic.db'}"
+    spec = SyntheticDataSpec(users=20, products=5, orders=100, seed=7)
+    
+    def snapshot():
+        engine = create_engine(url)
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT user_id, product_id, quantity FROM orders ORDER BY id")).all()
+        engine.dispose()
+        return rows
+    
+    load_synthetic_data(url, spec)
+    first = snapshot()
+    load_synthetic_data(url, spec)
+    
+    assert snapshot() == first
+    assert len(first) == 100
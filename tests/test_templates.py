@@ -0,0 +1,98 @@
+"""Tests for the template fast path in front of the LLM."""
+import asyncio
+
+import pytest
+
+from text_to_sql.core.runtime import TextToSQLRuntime
+from text_to_sql.core.templates import TemplateSQLGenerator, quote_identifier
+from text_to_sql.database import DatabaseManager
+from text_to_sql.utils.exceptions import SQLGenerationError
+
+SCHEMA = """
+Table: orders
+  - id: INTEGER NOT NULL
+  - user_id: INTEGER NOT NULL
+  - total_price: FLOAT NOT NULL
+  - order_date: DATETIME
+
+Table: products
+  - id: INTEGER NOT NULL
+  - name: VARCHAR(100) NOT NULL
+  - price: FLOAT NOT NULL
+  - stock: INTEGER
+
+Table: users
+  - id: INTEGER NOT NULL
+  - name: VARCHAR(100) NOT NULL
+  - age: INTEGER
+  - created_at: DATETIME"""
+
+
+@pytest.mark.parametrize("question, sql", [
+    ("Show all users", "SELECT * FROM users"),
+    ("list every order.", "SELECT * FROM orders"),
+    ("How many users are there?", "SELECT COUNT(*) AS count FROM users"),
+    ("count products", "SELECT COUNT(*) AS count FROM products"),
+    ("Top 5 most expensive products", "SELECT * FROM products ORDER BY price DESC LIMIT 5"),
+    ("3 cheapest products", "SELECT * FROM products ORDER BY price ASC LIMIT 3"),
+    ("10 most recent orders", "SELECT * FROM orders ORDER BY order_date DESC LIMIT 10"),
+    ("top five orders by total price", "SELECT * FROM orders ORDER BY total_price DESC LIMIT 5"),
+    ("get 2 users with the lowest age", "SELECT * FROM users ORDER BY age ASC LIMIT 2"),
+    ("What is the average price of products?", "SELECT AVG(price) AS avg_price FROM products"),
+    ("max age of users", "SELECT MAX(age) AS max_age FROM users"),
+])
+def test_common_questions_are_answered_from_templates(question, sql):
+    matched = TemplateSQLGenerator().match(question, SCHEMA)
+    assert matched is not None and matched[1] == sql
+
+
+@pytest.mark.parametrize("question", [
+    "show users who signed up last month",  # condition the templates do not model
+    "how many users are older than 30",
+    "list all customers",                   # no such table
+    "last 5 orders",                        # no ordering named
+    "average name of users",                # not numeric
+    "5 cheapest users",                     # no price column
+])
+def test_other_questions_fall_through(question):
+    assert TemplateSQLGenerator().match(question, SCHEMA) is None
+
+
+def test_generator_is_only_asked_when_no_template_matches(generator):
+    templates = TemplateSQLGenerator(generator)
+    
+    assert templates.generate("count users", SCHEMA) == "SELECT COUNT(*) AS count FROM users"
+    assert asyncio.run(templates.agenerate("Users older than 30", SCHEMA)) == generator.sql
+    assert generator.questions == ["Users older than 30"]
+    with pytest.raises(SQLGenerationError):
+        TemplateSQLGenerator().generate("Users older than 30", SCHEMA)
+
+
+def test_identifiers_are_quoted_when_needed():
+    assert quote_identifier("users") == "users"
+    assert quote_identifier("user") == '"user"'
+    assert quote_identifier("Order Items") == '"Order Items"'
+
+
+def test_runtime_answers_templates_without_the_llm(make_sqlite_url, generator):
+    database = DatabaseManager(make_sqlite_url(
+        "templates",
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, age INTEGER)",
+        "INSERT INTO users (name, age) VALUES ('alice', 31), ('bob', 25)"
+    ))
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator, templates=True)
+    
+    state = runtime.invoke("How many users are there?")
+    assert state["query_results"].rows == [(2,)]
+    assert runtime.invoke("1 oldest user")["query_results"].column("name") == ["alice"]
+    assert generator.questions == []
+    database.close()
+
+
+def test_mock_runtime_does_not_use_templates(database):
+    """Templates default to on only in front of the real LLM generator."""
+    runtime = TextToSQLRuntime(database=database, use_mock=True)
+    assert not isinstance(runtime.sql_generator, TemplateSQLGenerator)
+    
+    runtime = TextToSQLRuntime(database=database, use_mock=True, templates=True)
+    assert isinstance(runtime.sql_generator, TemplateSQLGenerator)
@@ -0,0 +1,167 @@
+"""Tests for warming database and LLM connections ahead of the query."""
+import asyncio
+import threading
+import time
+from dataclasses import replace
+
+import httpx
+import pytest
+
+from text_to_sql.core.runtime import TextToSQLRuntime, get_runtime
+from text_to_sql.core.sql_generator import warm_http_client, awarm_http_client
+from text_to_sql.database import DatabaseManager, DatabaseRegistry
+from text_to_sql.utils.config import config
+from text_to_sql.utils.exceptions import SQLGenerationError
+
+from .conftest import StubSQLGenerator
+
+
+class _SlowWarmUpDatabase(DatabaseManager):
+    """Database whose connection takes a while to warm up."""
+    
+    def __init__(self, url, delay=0.05):
+        super().__init__(url)
+        self.delay = delay
+        self.warm_ups = 0
+    
+    def warm_up(self):
+        self.warm_ups += 1
+        time.sleep(self.delay)
+        return self.delay
+    
+    async def awarm_up(self):
+        self.warm_ups += 1
+        await asyncio.sleep(self.delay)
+        return self.delay
+
+
+class _FailingSQLGenerator(StubSQLGenerator):
+    def generate(self, question, schema, examples=()):
+        raise SQLGenerationError("LLM unavailable")
+    
+    async def agenerate(self, question, schema, examples=()):
+        raise SQLGenerationError("LLM unavailable")
+
+
+def _ask(runtime, question, use_async):
+    if use_async:
+        return asyncio.run(runtime.ainvoke(question))
+    return runtime.invoke(question)
+
+
+def test_warm_up_skips_recently_used_pools(database):
+
+    assert database.warm_up() > 0
+    assert database.warm_up() == 0.0
+    database.execute_query("SELECT name FROM users")
+    assert database.warm_up() == 0.0
+    assert asyncio.run(database.awarm_up()) > 0
+
+
+def test_warm_up_logs_instead_of_raising(tmp_path):
+    database = DatabaseManager(f"sqlite:///{tmp_path / 'missing' / 'nope.db'}")
+    assert database.warm_up() >= 0
+    database.close()
+
+
+def test_replica_set_warms_the_replica_reads_go_to(make_sqlite_url):
+    registry = DatabaseRegistry()
+    database = registry.register(
+        "default", make_sqlite_url("primary"), replicas=[make_sqlite_url("replica")]
+    )
+    
+    database.warm_up()
+    assert registry.manager(database.replica_urls[0])._last_used > 0
+    assert database.primary._last_used == 0.0
+    
+    registry.close()
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_warm_up_overlaps_generation(sqlite_url, generator, use_async):
+    database = _SlowWarmUpDatabase(sqlite_url)
+    generator.delay = 0.1
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator)
+    
+    state = _ask(runtime, "Show the names of all users", use_async)
+    
+    assert state["error"] == ""
+    assert database.warm_ups == 1
+    assert state["timings"]["warm_up"] == 0.05
+    # The warm-up finished while the generator was still busy
+    assert 0.03 <= state["timings"]["overlap_saved"] <= 0.05
+    assert state["timings"]["warm_up_wait"] < 0.02
+    
+    database.close()
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_warm_up_wait_is_bounded_by_the_query_timeout(sqlite_url, generator, monkeypatch, use_async):
+    monkeypatch.setattr(config, "agent", replace(config.agent, query_timeout=0.1))
+    database = _SlowWarmUpDatabase(sqlite_url, delay=0.5)
+    runtime = TextToSQLRuntime(database=database, sql_generator=generator)
+    
+    state = _ask(runtime, "Show the names of all users", use_async)
+    
+    assert state["error"] == ""
+    assert "warm_up" not in state["timings"]
+    assert 0.1 <= state["timings"]["warm_up_wait"] < 0.3
+    
+    database.close()
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_warm_up_is_not_awaited_after_a_generation_error(sqlite_url, use_async):
+    database = _SlowWarmUpDatabase(sqlite_url, delay=0.5)
+    runtime = TextToSQLRuntime(database=database, sql_generator=_FailingSQLGenerator())
+    
+    start = time.perf_counter()
+    state = _ask(runtime, "Show the names of all users", use_async)
+    
+    assert state["error"] == "LLM unavailable"
+    assert time.perf_counter() - start < 0.3
+    assert "warm_up_wait" not in state["timings"]
+    
+    database.close()
+
+
+def test_prewarm_opens_the_llm_connection(database):
+    requests = []
+    
+    def handler(request):
+        requests.append(request.method)
+        return httpx.Response(404)
+    
+    transport = httpx.MockTransport(handler)
+    assert warm_http_client(httpx.Client(transport=transport), "http://llm.test/v1") >= 0
+    assert asyncio.run(awarm_http_client(httpx.AsyncClient(transport=transport), "http://llm.test/v1")) >= 0
+    assert requests == ["HEAD", "HEAD"]
+    
+    runtime = TextToSQLRuntime(database=database, use_mock=True)
+    assert set(runtime.prewarm()) == {"graph", "schema", "database"}
+    assert set(asyncio.run(runtime.aprewarm())) == {"graph", "schema", "database"}
+
+
+def test_process_wide_runtime_is_prewarmed_in_background(database, monkeypatch):
+    """get_runtime() warms the runtime it creates, unless told not to."""
+    warmed = threading.Event()
+    
+    class _Runtime(TextToSQLRuntime):
+        def __init__(self):
+            super().__init__(database=database, use_mock=True)
+        
+        def prewarm(self, database_name=""):
+            timings = super().prewarm(database_name)
+            warmed.set()
+            return timings
+    
+    monkeypatch.setattr("text_to_sql.core.runtime.TextToSQLRuntime", _Runtime)
+    monkeypatch.setattr("text_to_sql.core.runtime._default_runtime", None)
+    runtime = get_runtime(prewarm=False)
+    assert not warmed.wait(0.1)
+    
+    monkeypatch.setattr("text_to_sql.core.runtime._default_runtime", None)
+    runtime = get_runtime()
+    assert warmed.wait(5)
+    assert runtime._graph is not None and database._cached_schema is not None
+    assert get_runtime() is runtime
@@ -0,0 +1,49 @@
+"""Tests for workload recording and replay."""
+from text_to_sql.core.runtime import TextToSQLRuntime
+from text_to_sql.core.workload import WorkloadRecorder, read_workload
+from text_to_sql.testing import FakeSQLGenerator, RecordedSQLGenerator, ScriptedResponses, replay
+
+SCRIPT = {
+    "Show all users": "SELECT id, name FROM users ORDER BY id",
+    "Count users": "SELECT COUNT(*) AS n FROM users",
+}
+
+
+def _record(tmp_path, database):
+    log = tmp_path / "workload.jsonl"
+    recorder = WorkloadRecorder(str(log))
+    runtime = TextToSQLRuntime(
+        database=database,
+        sql_generator=FakeSQLGenerator(ScriptedResponses(SCRIPT)),
+        recorder=recorder
+    )
+    for question in ("Show all users", "Count users", "Show all users"):
+        runtime.invoke(question)
+    recorder.close()
+    return log
+
+
+def test_runtime_records_answered_questions(tmp_path, database):
+    log = _record(tmp_path, database)
+    with open(log, "a", encoding="utf-8") as f:
+        f.write('{"timestamp": 1, "question": "cut sho')  # partial line from a crash
+    
+    records = list(read_workload(str(log)))
+    
+    assert [record.question for record in records] == ["Show all users", "Count users", "Show all users"]
+    assert records[0].sql_query == SCRIPT["Show all users"]
+    assert [record.rows for record in records] == [2, 1, 2]
+    assert records[0].timestamp <= records[1].timestamp <= records[2].timestamp
+    assert "generate_sql" in records[0].timings and records[0].seconds > 0
+
+
+def test_replay_reproduces_recorded_answers(tmp_path, database):
+    records = list(read_workload(str(_record(tmp_path, database))))
+    runtime = TextToSQLRuntime(database=database, sql_generator=RecordedSQLGenerator(records))
+    
+    report = replay(runtime, records, speed=0, max_in_flight=2)
+    
+    assert len(report.results) == 3
+    assert report.errors == 0 and report.sql_mismatches == 0
+    assert [result.rows for result in report.results] == [record.rows for record in records]
+    assert "end-to-end" in report.summary()